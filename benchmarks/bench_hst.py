@@ -0,0 +1,71 @@
+import argparse
+import random
+import time
+
+from river.anomaly import HalfSpaceTrees
+
+from streamml.back.hst_numpy import NumpyHalfSpaceTrees
+
+
+def make_samples(n_samples: int, n_features: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    names = [f"f{i}" for i in range(n_features)]
+    return [{name: rng.random() for name in names} for _ in range(n_samples)]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_one_by_one(model, samples: list[dict]) -> float:
+    def loop():
+        for x in samples:
+            model.score_one(x)
+            model.learn_one(x)
+    return timed(loop)
+
+
+def run_batched(model: NumpyHalfSpaceTrees, samples: list[dict], batch: int) -> float:
+    def loop():
+        for start in range(0, len(samples), batch):
+            chunk = samples[start:start + batch]
+            model.score_many(chunk)
+            model.learn_many(chunk)
+    return timed(loop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare river HST with the NumPy HST engine.")
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--features", type=int, default=29)
+    parser.add_argument("--trees", type=int, default=10)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--window", type=int, default=250)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    samples = make_samples(args.samples, args.features, args.seed)
+    params = dict(n_trees=args.trees, height=args.height, window_size=args.window, seed=args.seed)
+
+    river_model = HalfSpaceTrees(**params)
+    numpy_model = NumpyHalfSpaceTrees(**params)
+    numpy_batched = NumpyHalfSpaceTrees(**params)
+
+    results = [
+        ("river score_one+learn_one", run_one_by_one(river_model, samples)),
+        ("numpy score_one+learn_one", run_one_by_one(numpy_model, samples)),
+        (f"numpy score_many+learn_many (batch={args.batch})", run_batched(numpy_batched, samples, args.batch)),
+    ]
+
+    base = results[0][1]
+    print(f"{args.samples} samples, {args.features} features, {args.trees} trees, height {args.height}")
+    for name, seconds in results:
+        rate = args.samples / seconds if seconds else float("inf")
+        print(f"{name:<45} {seconds:8.3f} s {rate:12.0f} samples/s  x{base / seconds:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
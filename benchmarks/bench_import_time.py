@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DEFAULT_MODULES = ["streamml.app", "streamml.daemon", "streamml.back.detector_profiles_manager"]
+SRC_PATH = Path(__file__).resolve().parent.parent / "src"
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumul, name = line.removeprefix("import time:").split("|")
+        if name.strip() == "site":
+            # Everything so far was imported by interpreter startup, not by us.
+            cumulative.clear()
+            continue
+        cumulative[name.strip()] = int(cumul)
+    return cumulative
+
+
+def measure(module: str) -> dict[str, int]:
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_PATH), os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of streamml entry points with -X importtime.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="show the N slowest imported modules")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare with a JSON file written by --output")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["modules"]
+
+    results = {}
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.runs)]
+        totals = [run[module] for run in runs]
+        median_ms = statistics.median(totals) / 1000
+
+        slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+        heavy = [(name, us) for name, us in slowest if name != module and "." not in name][:args.top]
+
+        results[module] = {"median_ms": round(median_ms, 1), "min_ms": round(min(totals) / 1000, 1)}
+
+        line = f"{module:<45} median {median_ms:8.1f} ms  min {min(totals) / 1000:8.1f} ms"
+        if module in baseline:
+            before = baseline[module]["median_ms"]
+            line += f"  (baseline {before:.1f} ms, {median_ms - before:+.1f} ms)"
+        print(line)
+        for name, us in heavy:
+            print(f"    {name:<41} {us / 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "modules": results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
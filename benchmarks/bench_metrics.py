@@ -0,0 +1,70 @@
+import argparse
+import gc
+import statistics
+import sys
+import threading
+import time
+
+from traffic import generate
+
+from streamml.back.capture_pipeline import _STOP, CapturePipeline
+from streamml.back.metrics import LatencyHistogram, metrics_registry
+from streamml.back.window import FEATURE_LIST
+
+
+def run_pipeline(packets: list, instrument: bool) -> float:
+    metrics_registry.enabled = instrument
+    pipeline = CapturePipeline(interface=None, bpf_filter="", window_duration=3600.0, queue_size=len(packets) + 2)
+    pipeline.window.enabled = set(FEATURE_LIST)
+
+    for pkt in packets:
+        pkt.time = time.time()
+        pipeline._add_to_queue(pkt)
+    # The processor stops at the sentinel after the last packet, so join() covers all of them.
+    pipeline.queue.put(_STOP)
+
+    pipeline.is_active = True
+    gc.collect()
+    worker = threading.Thread(target=pipeline._process_thread, daemon=True)
+    start = time.perf_counter()
+    worker.start()
+    worker.join()
+    elapsed = time.perf_counter() - start
+    pipeline.is_active = False
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the overhead of pipeline stage instrumentation.")
+    parser.add_argument("--packets", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=3.0, help="max allowed overhead in percent")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    hist = LatencyHistogram()
+    n_records = 1_000_000
+    start = time.perf_counter_ns()
+    for i in range(n_records):
+        hist.record_ns(i)
+    record_ns = (time.perf_counter_ns() - start) / n_records
+    print(f"LatencyHistogram.record_ns: {record_ns:.0f} ns/call")
+
+    packets = generate("steady", args.packets, seed=args.seed)
+    # Alternate the two modes so drift in machine load hits both alike.
+    plain, instrumented = [], []
+    for _ in range(args.repeat):
+        plain.append(run_pipeline(packets, instrument=False))
+        instrumented.append(run_pipeline(packets, instrument=True))
+    plain, instrumented = statistics.median(plain), statistics.median(instrumented)
+    metrics_registry.enabled = True
+
+    overhead = (instrumented - plain) / plain * 100
+    print(f"pipeline, metrics off: {args.packets / plain:10.0f} pkt/s")
+    print(f"pipeline, metrics on:  {args.packets / instrumented:10.0f} pkt/s")
+    print(f"overhead: {overhead:+.2f}% (budget {args.budget:.1f}%)")
+    return 0 if overhead <= args.budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from traffic import SCENARIOS, START_TIME, generate
+from bench_hst import make_samples
+
+from streamml.back.window import FEATURE_LIST, Window
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> dict:
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "unknown", "dirty": False}
+    return {"commit": commit, "dirty": dirty}
+
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def bench_window_add(traffic: dict, repeat: int) -> dict:
+    results = {}
+    for scenario, packets in traffic.items():
+        best = float("inf")
+        for _ in range(repeat):
+            window = Window(window_duration=3600.0, enabled_features=FEATURE_LIST)
+            window.window_start = START_TIME
+            start = time.perf_counter()
+            for pkt in packets:
+                window.add_packet(pkt, now=pkt.time)
+            best = min(best, time.perf_counter() - start)
+        results[f"window_add.{scenario}.pps"] = metric(len(packets) / best, "pkt/s", "higher")
+    return results
+
+
+def bench_finish_window(flow_counts: list[int], repeat: int, seed: int) -> dict:
+    # spoof_flood packets are (nearly) all distinct flows, so the first N packets give ~N flows.
+    packets = generate("spoof_flood", max(flow_counts), seed=seed)
+    results = {}
+    for n_flows in flow_counts:
+        best = float("inf")
+        for _ in range(repeat):
+            window = Window(window_duration=1.0, enabled_features=FEATURE_LIST)
+            for pkt in packets[:n_flows]:
+                window._process_single_packet(pkt, now=pkt.time)
+            window.flush()
+            best = min(best, window.last_finish_ns)
+        results[f"finish_window.flows_{n_flows}.ms"] = metric(best / 1e6, "ms", "lower")
+    return results
+
+
+def bench_hst_scoring(n_samples: int, seed: int) -> dict:
+    from river.anomaly import HalfSpaceTrees
+    from streamml.back.hst_numpy import NumpyHalfSpaceTrees
+
+    params = dict(n_trees=10, height=8, window_size=250, seed=seed)
+    warmup = make_samples(2 * params["window_size"], len(FEATURE_LIST), seed)
+    samples = make_samples(n_samples, len(FEATURE_LIST), seed + 1)
+
+    results = {}
+    for engine, model_cls in [("river", HalfSpaceTrees), ("numpy", NumpyHalfSpaceTrees)]:
+        model = model_cls(**params)
+        for x in warmup:
+            model.learn_one(x)
+
+        start = time.perf_counter()
+        for x in samples:
+            model.score_one(x)
+        results[f"hst_score_one.{engine}.samples_per_s"] = metric(n_samples / (time.perf_counter() - start), "samples/s", "higher")
+
+        if hasattr(model, "score_many"):
+            start = time.perf_counter()
+            model.score_many(samples)
+            results[f"hst_score_many.{engine}.samples_per_s"] = metric(n_samples / (time.perf_counter() - start), "samples/s", "higher")
+    return results
+
+
+def bench_engines(n_samples: int, seed: int) -> dict:
+    # Per-window cost of every detector engine: score_one + learn_one on a warmed-up model.
+    from streamml.back.engines import ENGINES, make_engine
+
+    warmup = make_samples(2 * 250, len(FEATURE_LIST), seed)
+    samples = make_samples(n_samples, len(FEATURE_LIST), seed + 1)
+
+    results = {}
+    for engine in ENGINES:
+        model = make_engine(engine, {"seed": seed})
+        for x in warmup:
+            model.learn_one(x)
+
+        start = time.perf_counter()
+        for x in samples:
+            model.score_one(x)
+            model.learn_one(x)
+        results[f"engine.{engine}.us_per_sample"] = metric((time.perf_counter() - start) / n_samples * 1e6, "us", "lower")
+    return results
+
+
+def bench_dedup(traffic: dict, repeat: int) -> dict:
+    # Every frame twice, as a mirror port delivers it; the cost is per frame checked.
+    from streamml.back.dedup import FrameDeduplicator
+
+    results = {}
+    for scenario, packets in traffic.items():
+        frames = [(bytes(pkt), float(pkt.time)) for pkt in packets]
+        best = float("inf")
+        for _ in range(repeat):
+            dedup = FrameDeduplicator(horizon=0.05)
+            start = time.perf_counter()
+            for frame, ts in frames:
+                dedup.is_duplicate(frame, ts)
+                dedup.is_duplicate(frame, ts)
+            best = min(best, time.perf_counter() - start)
+        results[f"dedup.{scenario}.ns_per_frame"] = metric(best / (2 * len(frames)) * 1e9, "ns", "lower")
+        results[f"dedup.{scenario}.suppressed"] = metric(dedup.duplicates / len(frames), "ratio", "info")
+    return results
+
+
+def bench_replay(traffic: dict, window_duration: float, engines: list[str], repeat: int) -> dict:
+    # Imported here so XDG_DATA_HOME (logs and anomaly pcaps) already points at the scratch directory.
+    from streamml.back.detector_profile_HST import DetectorProfileHST
+
+    results = {}
+    for engine in engines:
+        for scenario, packets in traffic.items():
+            best = float("inf")
+            for run in range(repeat):
+                profile = DetectorProfileHST(f"bench-{engine}-{scenario}-{run}", {
+                    "features": FEATURE_LIST,
+                    "params": {"engine": engine, "window_duration": window_duration},
+                })
+                profile._ensure_model()
+                window = Window(window_duration=window_duration, enabled_features=FEATURE_LIST)
+                window.window_start = START_TIME
+
+                start = time.perf_counter()
+                for pkt in packets:
+                    result = window.add_packet(pkt, now=pkt.time)
+                    if result is not None:
+                        profile.process_window(*result)
+                best = min(best, time.perf_counter() - start)
+                profile.db.close()
+
+            results[f"replay.{engine}.{scenario}.pps"] = metric(len(packets) / best, "pkt/s", "higher")
+            results[f"replay.{engine}.{scenario}.windows"] = metric(profile.windows_analyzed, "windows", "info")
+            results[f"replay.{engine}.{scenario}.anomalies"] = metric(profile.anomalies_detected, "anomalies", "info")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or current["better"] not in ("higher", "lower") or not before["value"]:
+            continue
+        change = (current["value"] - before["value"]) / before["value"] * 100
+        worse = -change if current["better"] == "higher" else change
+        marker = ""
+        if worse > tolerance:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<45} {before['value']:>14.3f} -> {current['value']:>14.3f} {current['unit']:<10} {change:+7.1f}%{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible streamml benchmark suite on synthetic traffic.")
+    parser.add_argument("--packets", type=int, default=20000, help="packets per scenario")
+    parser.add_argument("--flows", type=int, nargs="+", default=[100, 1000, 10000, 50000], help="flow counts for finish_window")
+    parser.add_argument("--samples", type=int, default=5000, help="samples for HST scoring")
+    parser.add_argument("--window-duration", type=float, default=0.1, help="window length for replay, in traffic seconds")
+    parser.add_argument("--engines", nargs="+", default=["river", "numpy"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="compare with an earlier results file")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="percent slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.packets, args.flows, args.samples, args.repeat = 3000, [100, 1000, 5000], 1000, 1
+
+    scratch = tempfile.TemporaryDirectory(prefix="streamml-bench-")
+    os.environ["XDG_DATA_HOME"] = scratch.name
+
+    print(f"Generating {args.packets} packets for {', '.join(SCENARIOS)} (seed {args.seed})")
+    traffic = {scenario: generate(scenario, args.packets, seed=args.seed) for scenario in SCENARIOS}
+
+    results = {}
+    sections = [
+        ("window_add", lambda: bench_window_add(traffic, args.repeat)),
+        ("finish_window", lambda: bench_finish_window(args.flows, args.repeat, args.seed)),
+        ("hst_scoring", lambda: bench_hst_scoring(args.samples, args.seed)),
+        ("engines", lambda: bench_engines(args.samples, args.seed)),
+        ("dedup", lambda: bench_dedup(traffic, args.repeat)),
+        ("replay", lambda: bench_replay(traffic, args.window_duration, args.engines, args.repeat)),
+    ]
+    for section, run in sections:
+        section_results = run()
+        section_results[f"{section}.peak_rss_mb"] = metric(peak_rss_mb(), "MiB", "info")
+        for name, value in section_results.items():
+            print(f"{name:<45} {value['value']:>14.3f} {value['unit']}")
+        results.update(section_results)
+    scratch.cleanup()
+    results["peak_rss_mb"] = metric(peak_rss_mb(), "MiB", "lower")
+
+    report = {
+        **git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['commit']}{'-dirty' if report['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.baseline} ({baseline.get('commit', '?')}):")
+        if baseline.get("config") != report["config"]:
+            print("warning: baseline was run with a different configuration")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.tolerance:.0f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,14 @@ from textual.app import App, ComposeResult
 from textual.widgets import TabbedContent, TabPane
 from textual.theme import Theme
 
-from pathlib import Path
-import os
-
 from .front.detector_tab import DetectorTab
 from .front.detector_profiles_tab import DetectorProfilesTab
 from .front.options_tab import OptionsTab
 
-from .back.detector_profiles_manager import DetectorProfilesManager
-
+from .back.detector_profiles_manager import DetectorProfilesManager, PROFILES_DIR, LEGACY_PROFILES_FILE
+from .back.notification_service import notification_service
+from .back.metrics import metrics_server
 
-XDG_DATA_HOME = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local/share"))
 
 theme = Theme(
     name="pastel_blue_theme",        
@@ -31,7 +28,10 @@ class Streamml(App):
 
     def __init__(self):
         super().__init__()
-        self.detector_profiles_manager = DetectorProfilesManager(profiles_file=f"{XDG_DATA_HOME}/netmonitor/objects/detector_profiles_objects")
+        self.detector_profiles_manager = DetectorProfilesManager(
+            profiles_dir=PROFILES_DIR,
+            legacy_profiles_file=LEGACY_PROFILES_FILE,
+        )
 
     def compose(self) -> ComposeResult:
         with TabbedContent():
@@ -54,7 +54,13 @@ class Streamml(App):
         return self
 
 def main():
-    Streamml().run()
+    app = Streamml()
+    try:
+        app.run()
+    finally:
+        app.detector_profiles_manager.shutdown()
+        notification_service.stop()
+        metrics_server.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,184 @@
+import math
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+from scapy.all import RawPcapNgReader, RawPcapReader, conf
+
+from .window import Window, merge_aggregates
+
+# A byte offset is remembered every MARK_EVERY records, to split a capture into equal pieces.
+MARK_EVERY = 1024
+
+
+def iter_raw_pcap(path: str, start: int | None = None, end: int | None = None) -> Iterator[tuple[float, int, bytes, int]]:
+    """Records of a capture; start/end are byte offsets of record boundaries (see scan_capture)."""
+    reader = RawPcapReader(path)
+    try:
+        if start is not None:
+            reader.f.seek(start)
+        while end is None or reader.f.tell() < end:
+            try:
+                data, meta = next(reader)
+            except StopIteration:
+                break
+            if hasattr(meta, "sec"):
+                ts = meta.sec + meta.usec / (1e9 if reader.nano else 1e6)
+                linktype = reader.linktype
+            else:
+                if meta.tshigh is None:
+                    continue
+                ts = ((meta.tshigh << 32) + meta.tslow) / meta.tsresol
+                linktype = meta.linktype
+            # Header-only evidence pcaps are truncated; the wire length keeps size features right.
+            yield ts, linktype, data, meta.wirelen or len(data)
+    finally:
+        reader.close()
+
+
+def scan_capture(path: str, parts: int = 1) -> tuple[float, float, list[tuple]] | None:
+    """Earliest and latest timestamp of a capture, and (start, end) byte ranges splitting it into about `parts` pieces.
+
+    Classic pcap files are scanned by their record headers only. A pcapng
+    file can only be read from the start (its interface blocks describe
+    the records after them), so it is one piece of (None, None).
+    """
+    reader = RawPcapReader(path)
+    try:
+        if isinstance(reader, RawPcapNgReader):
+            reader.close()
+            reader = None
+            timestamps = [ts for ts, _, _, _ in iter_raw_pcap(path)]
+            if not timestamps:
+                return None
+            return min(timestamps), max(timestamps), [(None, None)]
+
+        f = reader.f
+        header = reader.endian + "IIII"
+        resolution = 1e9 if reader.nano else 1e6
+        first = last = None
+        marks = []
+        count = 0
+        while True:
+            offset = f.tell()
+            record = f.read(16)
+            if len(record) < 16:
+                break
+            sec, frac, caplen, _ = struct.unpack(header, record)
+            f.seek(caplen, os.SEEK_CUR)
+            if count % MARK_EVERY == 0:
+                marks.append(offset)
+            count += 1
+            ts = sec + frac / resolution
+            # Merged or reordered captures are not in time order, so look at every record.
+            if first is None or ts < first:
+                first = ts
+            if last is None or ts > last:
+                last = ts
+    finally:
+        if reader is not None:
+            reader.close()
+
+    if first is None:
+        return None
+    step = max(1, math.ceil(len(marks) / max(parts, 1)))
+    bounds = marks[::step]
+    return first, last, list(zip(bounds, bounds[1:] + [None]))
+
+
+def pcap_time_range(path: str) -> tuple[float, float] | None:
+    scan = scan_capture(path)
+    return scan[:2] if scan else None
+
+
+def extract_range(path: str, t0: float, start: int | None, end: int | None,
+                  window_duration: float, features: list[str]) -> list[tuple[int, dict, set]]:
+    """Window aggregates of the records between two byte offsets, by window index from t0, with their flow keys.
+
+    Records are not assumed to be in time order: a window seen more than
+    once is merged, and the caller merges windows split across pieces.
+    The flow keys let a flow seen in several parts count once.
+    """
+    window = Window(window_duration=window_duration, enabled_features=features)
+    window.keep_raw = False
+    partials = {}
+    current = None
+
+    def close_window():
+        if window.flows:
+            agg, keys = window.aggregate(), set(window.flows)
+            if current in partials:
+                agg, keys = _merge_partials([partials[current], (agg, keys)])
+            partials[current] = agg, keys
+        window.clear()
+
+    for ts, linktype, data, wirelen in iter_raw_pcap(path, start, end):
+        index = int((ts - t0) // window_duration)
+        if index != current:
+            if current is not None:
+                close_window()
+            if window.conns is not None:
+                window.conns.advance(ts)
+            current = index
+
+        try:
+            pkt = conf.l2types.num2layer[linktype](data)
+        except Exception:
+            continue
+        pkt.time = ts
+        pkt.wirelen = wirelen
+        window._process_single_packet(pkt, ts)
+
+    if current is not None:
+        close_window()
+    return [(index, agg, keys) for index, (agg, keys) in partials.items()]
+
+
+def _merge_partials(partials: list[tuple[dict, set]]) -> tuple[dict, set]:
+    agg = merge_aggregates([agg for agg, _ in partials])
+    keys = set().union(*(keys for _, keys in partials))
+    # merge_aggregates expects disjoint flows (as in shards); here the same flow can be in several parts.
+    agg["flows"] = len(keys)
+    return agg, keys
+
+
+def extract_windows(pcap_paths: list[str], window_duration: float, features: list[str],
+                    workers: int | None = None,
+                    progress: Callable[[int, int], None] | None = None) -> list[tuple[float, dict]]:
+    workers = workers or os.cpu_count() or 1
+
+    tasks = []
+    starts = []
+    for path in pcap_paths:
+        scan = scan_capture(path, workers)
+        if scan is None:
+            continue
+        t0, _, pieces = scan
+        starts.append(t0)
+        for start, end in pieces:
+            tasks.append((len(starts) - 1, (path, t0, start, end, window_duration, features)))
+
+    windows = []
+    if not tasks:
+        return windows
+
+    partials = {}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+        futures = [(file_no, pool.submit(extract_range, *task)) for file_no, task in tasks]
+        for done, (file_no, future) in enumerate(futures, start=1):
+            for index, agg, keys in future.result():
+                partials.setdefault((file_no, index), []).append((agg, keys))
+            if progress:
+                progress(done, len(futures))
+
+    window = Window(window_duration=window_duration, enabled_features=features)
+    for (file_no, index), parts in partials.items():
+        window_features = window.features_from_aggregate(_merge_partials(parts)[0])
+        if window_features:
+            windows.append((starts[file_no] + index * window_duration, window_features))
+
+    windows.sort(key=lambda w: w[0])
+    return windows
@@ -0,0 +1,425 @@
+import heapq
+import threading
+import queue
+import time
+
+from .window import Window
+from .dedup import FrameDeduplicator
+from .metrics import StageMetrics, metrics_registry
+from .load_shedder import EXPENSIVE_FEATURES, LOAD_LEVELS, LoadShedder, flow_hash
+
+PIPELINE_STAGES = ("capture", "queue_wait", "window_add", "finish_window")
+STOP_TIMEOUT = 2.0
+
+# Multi-interface captures hold packets this long (or up to this many) to merge them in timestamp order.
+REORDER_DELAY = 0.1
+REORDER_MAX_PACKETS = 4096
+
+# Queued after the last packet by stop(); the processor closes the final window when it gets here.
+_STOP = object()
+
+
+def interface_list(interface) -> list:
+    """Interfaces of a capture: None (scapy's default), a name, a list of names or comma-separated names."""
+    if interface is None:
+        return [None]
+    if isinstance(interface, str):
+        names = [name.strip() for name in interface.split(",")]
+    else:
+        names = list(interface)
+    # dict.fromkeys drops repeats but keeps the order, which names the per-interface features.
+    names = list(dict.fromkeys(name for name in names if name))
+    return names or [None]
+
+
+def capture_key(interface, bpf_filter: str, window_duration: float, shards: int = 0, snaplen: int = 0, dedup_horizon: float = 0.0) -> tuple:
+    interfaces = interface_list(interface)
+    interface = interfaces[0] if len(interfaces) == 1 else tuple(interfaces)
+    return (interface, bpf_filter or "", float(window_duration), int(shards), int(snaplen), float(dedup_horizon))
+
+
+class _ReorderBuffer:
+    """Merges the packets of several captures into one timestamp-ordered stream.
+
+    Each packet is held until REORDER_DELAY after its capture timestamp, so
+    one that a slower capture delivers within that delay still goes out in
+    order. Packets later than that go out at once and are counted as late;
+    the time they are released at never goes backwards.
+    """
+
+    def __init__(self, delay: float = REORDER_DELAY, max_packets: int = REORDER_MAX_PACKETS):
+        self.delay = float(delay)
+        self.max_packets = int(max_packets)
+        self.heap = []
+        self.seq = 0
+        self.last_ts = 0.0
+        self.late = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, item: tuple):
+        # The sequence number keeps packets with equal timestamps in arrival order.
+        heapq.heappush(self.heap, (float(item[1].time), self.seq, item))
+        self.seq += 1
+
+    def pop_ready(self, now: float | None = None) -> list[tuple]:
+        """(release time, item) pairs whose delay is over, oldest first."""
+        cutoff = (time.time() if now is None else now) - self.delay
+        return self._pop(lambda heap: heap[0][0] <= cutoff or len(heap) > self.max_packets)
+
+    def drain(self) -> list[tuple]:
+        return self._pop(lambda heap: True)
+
+    def _pop(self, ready) -> list[tuple]:
+        heap = self.heap
+        out = []
+        while heap and ready(heap):
+            ts, _, item = heapq.heappop(heap)
+            if ts < self.last_ts:
+                self.late += 1
+            else:
+                self.last_ts = ts
+            out.append((self.last_ts, item))
+        return out
+
+
+class CapturePipeline:
+
+    def __init__(
+        self,
+        interface,
+        bpf_filter: str,
+        window_duration: float,
+        queue_size: int = 10000,
+        name: str = "",
+        load_shedding: bool = True,
+        snaplen: int = 0,
+        dedup_horizon: float = 0.0
+    ):
+        self.name = name
+        self.interface = interface
+        self.interfaces = interface_list(interface)
+        self.bpf_filter = bpf_filter or ""
+        self.window_duration = float(window_duration)
+        self.queue_size = int(queue_size)
+        self.snaplen = int(snaplen)
+        self.dedup_horizon = float(dedup_horizon)
+        self.dedup = self._new_dedup()
+
+        self.queue = queue.Queue(maxsize=self.queue_size)
+        self.window = Window(window_duration=self.window_duration, enabled_features=[])
+        self.window.set_interfaces(self.interfaces)
+
+        self.members = []
+        self._members_lock = threading.Lock()
+
+        self.sniffers = []
+        self.sockets = []
+        self._reorder = None
+        self.processor_thread = None
+        self.is_active = False
+        self._stop_deadline = 0.0
+
+        self.packets_read = 0
+        self.packets_dropped = 0
+        self.windows_analyzed = 0
+        self.stage_metrics = StageMetrics(PIPELINE_STAGES)
+        self.profiler_session = None
+
+        self.shedder = LoadShedder(enabled=load_shedding)
+        self.sample_rate = 1
+        self.packets_shed = 0
+
+    def __repr__(self):
+        names = [m.profile_name for m in self.members]
+        return f"<CapturePipeline interface={self.interface!r}, members={names}, active={self.is_active}>"
+
+    @property
+    def key(self) -> tuple:
+        return capture_key(self.interface, self.bpf_filter, self.window_duration, snaplen=self.snaplen, dedup_horizon=self.dedup_horizon)
+
+    def _new_dedup(self, ethertype_offset: int | None = 12):
+        return FrameDeduplicator(self.dedup_horizon, ethertype_offset) if self.dedup_horizon > 0 else None
+
+    @property
+    def packets_duplicate(self) -> int:
+        return self.dedup.duplicates if self.dedup else 0
+
+    def add_member(self, profile):
+        with self._members_lock:
+            if profile not in self.members:
+                self.members.append(profile)
+            self._update_features()
+
+    def remove_member(self, profile) -> int:
+        """Returns how many members are left; the caller stops the pipeline at 0.
+
+        The last member stays until stop() so that it still gets the final window.
+        """
+        with self._members_lock:
+            if profile in self.members:
+                if len(self.members) == 1:
+                    return 0
+                self.members.remove(profile)
+                self._update_features()
+            return len(self.members)
+
+    def member_names(self) -> list[str]:
+        return [m.profile_name for m in self.members]
+
+    def metric_samples(self) -> dict:
+        conns = self.window.conns
+        return {
+            "packets_read_total": ("counter", self.packets_read),
+            "packets_dropped_total": ("counter", self.packets_dropped),
+            "packets_shed_total": ("counter", self.packets_shed),
+            "packets_duplicate_total": ("counter", self.packets_duplicate),
+            "packets_late_total": ("counter", self._reorder.late if self._reorder else 0),
+            "load_level": ("gauge", self.shedder.level),
+            "windows_total": ("counter", self.windows_analyzed),
+            "queue_depth": ("gauge", self.queue.qsize()),
+            "queue_capacity": ("gauge", self.queue_size),
+            "members": ("gauge", len(self.members)),
+            "connections_tracked": ("gauge", len(conns.entries) if conns else 0),
+            "connections_untracked_total": ("counter", conns.overflow if conns else 0),
+        }
+
+    def load_state(self) -> dict:
+        return {
+            "level": self.shedder.level,
+            "name": self.shedder.state["name"],
+            "sample_rate": self.sample_rate,
+            "packets_shed": self.packets_shed,
+            "level_changes": self.shedder.level_changes,
+        }
+
+    def _apply_load_level(self):
+        state = self.shedder.state
+        self.sample_rate = state["sample_rate"]
+        self.window.weight = state["sample_rate"]
+        self.window.shed_features = EXPENSIVE_FEATURES if state["cheap_features"] else set()
+        self.window.keep_raw = state["evidence"]
+
+    def _update_load(self, lag_ns: int):
+        occupancy = self.queue.qsize() / self.queue_size if self.queue_size else 0.0
+        if self.shedder.update(occupancy, lag_ns / 1e9, time.monotonic()):
+            self._apply_load_level()
+
+    def _update_features(self):
+        enabled = set()
+        for m in self.members:
+            enabled.update(m.features)
+        self.window.enabled = enabled
+
+    def refresh_features(self):
+        with self._members_lock:
+            self._update_features()
+
+    def can_retune(self, profile) -> bool:
+        # Capture settings are only changed in place for a pipeline nobody else relies on.
+        return self.members == [profile] and profile.shards == 0
+
+    def retune(self, interface, bpf_filter: str, snaplen: int, window_duration: float, dedup_horizon: float = 0.0) -> bool:
+        """Change capture settings while running; the queue, window and processor thread stay."""
+        if (interface_list(interface), bpf_filter or "", int(snaplen)) != (self.interfaces, self.bpf_filter, self.snaplen):
+            self._swap_capture(interface, bpf_filter, snaplen)
+        if float(dedup_horizon) != self.dedup_horizon:
+            self.dedup_horizon = float(dedup_horizon)
+            self.dedup = self._new_dedup()
+        # Takes effect at the next window boundary check, so the current window is kept.
+        self.window_duration = float(window_duration)
+        self.window.window_duration = self.window_duration
+        return True
+
+    def _open_capture(self, interfaces: list, bpf_filter: str, snaplen: int) -> tuple[list, list]:
+        """One socket and sniffer thread per interface, all feeding the queue."""
+        from scapy.all import AsyncSniffer
+        from .capture_socket import open_capture_socket
+
+        sockets, sniffers = [], []
+        try:
+            # Opened here rather than in the sniffer threads so a bad interface or filter fails right away.
+            for iface in interfaces:
+                sockets.append(open_capture_socket(iface, bpf_filter, snaplen))
+            for iface, sock in zip(interfaces, sockets):
+                prn = lambda pkt, iface=iface: self._add_to_queue(pkt, iface)
+                sniffer = AsyncSniffer(opened_socket=sock, store=False, prn=prn)
+                sniffer.start()
+                sniffers.append(sniffer)
+        except Exception:
+            self._close_capture(sockets, sniffers)
+            raise
+        return sockets, sniffers
+
+    def _close_capture(self, sockets: list, sniffers: list):
+        for sniffer in sniffers:
+            sniffer.stop()
+        for sock in sockets:
+            sock.close()
+
+    def _swap_capture(self, interface, bpf_filter: str, snaplen: int):
+        # The new capture starts before the old one stops, so no packets are missed in between.
+        interfaces = interface_list(interface)
+        sockets, sniffers = self._open_capture(interfaces, bpf_filter, snaplen)
+        old_sockets, old_sniffers = self.sockets, self.sniffers
+        self.sockets, self.sniffers = sockets, sniffers
+        self.interface, self.interfaces = interface, interfaces
+        self.bpf_filter, self.snaplen = bpf_filter or "", int(snaplen)
+        self.window.set_interfaces(interfaces)
+        if len(interfaces) > 1 and self._reorder is None:
+            self._reorder = _ReorderBuffer()
+        self._close_capture(old_sockets, old_sniffers)
+
+    def start(self):
+        if self.is_active:
+            return
+
+        self.sockets, self.sniffers = self._open_capture(self.interfaces, self.bpf_filter, self.snaplen)
+        self._reorder = _ReorderBuffer() if len(self.interfaces) > 1 else None
+        self.is_active = True
+        self.window.window_start = time.time()
+
+        self.processor_thread = threading.Thread(target=self._process_thread, name="processor", daemon=True)
+        self.processor_thread.start()
+        metrics_registry.register("pipeline", self.name, self)
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        """Stop capturing, score what is left of the current window and join the processor."""
+        if not self.is_active and self.processor_thread is None:
+            return
+        metrics_registry.unregister("pipeline", self.name, self)
+        self._stop_deadline = time.monotonic() + timeout
+        self.is_active = False
+        self._close_capture(self.sockets, self.sniffers)
+        self.sockets, self.sniffers = [], []
+
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._join(self.processor_thread)
+        self.processor_thread = None
+        self._clear_members()
+
+    def _join(self, thread):
+        if thread is None or thread is threading.current_thread():
+            return
+        thread.join(max(0.0, self._stop_deadline - time.monotonic()))
+        if thread.is_alive():
+            print(f"Pipeline {self.name}: {thread.name} thread did not stop in time")
+
+    def _clear_members(self):
+        with self._members_lock:
+            self.members.clear()
+            self._update_features()
+
+    def _add_to_queue(self, pkt, iface=None):
+        if self.queue:
+            dedup = self.dedup
+            if dedup is not None and dedup.is_duplicate(pkt.original or bytes(pkt), float(pkt.time)):
+                return
+
+            rate = self.sample_rate
+            if rate > 1:
+                h = flow_hash(pkt)
+                if h is not None and h % rate:
+                    self.packets_shed += 1
+                    return
+
+            try:
+                self.queue.put_nowait((time.perf_counter_ns(), pkt, iface))
+                self.packets_read += 1
+            except queue.Full:
+                self.packets_dropped += 1
+
+            if metrics_registry.enabled:
+                delay = time.time() - float(pkt.time)
+                self.stage_metrics.record_ns("capture", max(0, int(delay * 1e9)))
+
+    def _process_thread(self):
+        processed = 0
+        while True:
+            if self.profiler_session is not None and self.profiler_session.poll():
+                self.profiler_session = None
+            reorder = self._reorder
+
+            try:
+                # Held packets are due within the reorder delay, so wait no longer than that for new ones.
+                item = self.queue.get(timeout=reorder.delay if reorder else 1)
+            except queue.Empty:
+                if not self.is_active:
+                    break
+                if reorder:
+                    self._process_merged(reorder.pop_ready())
+                self._update_load(0)
+                continue
+            if item is _STOP:
+                break
+            if not self.is_active and time.monotonic() > self._stop_deadline:
+                # Out of time for the backlog; the final window gets what was read so far.
+                break
+
+            processed += 1
+            if not processed & 63:
+                self._update_load(time.perf_counter_ns() - item[0])
+
+            if reorder is None:
+                self._process_packet(item)
+            else:
+                reorder.push(item)
+                self._process_merged(reorder.pop_ready())
+
+        if reorder:
+            self._process_merged(reorder.drain())
+        if self.window.flows:
+            self._deliver_window(*self.window.flush())
+
+        if self.profiler_session is not None:
+            self.profiler_session.poll(final=True)
+            self.profiler_session = None
+
+    def _process_merged(self, ready: list[tuple]):
+        # Merged streams use capture timestamps for window boundaries, which the reorder buffer keeps monotonic.
+        for ts, item in ready:
+            self._process_packet(item, ts)
+
+    def _process_packet(self, item: tuple, now: float | None = None):
+        stages = self.stage_metrics.stages
+        enqueued_ns, pkt, iface = item
+
+        instrument = metrics_registry.enabled
+        if instrument:
+            start_ns = time.perf_counter_ns()
+            stages["queue_wait"].record_ns(start_ns - enqueued_ns)
+
+        result = self.window.add_packet(pkt, now, iface)
+
+        if instrument:
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            if result is not None:
+                finish_ns = self.window.last_finish_ns
+                stages["finish_window"].record_ns(finish_ns)
+                elapsed_ns -= finish_ns
+            stages["window_add"].record_ns(elapsed_ns)
+
+        if result is not None:
+            self._deliver_window(*result)
+
+    def _deliver_window(self, features: dict, raw_packets: list):
+        self.windows_analyzed += 1
+
+        if features:
+            state = LOAD_LEVELS[self.shedder.window_level]
+            features["load_level"] = self.shedder.window_level
+            features["sample_rate"] = state["sample_rate"]
+        self.shedder.start_window()
+
+        with self._members_lock:
+            members = list(self.members)
+
+        for m in members:
+            try:
+                m.process_window(features, raw_packets)
+            except Exception as e:
+                print(f"Error processing window for {m.profile_name}: {e}")
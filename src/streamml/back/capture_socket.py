@@ -0,0 +1,107 @@
+import socket
+
+# Header-only capture keeps Ethernet + VLAN + IPv4 with options (or IPv6) + TCP with options.
+HEADER_SNAPLEN = 128
+MIN_SNAPLEN = 64
+
+SO_ATTACH_FILTER = 26
+BPF_RET_K = 0x06
+
+_socket_cls = None
+
+
+class _AuxRecorder:
+    # Sits between scapy's recvmsg parsing and the socket to keep the original frame length.
+    def __init__(self, sock):
+        self.sock = sock
+        self.caplen = 0
+        self.wirelen = 0
+
+    def recvmsg(self, *args):
+        from scapy.supersocket import PACKET_AUXDATA, tpacket_auxdata
+        from scapy.data import SOL_PACKET
+
+        pkt, ancdata, flags, addr = self.sock.recvmsg(*args)
+        self.caplen = self.wirelen = len(pkt)
+        for level, kind, data in ancdata:
+            if level == SOL_PACKET and kind == PACKET_AUXDATA:
+                try:
+                    self.wirelen = tpacket_auxdata.from_buffer_copy(data).tp_len
+                except ValueError:
+                    pass
+        return pkt, ancdata, flags, addr
+
+
+def attach_snaplen_filter(sock, bpf_filter: str, iface, snaplen: int):
+    from scapy.libs.structures import bpf_insn, sock_fprog
+
+    if not bpf_filter:
+        insns = (bpf_insn * 1)(bpf_insn(BPF_RET_K, 0, 0, snaplen))
+        sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, sock_fprog(1, insns))
+        return
+
+    # A classic BPF program returns how many bytes the kernel keeps, so capping
+    # every accepting return of the compiled filter truncates in the kernel.
+    from scapy.arch.common import compile_filter, free_filter
+    program = compile_filter(bpf_filter, iface)
+    try:
+        for i in range(program.bf_len):
+            insn = program.bf_insns[i]
+            if insn.code == BPF_RET_K and insn.k:
+                insn.k = min(insn.k, snaplen)
+        sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, sock_fprog(program.bf_len, program.bf_insns))
+    finally:
+        free_filter(program)
+
+
+def _get_socket_cls():
+    global _socket_cls
+    if _socket_cls is not None:
+        return _socket_cls
+
+    from scapy.arch.linux import L2ListenSocket
+
+    class SnaplenListenSocket(L2ListenSocket):
+        """L2 listen socket that truncates frames in the kernel and keeps their wire length."""
+
+        desc = "read packet headers at layer 2 using Linux PF_PACKET sockets"
+
+        def __init__(self, iface=None, filter=None, snaplen: int = 0, **kwargs):
+            super().__init__(iface=iface, filter=filter, **kwargs)
+            self.snaplen = int(snaplen)
+            self.wirelen = 0
+            self._aux = _AuxRecorder(self.ins)
+            if self.snaplen:
+                try:
+                    attach_snaplen_filter(self.ins, filter, self.iface, self.snaplen)
+                except (OSError, ImportError) as e:
+                    # Still correct, only without the kernel-side savings.
+                    print(f"Cannot set snaplen on {self.iface}, truncating in user space: {e}")
+
+        def _recv_raw(self, sock, x):
+            pkt, sa_ll, ts = super()._recv_raw(self._aux if sock is self.ins else sock, x)
+            if pkt:
+                # A VLAN tag put back from auxdata counts towards the wire length too.
+                self.wirelen = self._aux.wirelen + max(0, len(pkt) - self._aux.caplen)
+                if self.snaplen and len(pkt) > self.snaplen:
+                    pkt = pkt[:self.snaplen]
+            return pkt, sa_ll, ts
+
+        def recv(self, x=65535, **kwargs):
+            pkt = super().recv(x, **kwargs)
+            if pkt is not None and self.snaplen:
+                pkt.wirelen = self.wirelen
+            return pkt
+
+    _socket_cls = SnaplenListenSocket
+    return _socket_cls
+
+
+def open_capture_socket(interface, bpf_filter: str = "", snaplen: int = 0):
+    """Listen socket for a capture; snaplen > 0 keeps only that many bytes of each frame."""
+    if snaplen and snaplen < MIN_SNAPLEN:
+        raise ValueError(f"snaplen must be 0 (full frames) or at least {MIN_SNAPLEN}")
+    if not snaplen:
+        from scapy.all import conf
+        return conf.L2listen(iface=interface, filter=bpf_filter or None)
+    return _get_socket_cls()(iface=interface, filter=bpf_filter or None, snaplen=snaplen)
@@ -0,0 +1,171 @@
+IDLE_TIMEOUT = 60.0
+HALF_OPEN_TIMEOUT = 10.0
+MAX_CONNECTIONS = 1 << 16
+TICK = 1.0
+
+# Connection states. OTHER is any flow that is not TCP; it only ends by going idle.
+OTHER, HALF_OPEN, ESTABLISHED, CLOSED = range(4)
+
+FIN, SYN, RST, ACK = 0x01, 0x02, 0x04, 0x10
+
+
+def conn_key(src, dst, proto, sport: int = 0, dport: int = 0) -> tuple:
+    # Both directions of a connection share one key.
+    if (src, sport) <= (dst, dport):
+        return (proto, src, sport, dst, dport)
+    return (proto, dst, dport, src, sport)
+
+
+class ConnectionTracker:
+    """Connections by 5-tuple across window boundaries, in bounded memory.
+
+    Idle connections expire through a timer wheel of one-second slots.
+    Every tracked connection is due in a slot, and a slot is only checked
+    when its tick passes. A connection that saw traffic since it was
+    scheduled is moved to the slot of its new deadline, so the cost per
+    packet is amortized O(1). A closed connection is rescheduled to go a
+    tick later; the slot it had before finds it gone or replaced and skips
+    it. Past max_connections, new connections are counted but not tracked
+    (see `overflow`). This keeps memory capped under SYN or spoofed-source
+    floods.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = IDLE_TIMEOUT,
+        half_open_timeout: float = HALF_OPEN_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+        tick: float = TICK
+    ):
+        self.max_connections = int(max_connections)
+        self.tick = float(tick)
+        # Indexed by state. A closed connection stays one tick, so the last ACK of the close is not a new connection.
+        self.timeouts = (float(idle_timeout), float(half_open_timeout), float(idle_timeout), self.tick)
+
+        self.entries = {}
+        self.slots = [[] for _ in range(int(max(self.timeouts) / self.tick) + 2)]
+        self.cursor = None
+
+        # Gauges and counts are weighted: under load shedding each connection stands for `weight` (see packet()).
+        self.half_open = 0
+        self.active = 0
+        self.overflow = 0
+
+        # Since the last start_window().
+        self.new = 0
+        self.ended = 0
+        # Whole microseconds, so sums from several shards add up exactly.
+        self.duration_us = 0
+
+    def packet(self, key: tuple, now: float, flags: int | None = None, weight: int = 1):
+        """Account one packet; flags are the TCP flags, None for other protocols.
+
+        A connection is counted with the weight of the packet that opened it.
+        """
+        if self.cursor is None or now >= (self.cursor + 1) * self.tick:
+            self.advance(now)
+
+        entry = self.entries.get(key)
+        if entry is None:
+            if flags is None:
+                state = OTHER
+            elif flags & (FIN | RST):
+                # The end of something we never saw start, e.g. RST backscatter; not worth a slot.
+                return
+            else:
+                # A SYN opens a handshake; anything else is a connection that started before we looked.
+                state = HALF_OPEN if flags & SYN else ESTABLISHED
+            self.new += weight
+            if len(self.entries) >= self.max_connections:
+                self.overflow += 1
+                return
+            self._open(key, now, state, weight)
+            return
+
+        entry[1] = now
+        if flags is None:
+            return
+        state = entry[2]
+        if flags & (FIN | RST):
+            if state != CLOSED:
+                self._end(entry)
+                entry[2] = CLOSED
+                self._schedule(key, entry, now + self.timeouts[CLOSED])
+        elif state == HALF_OPEN:
+            if flags & ACK and not flags & SYN:
+                entry[2] = ESTABLISHED
+                self.half_open -= entry[3]
+        elif state == CLOSED and flags & SYN and not flags & ACK:
+            # Same 5-tuple reused for a new connection before the old entry expired.
+            self._open(key, now, HALF_OPEN, weight)
+            self.new += weight
+
+    def advance(self, now: float):
+        """Expire connections whose timeout has passed; packet() calls this as ticks go by."""
+        tick = int(now // self.tick)
+        if self.cursor is None:
+            self.cursor = tick
+            return
+        if tick <= self.cursor:
+            return
+
+        slots = self.slots
+        n = len(slots)
+        entries = self.entries
+        timeouts = self.timeouts
+        # After a gap longer than the wheel every slot is due once.
+        for t in range(max(self.cursor + 1, tick - n + 1), tick + 1):
+            i = t % n
+            due, slots[i] = slots[i], []
+            for key, entry in due:
+                if entries.get(key) is not entry:
+                    continue  # ended and replaced, or already removed through its other slot
+                deadline = entry[1] + timeouts[entry[2]]
+                if deadline <= now:
+                    del entries[key]
+                    if entry[2] != CLOSED:
+                        self._end(entry)
+                else:
+                    self._schedule(key, entry, deadline, t + 1)
+        self.cursor = tick
+
+    def _open(self, key: tuple, now: float, state: int, weight: int):
+        # A new list even for a reused key, so slots still holding the old one skip it.
+        entry = self.entries[key] = [now, now, state, weight]
+        self.active += weight
+        if state == HALF_OPEN:
+            self.half_open += weight
+        self._schedule(key, entry, now + self.timeouts[state])
+
+    def _schedule(self, key: tuple, entry: list, deadline: float, earliest: int | None = None):
+        if earliest is None:
+            earliest = self.cursor + 1
+        tick = max(int(deadline // self.tick), earliest)
+        self.slots[tick % len(self.slots)].append((key, entry))
+
+    def _end(self, entry: list):
+        weight = entry[3]
+        self.active -= weight
+        if entry[2] == HALF_OPEN:
+            self.half_open -= weight
+        else:
+            self.ended += weight
+            self.duration_us += round((entry[1] - entry[0]) * 1e6) * weight
+
+    def snapshot(self) -> dict:
+        # Counts of the current window and gauges of the table; sums of these merge across shards.
+        return {
+            "new": self.new,
+            "half_open": self.half_open,
+            "active": self.active,
+            "ended": self.ended,
+            "duration_us": self.duration_us,
+            # Unweighted size of the table, for metrics.
+            "tracked": len(self.entries),
+            "overflow": self.overflow,
+        }
+
+    def start_window(self):
+        self.new = 0
+        self.ended = 0
+        self.duration_us = 0
@@ -0,0 +1,75 @@
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .detector_profile_HST import XDG_DATA_HOME
+
+DEFAULT_SOCKET_PATH = f"{os.environ.get('XDG_RUNTIME_DIR', f'{XDG_DATA_HOME}/streamml')}/streamml.sock"
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request)
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ControlServer:
+    def __init__(self, socket_path: str, dispatch: Callable[[dict], dict]):
+        self.socket_path = Path(socket_path)
+        self.dispatch = dispatch
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+        self._server = _UnixServer(str(self.socket_path), _ControlHandler)
+        self._server.dispatch = self.dispatch
+        os.chmod(self.socket_path, 0o600)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="control-socket", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def send_command(socket_path: str, cmd: str, timeout: float = 10.0, **kwargs) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps({"cmd": cmd, **kwargs}).encode() + b"\n")
+
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
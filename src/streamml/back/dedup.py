@@ -0,0 +1,81 @@
+import threading
+
+# Bytes of the L4 header and payload hashed after the IP fields; enough to tell apart different segments of a flow.
+PAYLOAD_PREFIX = 64
+MAX_ENTRIES = 1 << 16
+
+VLAN_ETHERTYPES = (b"\x81\x00", b"\x88\xa8", b"\x91\x00")
+ETHERTYPE_IPV4 = b"\x08\x00"
+ETHERTYPE_IPV6 = b"\x86\xdd"
+
+
+def frame_digest(frame: bytes, ethertype_offset: int | None = 12) -> int:
+    """Hash of the parts of a frame that a mirror port or router does not change.
+
+    MACs, VLAN tags, TTL/hop limit, DSCP and the IPv4 checksum are left out,
+    so the ingress and egress copies of a packet hash the same. Frames that
+    are not IP, or of an unknown link type, are hashed as they are.
+    """
+    if ethertype_offset is None:
+        return hash(frame[:PAYLOAD_PREFIX * 2])
+    offset = ethertype_offset
+    ethertype = frame[offset:offset + 2]
+    while ethertype in VLAN_ETHERTYPES:
+        offset += 4
+        ethertype = frame[offset:offset + 2]
+    ip = offset + 2
+
+    if ethertype == ETHERTYPE_IPV4 and len(frame) >= ip + 20:
+        l4 = ip + (frame[ip] & 0x0F) * 4
+        # Total length, id and fragment offset; protocol; addresses; then the start of the payload.
+        return hash(frame[ip + 2:ip + 8] + frame[ip + 9:ip + 10] + frame[ip + 12:ip + 20] + frame[l4:l4 + PAYLOAD_PREFIX])
+    if ethertype == ETHERTYPE_IPV6 and len(frame) >= ip + 40:
+        # Payload length and next header, addresses, then the start of the payload.
+        return hash(frame[ip + 4:ip + 7] + frame[ip + 8:ip + 40 + PAYLOAD_PREFIX])
+    return hash(frame[ethertype_offset:ethertype_offset + PAYLOAD_PREFIX * 2])
+
+
+class FrameDeduplicator:
+    """Drops the second copy of a frame, as SPAN and mirror ports deliver a packet on ingress and on egress.
+
+    Digests are kept in two generations of hash sets that rotate every
+    `horizon` seconds, so a frame is remembered for at least one horizon
+    at O(1) cost per frame. A generation holds at most
+    `max_entries` digests: past that it rotates early, which keeps memory
+    fixed and only shortens the horizon. A genuine resend with the same
+    headers and payload inside the horizon counts as a duplicate too.
+    """
+
+    def __init__(self, horizon: float, ethertype_offset: int | None = 12, max_entries: int = MAX_ENTRIES):
+        self.horizon = float(horizon)
+        self.ethertype_offset = ethertype_offset
+        self.max_entries = int(max_entries)
+
+        self.current = set()
+        self.previous = set()
+        self.rotated_at = 0.0
+        self.duplicates = 0
+        self.early_rotations = 0
+        # Captures of several interfaces call this from one sniffer thread each.
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, frame: bytes, now: float) -> bool:
+        digest = frame_digest(frame, self.ethertype_offset)
+        with self._lock:
+            full = len(self.current) >= self.max_entries
+            if full or now - self.rotated_at >= self.horizon:
+                if full:
+                    self.early_rotations += 1
+                previous = self.previous
+                previous.clear()
+                if now - self.rotated_at >= 2 * self.horizon:
+                    # Idle for two horizons: what is in the current generation is too old as well.
+                    self.current.clear()
+                self.previous, self.current = self.current, previous
+                self.rotated_at = now
+
+            if digest in self.current or digest in self.previous:
+                self.duplicates += 1
+                return True
+            self.current.add(digest)
+            return False
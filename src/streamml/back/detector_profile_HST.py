@@ -1,20 +1,52 @@
 import threading
-import queue
 import time
 import os
+import pickle
 from pathlib import Path
-from scapy.all import wrpcap, AsyncSniffer 
 
-from river.anomaly import HalfSpaceTrees
 from tinydb import TinyDB
-from tinydb.table import Document
 
-from .window import Window
+from .capture_pipeline import CapturePipeline, capture_key, interface_list
+from .metrics import StageMetrics, metrics_registry
 from .notification_service import notification_service
+from .profiler import make_session
+from .load_shedder import LOAD_LEVELS
+from .score_history import SCORE_HISTORY_SIZE, ScoreHistory
+from .window import IFACE_COUNTERS, iface_feature_names
 
 XDG_DATA_HOME = Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local/share"))
 LOGS_PATH = f"{XDG_DATA_HOME}/streamml/profiles_logs"
 PCAP_PATH = f"{XDG_DATA_HOME}/streamml/profiles_pcaps"
+PROFILER_PATH = f"{XDG_DATA_HOME}/streamml/profiler"
+EXPORT_PATH = f"{XDG_DATA_HOME}/streamml/features"
+
+PROFILE_STAGES = ("score_learn", "handle_anomaly")
+
+# How a parameter change reaches a running profile (see reconfigure()).
+CAPTURE_PARAMS = {"interface", "bpf_filter", "snaplen", "window_duration", "shards", "dedup_ms"}
+MODEL_PARAMS = {"trees", "height", "window", "seed", "engine", "projections", "bins", "z_scale"}
+RESTART_PARAMS = {
+    "queue_size", "execution", "history_size", "share_capture", "load_shedding",
+    "feature_export", "export_rotate_mb", "export_rotate_minutes",
+}
+LIVE_PARAMS = {"threshold", "checkpoint_interval", "checkpoint_keep", "restore_checkpoint"}
+RECONFIGURABLE_PARAMS = CAPTURE_PARAMS | MODEL_PARAMS | RESTART_PARAMS | LIVE_PARAMS
+
+
+def write_pcap(filename: str, raw_packets: list):
+    linktype = getattr(raw_packets, "linktype", None)
+    if linktype is None:
+        from scapy.all import wrpcap
+        wrpcap(filename, raw_packets)
+        return
+
+    # Sharded pipelines keep evidence as undissected (timestamp, frame, wire length) tuples.
+    from scapy.utils import RawPcapWriter
+    with RawPcapWriter(filename, linktype=linktype, snaplen=65535) as writer:
+        writer.write_header(None)
+        for ts, frame, wirelen in raw_packets:
+            sec = int(ts)
+            writer.write_packet(frame, sec=sec, usec=int((ts - sec) * 1e6), wirelen=wirelen)
 
 
 class DetectorProfileHST:
@@ -26,55 +58,76 @@ class DetectorProfileHST:
     ):
         self.profile_name = profile_name
         self.features = input_data.get("features", [])
-        self.params = input_data.get("params", {})
+        self._load_params(input_data.get("params", {}))
+        self.logs_path = f"{LOGS_PATH}/{profile_name}.json"
+        os.makedirs(os.path.dirname(self.logs_path), exist_ok=True)
+        
+        self.is_active = False
+
+        self.notify_enabled = bool(input_data.get("notify_enabled", False))
+
+        self.model = None
+        self.store = None
+        self.config_dirty = True
+        self.model_dirty = False
+        self.model_updates = 0
+        self.last_checkpoint = None
+        self._init_runtime_objects()
+
+    def _load_params(self, params: dict):
+        self.params = params
         self.n_trees = int(self.params.get("trees", 10))
         self.height = int(self.params.get("height", 8))
         self.window_size = int(self.params.get("window", 250))
         self.seed = int(self.params.get("seed", 42))
+        self.engine = self.params.get("engine", "river")
         self.threshold = float(self.params.get("threshold", 0.7))
         self.window_duration = float(self.params.get("window_duration", 10.0))
         self.bpf_filter = self.params.get("bpf_filter", "")
         self.interface = self.params.get("interface", None)
         self.queue_size = int(self.params.get("queue_size", 10000))
-        self.logs_path = f"{LOGS_PATH}/{profile_name}.json"
-        os.makedirs(os.path.dirname(self.logs_path), exist_ok=True)
-        
-        self.is_active = False
-
-        self.notify_enabled = False
-        self._init_runtime_objects()
+        self.checkpoint_interval = float(self.params.get("checkpoint_interval", 300.0))
+        self.checkpoint_keep = int(self.params.get("checkpoint_keep", 3))
+        self.restore_checkpoint = bool(self.params.get("restore_checkpoint", True))
+        self.share_capture = bool(self.params.get("share_capture", True))
+        self.load_shedding = bool(self.params.get("load_shedding", True))
+        self.execution = self.params.get("execution", "thread")
+        self.shards = int(self.params.get("shards", 0))
+        self.history_size = int(self.params.get("history_size", SCORE_HISTORY_SIZE))
+        self.snaplen = int(self.params.get("snaplen", 0))
+        self.dedup_ms = float(self.params.get("dedup_ms", 0))
+        self.feature_export = self.params.get("feature_export", "")
+        self.export_rotate_mb = float(self.params.get("export_rotate_mb", 64))
+        self.export_rotate_minutes = float(self.params.get("export_rotate_minutes", 60))
 
 
     def _init_runtime_objects(self):
-        self.queue = queue.Queue(maxsize=self.queue_size)
+        self._model_lock = threading.Lock()
         
         os.makedirs(f"{LOGS_PATH}", exist_ok=True)
         self.db = TinyDB(f"{LOGS_PATH}/{self.profile_name}.json")
-        
-        self.model = HalfSpaceTrees(
-            n_trees=self.n_trees,
-            height=self.height,
-            window_size=self.window_size,
-            seed=self.seed
-        )
 
-        self.window = Window(
-            window_duration=self.window_duration, 
-            enabled_features=self.features
-        )
-        
-        self.processor_thread = None
+        self.pipeline = None
+        self.worker = None
+        self.feature_sink = None
+        self._worker_stats = {}
+        self.stage_metrics = StageMetrics(PROFILE_STAGES)
+        self.profiler_session = None
 
         self.packets_read = 0      
         self.windows_analyzed = 0   
-        
-        if not hasattr(self, 'plot_data'):
-            self.plot_data = []
+        self.anomalies_detected = 0
+        self.windows_degraded = 0
+        self._last_sample = {}
+        self._score_listeners = []
+
+        if getattr(self, "score_history", None) is None:
+            self.score_history = ScoreHistory(self.history_size)
 
 
     def __getstate__(self):
         state = self.__dict__.copy()
-        cols_to_remove = ['sniffer_thread', 'processor_thread', 'queue', 'db', 'window']
+        cols_to_remove = ['sniffer', 'sniffer_thread', 'processor_thread', 'queue', 'db', 'window', 'pipeline', 'stage_metrics', 'profiler_session', '_last_sample', 'worker', '_worker_stats', '_model_lock', 'store', '_score_listeners', 'feature_sink']
         for col in cols_to_remove:
             if col in state:
                 del state[col]
@@ -82,100 +135,425 @@ class DetectorProfileHST:
 
     def __setstate__(self, state):
         self.__dict__.update(state)
+        self.__dict__.setdefault("model", None)
+        self.__dict__.setdefault("notify_enabled", False)
+        self.__dict__.setdefault("model_updates", 0)
+        self.__dict__.setdefault("last_checkpoint", None)
+        self.__dict__.setdefault("checkpoint_interval", 300.0)
+        self.__dict__.setdefault("checkpoint_keep", 3)
+        self.__dict__.setdefault("restore_checkpoint", True)
+        self.__dict__.setdefault("share_capture", True)
+        self.__dict__.setdefault("load_shedding", True)
+        self.__dict__.setdefault("execution", "thread")
+        self.__dict__.setdefault("shards", 0)
+        self.__dict__.setdefault("snaplen", 0)
+        self.__dict__.setdefault("history_size", SCORE_HISTORY_SIZE)
+        self.__dict__.setdefault("feature_export", "")
+        self.__dict__.setdefault("export_rotate_mb", 64.0)
+        self.__dict__.setdefault("export_rotate_minutes", 60.0)
+        legacy_plot_data = self.__dict__.pop("plot_data", None)
+        if legacy_plot_data is not None and "score_history" not in self.__dict__:
+            self.score_history = ScoreHistory(self.history_size)
+            self.score_history.extend(legacy_plot_data)
+        self.__dict__.setdefault("engine", "river")
+        self.store = None
+        self.config_dirty = True
+        self.model_dirty = self.model is not None
         self._init_runtime_objects()
         self.is_active = False 
 
     def __repr__(self):
         return f"<DetectorProfileHST profile_name={self.profile_name!r}, active={self.is_active}>"
 
-    def turn_on(self):
+    def _new_model(self):
+        from .engines import make_engine
+        return make_engine(self.engine, self.params)
+
+    def _ensure_model(self):
+        if self.model is not None:
+            return
+        model = None
+        if self.store:
+            model = self.store.load_latest_model(self.profile_name, prefer_checkpoint=self.restore_checkpoint)
+        self.model = model if model is not None else self._new_model()
+
+    def snapshot_model(self) -> tuple[bytes | None, int]:
+        with self._model_lock:
+            if self.model is None:
+                return None, self.model_updates
+            data = pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)
+            return data, self.model_updates
+
+    def dump_model(self) -> bytes | None:
+        with self._model_lock:
+            if self.model is None:
+                return None
+            data = pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)
+            self.model_dirty = False
+            return data
+
+    def to_config(self) -> dict:
+        return {
+            "profile_name": self.profile_name,
+            "features": self.features,
+            "params": self.params,
+            "notify_enabled": self.notify_enabled,
+        }
+
+    @property
+    def capture_key(self) -> tuple:
+        return capture_key(self.interface, self.bpf_filter, self.window_duration, self.shards, self.snaplen, self.dedup_ms / 1000)
+
+    @property
+    def runs_in_process(self) -> bool:
+        return self.execution == "process"
+
+    def turn_on(self, pipeline: CapturePipeline | None = None):
         if self.is_active:
             return
 
-        self.is_active = True
+        if self.runs_in_process:
+            self._turn_on_worker()
+            return
+
+        self._ensure_model()
         os.makedirs(os.path.dirname(self.logs_path), exist_ok=True)
-        self.window.window_duration = self.window_duration
-        self.window.window_start = time.time()
-
-        self.sniffer = AsyncSniffer(
-            iface=self.interface,
-            filter=self.bpf_filter,
-            store=False,
-            prn=self._add_to_queue
+
+        if pipeline is None:
+            pipeline = self._new_pipeline()
+
+        self._start_feature_sink()
+        pipeline.add_member(self)
+        try:
+            pipeline.start()
+        except Exception:
+            if pipeline.remove_member(self) == 0:
+                pipeline.stop()
+            self._stop_feature_sink()
+            raise
+        self.pipeline = pipeline
+        self.is_active = True
+        metrics_registry.register("profile", self.profile_name, self)
+
+    def _new_pipeline(self) -> CapturePipeline:
+        if self.shards > 0:
+            from .sharded_pipeline import ShardedCapturePipeline
+            return ShardedCapturePipeline(
+                interface=self.interface,
+                bpf_filter=self.bpf_filter,
+                window_duration=self.window_duration,
+                shards=self.shards,
+                queue_size=self.queue_size,
+                name=self.profile_name,
+                snaplen=self.snaplen,
+                dedup_horizon=self.dedup_ms / 1000
+            )
+        return CapturePipeline(
+            interface=self.interface,
+            bpf_filter=self.bpf_filter,
+            window_duration=self.window_duration,
+            queue_size=self.queue_size,
+            name=self.profile_name,
+            load_shedding=self.load_shedding,
+            snaplen=self.snaplen,
+            dedup_horizon=self.dedup_ms / 1000
         )
-        self.sniffer.start()
 
-        self.processor_thread = threading.Thread(target=self._process_thread, daemon=True)
+    def reconfigure(self, changes: dict, find_pipeline=None) -> dict:
+        """Apply parameter and feature changes, live where possible.
+
+        Returns what happened: "capture" is "in_place" when the running
+        pipeline was retuned, "moved" when the profile had to join another
+        pipeline (find_pipeline(profile) may offer a shared one), or None.
+        Model and window state are kept either way; on error nothing changes.
+        """
+        changes = dict(changes)
+        features = changes.pop("features", None)
+        old_key = self.capture_key
+        old_params, old_features = self.params, list(self.features)
+
+        try:
+            self._load_params({**self.params, **changes})
+            if features is not None:
+                self.features = list(features)
+            self.config_dirty = True
+            return self._apply_reconfigure(changes, features, old_key, set(old_features), find_pipeline)
+        except Exception:
+            self._load_params(old_params)
+            self.features = old_features
+            if self.pipeline is not None and features is not None:
+                self.pipeline.refresh_features()
+            raise
+
+    def _apply_reconfigure(self, changes: dict, features, old_key: tuple, old_features: set, find_pipeline) -> dict:
+        result = {"capture": None, "added_features": [], "removed_features": [], "deferred": []}
+        if features is not None:
+            result["added_features"] = sorted(set(self.features) - old_features)
+            result["removed_features"] = sorted(old_features - set(self.features))
+        result["deferred"] = sorted(k for k in changes if k in RESTART_PARAMS | MODEL_PARAMS)
+
+        pipeline = self.pipeline
+        if pipeline is None:
+            return result
+
+        if features is not None:
+            # Every engine skips features missing from a sample (HST routes them by mass), so dropped
+            # features need no migration; added ones are only used once the model is retrained.
+            pipeline.refresh_features()
+            kept = set(self.sample_features())
+            self._last_sample = {k: v for k, v in self._last_sample.items() if k in kept}
+
+        if self.capture_key != old_key:
+            if pipeline.can_retune(self) and pipeline.retune(self.interface, self.bpf_filter, self.snaplen, self.window_duration, self.dedup_ms / 1000):
+                result["capture"] = "in_place"
+            else:
+                self.move_to_pipeline(find_pipeline(self) if find_pipeline else None)
+                result["capture"] = "moved"
+        return result
+
+    def move_to_pipeline(self, pipeline: CapturePipeline | None = None):
+        # Capture changes that cannot be made in place: the model and history stay, only the capture changes.
+        old = self.pipeline
+        new = pipeline or self._new_pipeline()
+        new.add_member(self)
+        try:
+            new.start()
+        except Exception:
+            if new.remove_member(self) == 0:
+                new.stop()
+            raise
+        self.pipeline = new
+        if old is not None and old.remove_member(self) == 0:
+            old.stop()
+
+    def _turn_on_worker(self):
+        if self.store is None:
+            raise RuntimeError("process execution needs a profile store")
+
+        from .profile_worker import ProfileWorker
+
+        # The worker process owns the model from now on; drop our copy so nothing here can overwrite its saves.
+        with self._model_lock:
+            self.model = None
+            self.model_dirty = False
+
+        self._worker_stats = {}
+        self.worker = ProfileWorker(self, self.store.root)
+        self.worker.start()
+        self.is_active = True
 
-        self.processor_thread.start()
+    def apply_worker_stats(self, stats: dict, scores: list):
+        self._worker_stats = stats
+        if scores:
+            self.score_history.extend(scores)
+            self._publish_scored(scores[-1])
+        self.packets_read = stats.get("packets_sniffed", 0)
+        self.windows_analyzed = stats.get("windows_processed", 0)
+        self.anomalies_detected = stats.get("anomalies_detected", 0)
+        self.windows_degraded = stats.get("windows_degraded", 0)
+        self.last_checkpoint = stats.get("last_checkpoint", self.last_checkpoint)
 
     def turn_off(self):
         self.is_active = False
-        if self.sniffer:
-            self.sniffer.stop()
-
-        time.sleep(0.2)
-
-    def _add_to_queue(self, pkt):
-        if self.queue:
-            try:
-                self.queue.put_nowait(pkt)
-                self.packets_read += 1
-            except queue.Full:
-                pass
+        if self.worker is not None:
+            worker, self.worker = self.worker, None
+            worker.stop()
+            return
 
-    def _process_thread(self):
-        while self.is_active:
-            try:
-                pkt = self.queue.get(timeout=1)
-            except queue.Empty:
-                continue
+        metrics_registry.unregister("profile", self.profile_name, self)
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
 
-            result = self.window.add_packet(pkt)
+        self.packets_read = pipeline.packets_read
+        self.pipeline = None
+        if pipeline.remove_member(self) == 0:
+            pipeline.stop()
+        self._stop_feature_sink()
 
-            if result is None:
-                continue
+    def _start_feature_sink(self):
+        if not self.feature_export:
+            return
+        from .feature_sink import FeatureSink
+
+        self.feature_sink = FeatureSink(
+            f"{EXPORT_PATH}/{self.profile_name}",
+            self.profile_name,
+            self.feature_export,
+            rotate_bytes=int(self.export_rotate_mb * 1024 * 1024),
+            rotate_seconds=self.export_rotate_minutes * 60
+        )
+        self.feature_sink.start()
+
+    def _stop_feature_sink(self):
+        # Detached first: a window still being scored on the pipeline thread then skips the export.
+        sink, self.feature_sink = self.feature_sink, None
+        if sink is not None:
+            sink.stop()
+
+    def start_profiler(self, mode: str = "sampling", duration: float = 10.0, output_path: str | None = None):
+        if not self.is_active:
+            raise RuntimeError("profile is not active")
+
+        if self.worker is not None:
+            if (self.profiler_status() or {}).get("running"):
+                raise RuntimeError("profiler is already running")
+            session = make_session(mode, duration, f"{PROFILER_PATH}/{self.profile_name}", output_path)
+            self.worker.send("profiler_start", mode=mode, duration=duration, output_path=session.output_path)
+            return session
+
+        pipeline = self.pipeline
+        if pipeline is None:
+            raise RuntimeError("profile is not active")
+        if self.profiler_session is not None and not self.profiler_session.finished.is_set():
+            raise RuntimeError("profiler is already running")
+
+        session = make_session(mode, duration, f"{PROFILER_PATH}/{self.profile_name}", output_path)
+        self.profiler_session = session
+        session.start(pipeline)
+        return session
+
+    def stop_profiler(self) -> bool:
+        if self.worker is not None:
+            if not (self.profiler_status() or {}).get("running"):
+                return False
+            return self.worker.send("profiler_stop")
+
+        session = self.profiler_session
+        if session is None or session.finished.is_set():
+            return False
+        session.stop()
+        return True
+
+    def profiler_status(self) -> dict | None:
+        if self.worker is not None:
+            return self._worker_stats.get("profiler")
+        return self.profiler_session.status() if self.profiler_session else None
+
+    def process_window(self, features: dict, raw_packets: list):
+        self.windows_analyzed += 1
+
+        if not features:
+            return
 
-            features, raw_packets = result
-            self.windows_analyzed += 1
-            
-            if not features:
-                continue
+        load_level = features.get("load_level", 0)
+        if load_level:
+            self.windows_degraded += 1
 
-            sample = {feat: 0.0 for feat in self.features}
-            for k, v in features.items():
-                if k in sample:
-                    sample[k] = float(v)
+        sample = self.make_sample(features)
 
+        start_ns = time.perf_counter_ns()
+        with self._model_lock:
             score = self.model.score_one(sample)
             self.model.learn_one(sample)
-            
-            self.plot_data.append(score)
-            if len(self.plot_data) > 30:
-                self.plot_data.pop(0)
+            self.model_dirty = True
+            self.model_updates += 1
+        if metrics_registry.enabled:
+            self.stage_metrics.record_ns("score_learn", time.perf_counter_ns() - start_ns)
+
+        self.score_history.append(score)
+        self._publish_scored(score)
+
+        sink = self.feature_sink
+        if sink is not None:
+            sink.append(score, sample, score > self.threshold, load_level)
+
+        if score > self.threshold:
+            start_ns = time.perf_counter_ns()
+            self.anomalies_detected += 1
+            self._handle_anomaly(score, sample, raw_packets, load_level)
+            if metrics_registry.enabled:
+                self.stage_metrics.record_ns("handle_anomaly", time.perf_counter_ns() - start_ns)
+
+    def metric_samples(self) -> dict:
+        return {
+            "windows_total": ("counter", self.windows_analyzed),
+            "windows_degraded_total": ("counter", self.windows_degraded),
+            "anomalies_total": ("counter", self.anomalies_detected),
+            "model_updates_total": ("counter", self.model_updates),
+            "last_score": ("gauge", self.score_history.last or 0.0),
+            "threshold": ("gauge", self.threshold),
+        }
+
+    def add_score_listener(self, callback):
+        # callback(profile, score) runs on the thread that scored the window; keep it cheap.
+        if callback not in self._score_listeners:
+            self._score_listeners.append(callback)
 
-            if score > self.threshold:
-                self._handle_anomaly(score, sample, raw_packets)
+    def remove_score_listener(self, callback):
+        if callback in self._score_listeners:
+            self._score_listeners.remove(callback)
 
-    def _handle_anomaly(self, score: float, features: dict, raw_packets: list):
+    def _publish_scored(self, score: float):
+        for callback in list(self._score_listeners):
+            try:
+                callback(self, score)
+            except Exception as e:
+                print(f"Error in score listener of {self.profile_name}: {e}")
+
+    def sample_features(self) -> list[str]:
+        """Names in a model sample: the features, with "iface_counters" expanded per interface."""
+        if IFACE_COUNTERS not in self.features:
+            return self.features
+        names = [feat for feat in self.features if feat != IFACE_COUNTERS]
+        return names + iface_feature_names(interface_list(self.interface))
+
+    def make_sample(self, features: dict, last: dict | None = None) -> dict:
+        # Features shed under load keep their last value instead of dropping to 0.
+        # Passing `last` carries values from it instead, leaving the live capture's sample alone.
+        previous = self._last_sample if last is None else last
+        sample = {feat: previous.get(feat, 0.0) for feat in self.sample_features()}
+        for k, v in features.items():
+            if k in sample:
+                sample[k] = float(v)
+        if last is None:
+            self._last_sample = sample
+        return sample
+
+    def learn_samples(self, samples, batch_size: int = 1024) -> int:
+        self._ensure_model()
+        samples = list(samples)
+
+        if not hasattr(self.model, "learn_many"):
+            batch_size = 1
+
+        for start in range(0, len(samples), batch_size):
+            batch = samples[start:start + batch_size]
+            with self._model_lock:
+                if batch_size == 1:
+                    self.model.learn_one(batch[0])
+                else:
+                    self.model.learn_many(batch)
+                self.model_dirty = True
+                self.model_updates += len(batch)
+        return len(samples)
+
+    def _handle_anomaly(self, score: float, features: dict, raw_packets: list, load_level: int = 0):
         timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
 
-        os.makedirs(os.path.dirname(f"{PCAP_PATH}/{self.profile_name}"), exist_ok=True)
+        os.makedirs(f"{PCAP_PATH}/{self.profile_name}", exist_ok=True)
         filename = f"{PCAP_PATH}/{self.profile_name}/anom_{timestamp}.pcap"
         
         if raw_packets:
             try:
-                wrpcap(filename, raw_packets)
+                write_pcap(filename, raw_packets)
             except Exception as e:
                 print(f"Error saving pcap: {e}")
+                filename = ""
+        else:
+            filename = ""
+
+        load = LOAD_LEVELS[load_level]
 
         if self.notify_enabled:
-            msg = f"*Anomaly detected: {self.profile_name}*\nScore: `{score:.4f}`\nSaved: `{filename}`"
+            msg = f"*Anomaly detected: {self.profile_name}*\nScore: `{score:.4f}`\nSaved: `{filename or '-'}`"
+            if load_level:
+                msg += f"\nLoad shedding: `{load['name']}` (1/{load['sample_rate']} flows)"
             notification_service.send_message(message=msg)
 
-        if self.db:
+        if self.db is not None:
             self.db.insert(
-                Document({
+                {
                     "ts": time.time(),
                     "timestamp": timestamp,
                     "profile": self.profile_name,
@@ -183,7 +561,9 @@ class DetectorProfileHST:
                     "pcap": filename,
                     "pkt_rate": features.get("pkt_rate", 0),
                     "proto_info": f"TCP:{features.get('proto_tcp_ratio',0):.2f} UDP:{features.get('proto_udp_ratio',0):.2f}",
-                }, doc_id=None)
+                    "load_level": load["name"],
+                    "sample_rate": load["sample_rate"],
+                }
             )
 
     def to_dict(self):
@@ -196,20 +576,41 @@ class DetectorProfileHST:
         }
         
     def get_logs(self):
-        if self.db:
+        if self.db is not None:
             return self.db.all()
         return []
         
     def clear_logs(self):
-        if self.db:
+        if self.db is not None:
             self.db.truncate()
 
     def get_runtime_stats(self):
-        return {
+        pipeline = self.pipeline
+        sink = self.feature_sink
+        stats = {
             "is_active": self.is_active,
             "notify_enabled": self.notify_enabled,
-            "packets_sniffed": getattr(self, "packets_read", 0),
-            "queue_size": self.queue.qsize() if hasattr(self, "queue") and self.queue else 0,
+            "packets_sniffed": pipeline.packets_read if pipeline else getattr(self, "packets_read", 0),
+            "packets_dropped": pipeline.packets_dropped if pipeline else 0,
+            "packets_duplicate": pipeline.packets_duplicate if pipeline else 0,
+            "queue_size": pipeline.queue.qsize() if pipeline else 0,
+            "shared_with": [n for n in pipeline.member_names() if n != self.profile_name] if pipeline else [],
             "windows_processed": getattr(self, "windows_analyzed", 0),
-            "window_duration": self.window_duration
+            "window_duration": self.window_duration,
+            "last_checkpoint": self.last_checkpoint,
+            "anomalies_detected": self.anomalies_detected,
+            "windows_degraded": self.windows_degraded,
+            "load": pipeline.load_state() if pipeline else None,
+            "profiler": self.profiler_status(),
+            "feature_export": sink.stats() if sink else None,
+            "latency_us": {
+                **(pipeline.stage_metrics.snapshot_us() if pipeline else {}),
+                **self.stage_metrics.snapshot_us(),
+            },
         }
+        if self.worker is not None:
+            stats.update(self._worker_stats)
+            stats["is_active"] = self.is_active
+            stats["notify_enabled"] = self.notify_enabled
+            stats["worker"] = self.worker.status()
+        return stats
@@ -1,16 +1,24 @@
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable, Literal
 import pickle
-from streamml.back.detector_profile_HST import DetectorProfileHST
+from streamml.back.detector_profile_HST import DetectorProfileHST, RECONFIGURABLE_PARAMS, XDG_DATA_HOME
+from streamml.back.engines import ENGINES
+from streamml.back.profile_store import ProfileStore
+from streamml.back.model_checkpointer import ModelCheckpointer
 
 
 SeverityLevel = Literal["information", "warning", "error"]
 VALID_NAME_REGEX = r"^[a-zA-Z0-9_-]+$"
+MAX_PARALLEL_LIFECYCLE = 16
+PROFILES_DIR = f"{XDG_DATA_HOME}/netmonitor/objects/detector_profiles"
+LEGACY_PROFILES_FILE = f"{XDG_DATA_HOME}/netmonitor/objects/detector_profiles_objects"
 
 class DetectorProfilesManager:
-    def __init__(self, profiles_file: str):
-        self.profiles_file = Path(profiles_file)
+    def __init__(self, profiles_dir: str, legacy_profiles_file: str | None = None):
+        self.store = ProfileStore(profiles_dir)
+        self.legacy_profiles_file = Path(legacy_profiles_file) if legacy_profiles_file else None
         self.profiles: list[DetectorProfileHST] = []
 
         self.on_message: Callable[[str, str, str], None] | None = None
@@ -18,6 +26,9 @@ class DetectorProfilesManager:
 
         self.load_profiles()
 
+        self.checkpointer = ModelCheckpointer(self.store, lambda: self.profiles)
+        self.checkpointer.start()
+
 
     def _notify(self, msg: str, title: str = "Profile Manager", level: SeverityLevel = "information"):
         if self.on_message:
@@ -41,12 +52,31 @@ class DetectorProfilesManager:
         return True
 
 
-    def try_save_profiles(self, notify: bool = True) -> bool:
+    def _save_profile(self, p: DetectorProfileHST, include_model: bool = False):
+        if p.config_dirty:
+            p.config_dirty = False
+            try:
+                self.store.save_config(p.profile_name, p.to_config())
+            except Exception:
+                p.config_dirty = True
+                raise
+
+        if include_model and p.model_dirty:
+            data = p.dump_model()
+            if data is not None:
+                try:
+                    self.store.save_model_bytes(p.profile_name, data)
+                except Exception:
+                    p.model_dirty = True
+                    raise
+
+
+    def try_save_profiles(self, notify: bool = True, include_models: bool = False) -> bool:
         try:
-            self.profiles_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(self.profiles_file, "wb") as f:
-                pickle.dump(self.profiles, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.store.root.mkdir(parents=True, exist_ok=True)
+
+            for p in self.profiles:
+                self._save_profile(p, include_model=include_models)
             
             return self._ok("Profiles saved successfully.", notify=notify)
         except Exception as e:
@@ -55,21 +85,63 @@ class DetectorProfilesManager:
             return self._fail(f"Error saving profiles: {e}", notify=notify)
 
 
-    def load_profiles(self, notify: bool = True) -> bool:
-        if not self.profiles_file.exists():
-            if notify:
-                self._notify("Profiles file not found. Creating a new one.", level="warning")
-            if not self.try_save_profiles(notify=False):
-                return self._fail("Failed to create profiles file!", notify=notify)
-            return self._ok("New profiles file created.", notify=notify)
+    def try_save_profile(self, p: DetectorProfileHST, include_model: bool = False, notify: bool = True) -> bool:
+        try:
+            self._save_profile(p, include_model=include_model)
+            return self._ok(f"Profile {p.profile_name} saved.", notify=notify)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return self._fail(f"Error saving profile {p.profile_name}: {e}", notify=notify)
+
 
+    def _attach_profile(self, p: DetectorProfileHST) -> DetectorProfileHST:
+        p.store = self.store
+        return p
+
+
+    def _migrate_legacy_profiles(self, notify: bool = True) -> bool:
         try:
-            with open(self.profiles_file, "rb") as f:
-                self.profiles = pickle.load(f)
-            self._refresh_front()
-            return self._ok(f"Loaded {len(self.profiles)} profiles.", notify=notify)
+            with open(self.legacy_profiles_file, "rb") as f:
+                self.profiles = [self._attach_profile(p) for p in pickle.load(f)]
         except Exception as e:
-            return self._fail(f"Error loading profiles: {e}", notify=notify)
+            return self._fail(f"Error loading legacy profiles file: {e}", notify=notify)
+
+        if not self.try_save_profiles(notify=False, include_models=True):
+            return self._fail("Failed to migrate legacy profiles file!", notify=notify)
+
+        self._refresh_front()
+        return self._ok(f"Migrated {len(self.profiles)} profiles to per-profile storage.", notify=notify)
+
+
+    def load_profiles(self, notify: bool = True) -> bool:
+        if not self.store.exists():
+            if self.legacy_profiles_file and self.legacy_profiles_file.exists():
+                return self._migrate_legacy_profiles(notify=notify)
+
+            if notify:
+                self._notify("Profiles directory not found. Creating a new one.", level="warning")
+            if not self.try_save_profiles(notify=False):
+                return self._fail("Failed to create profiles directory!", notify=notify)
+            return self._ok("New profiles directory created.", notify=notify)
+
+        profiles = []
+        failed = []
+        for profile_name in self.store.list_profiles():
+            try:
+                config = self.store.load_config(profile_name)
+                p = DetectorProfileHST(profile_name=profile_name, input_data=config)
+                p.config_dirty = False
+                profiles.append(self._attach_profile(p))
+            except Exception as e:
+                print(f"Error loading profile {profile_name}: {e}")
+                failed.append(profile_name)
+
+        self.profiles = profiles
+        self._refresh_front()
+        if failed:
+            return self._fail(f"Loaded {len(profiles)} profiles, failed: {', '.join(failed)}.", "warning", notify)
+        return self._ok(f"Loaded {len(self.profiles)} profiles.", notify=notify)
 
 
     def add_profile(self, profile_name: str, input_data: dict, notify: bool = True) -> bool:
@@ -82,11 +154,16 @@ class DetectorProfilesManager:
         if any(p.profile_name == profile_name for p in self.profiles):
             return self._fail(f"Profile {profile_name} already exists.", "warning", notify)
 
-        new_profile = DetectorProfileHST(profile_name=profile_name, input_data = input_data)
+        engine = input_data.get("params", {}).get("engine", "river")
+        if engine not in ENGINES:
+            return self._fail(f"Unknown engine '{engine}'. Use one of: {', '.join(ENGINES)}.", "error", notify)
+
+        new_profile = self._attach_profile(DetectorProfileHST(profile_name=profile_name, input_data = input_data))
         self.profiles.append(new_profile)
 
-        if not self.try_save_profiles(notify=False):
+        if not self.try_save_profile(new_profile, notify=False):
             self.profiles.remove(new_profile)
+            self.store.delete_profile(profile_name)
             return self._fail(f"Failed to save profile {profile_name}.", notify=notify)
 
         self._refresh_front()
@@ -100,8 +177,11 @@ class DetectorProfilesManager:
         if len(self.profiles) == before:
             return self._fail(f"Profile {profile_name} not found.", "warning", notify)
 
-        if not self.try_save_profiles(notify=False):
-            return self._fail(f"Failed to save changes after deleting {profile_name}.", notify=notify)
+        self.checkpointer.forget(profile_name)
+        try:
+            self.store.delete_profile(profile_name)
+        except Exception as e:
+            return self._fail(f"Failed to delete files of {profile_name}: {e}", notify=notify)
 
         self._refresh_front()
         return self._ok(f"Deleted profile {profile_name}.", notify=notify)
@@ -115,20 +195,82 @@ class DetectorProfilesManager:
         p = self.get_profile(profile_name)
         if not p:
             return self._fail(f"Profile {profile_name} does not exist.", notify=notify)
+        if field == "features" or field in RECONFIGURABLE_PARAMS:
+            return self.reconfigure_profile(profile_name, {field: value}, notify)
 
         setattr(p, field, value)
-        if self.try_save_profiles(notify=False):
+        p.config_dirty = True
+        if p.worker is not None:
+            p.worker.send("update", field=field, value=value)
+        if self.try_save_profile(p, notify=False):
             return self._ok(f"Updated profile {profile_name}.", notify=notify)
         else:
             return self._fail(f"Failed to save updated profile {profile_name}.", notify=notify)
 
 
+    def reconfigure_profile(self, profile_name: str, changes: dict, notify: bool = True) -> bool:
+        p = self.get_profile(profile_name)
+        if not p:
+            return self._fail(f"Profile {profile_name} does not exist.", notify=notify)
+        unknown = [k for k in changes if k != "features" and k not in RECONFIGURABLE_PARAMS]
+        if unknown:
+            return self._fail(f"Unknown parameters: {', '.join(unknown)}.", "warning", notify)
+        if "features" in changes and not changes["features"]:
+            return self._fail("Select at least one feature.", "warning", notify)
+        if "engine" in changes and changes["engine"] not in ENGINES:
+            return self._fail(f"Unknown engine '{changes['engine']}'. Use one of: {', '.join(ENGINES)}.", "warning", notify)
+
+        try:
+            result = p.reconfigure(changes, self._find_shared_pipeline)
+            if p.worker is not None and not p.worker.send("reconfigure", changes=changes):
+                return self._fail(f"Worker of {profile_name} is not reachable, changes apply on next start.", "warning", notify)
+        except Exception as e:
+            return self._fail(f"Error reconfiguring {profile_name}: {e}", notify=notify)
+
+        if not self.try_save_profile(p, notify=False):
+            return self._fail(f"Profile {profile_name} reconfigured, but not saved.", notify=notify)
+
+        msg = f"Reconfigured profile {profile_name}"
+        if result["capture"] == "in_place":
+            msg += ", capture retuned in place"
+        elif result["capture"] == "moved":
+            others = [n for n in p.pipeline.member_names() if n != profile_name] if p.pipeline else []
+            msg += f", capture now shared with {', '.join(others)}" if others else ", capture restarted"
+        if result["added_features"]:
+            msg += f". Added {', '.join(result['added_features'])}, the model only splits on features it was trained with"
+        if p.is_active and result["deferred"]:
+            msg += f". Applies on next start: {', '.join(result['deferred'])}"
+        return self._ok(msg + ".", notify=notify)
+
+
+    def _find_shared_pipeline(self, p: DetectorProfileHST):
+        if not p.share_capture:
+            return None
+        for other in self.profiles:
+            if other is p or not other.is_active or not other.share_capture:
+                continue
+            pipeline = other.pipeline
+            if pipeline and pipeline.is_active and pipeline.key == p.capture_key:
+                return pipeline
+        return None
+
+
     def turn_on_profile(self, profile_name: str, app=None, notify: bool = True) -> bool:
         p = self.get_profile(profile_name)
         if not p:
             return self._fail(f"Profile {profile_name} not found.", notify=notify)
         try:
-            p.turn_on()
+            if p.runs_in_process:
+                # The worker loads config and model from disk, so make sure both are current.
+                self._save_profile(p, include_model=True)
+                p.turn_on()
+                return self._ok(f"Profile {profile_name} activated in worker process {p.worker.process.pid}.", notify=notify)
+
+            pipeline = self._find_shared_pipeline(p)
+            p.turn_on(pipeline=pipeline)
+            if pipeline:
+                others = ", ".join(n for n in pipeline.member_names() if n != profile_name)
+                return self._ok(f"Profile {profile_name} activated (sharing capture with {others}).", notify=notify)
             return self._ok(f"Profile {profile_name} activated.", notify=notify)
         except Exception as e:
             return self._fail(f"Error activating profile: {e}", notify=notify)
@@ -140,10 +282,154 @@ class DetectorProfilesManager:
             return self._fail(f"Profile {profile_name} not found.", notify=notify)
         try:
             p.turn_off()
-            return self._ok(f"Profile {profile_name} deactivated.", notify=notify)
         except Exception as e:
             return self._fail(f"Error deactivating profile: {e}", notify=notify)
 
+        if not self.try_save_profile(p, include_model=True, notify=False):
+            return self._fail(f"Profile {profile_name} deactivated, but its model was not saved.", "warning", notify)
+        return self._ok(f"Profile {profile_name} deactivated.", notify=notify)
+
+
+    def turn_on_profiles(self, profile_names: list[str] | None = None, notify: bool = True) -> bool:
+        """Start several profiles (default: all inactive ones) in parallel."""
+        if profile_names is None:
+            profile_names = [p.profile_name for p in self.profiles if not p.is_active]
+
+        # Profiles that can share a capture start one after another, so the later ones join the first pipeline.
+        groups = {}
+        for name in profile_names:
+            p = self.get_profile(name)
+            shared = p is not None and p.share_capture and not p.runs_in_process
+            groups.setdefault(p.capture_key if shared else name, []).append(name)
+
+        failed = self._run_parallel(lambda names: [n for n in names if not self.turn_on_profile(n, notify=False)], groups.values())
+        if failed:
+            return self._fail(f"Started {len(profile_names) - len(failed)} profiles, failed: {', '.join(failed)}.", "warning", notify)
+        return self._ok(f"Started {len(profile_names)} profiles.", notify=notify)
+
+
+    def turn_off_profiles(self, profile_names: list[str] | None = None, notify: bool = True) -> bool:
+        """Stop several profiles (default: all active ones) in parallel."""
+        if profile_names is None:
+            profile_names = [p.profile_name for p in self.profiles if p.is_active]
+
+        groups = {}
+        for name in profile_names:
+            p = self.get_profile(name)
+            pipeline = p.pipeline if p is not None else None
+            groups.setdefault(id(pipeline) if pipeline else name, []).append(name)
+
+        def turn_off_group(names: list[str]) -> list[str]:
+            pipeline = self.get_profile(names[0]).pipeline if self.get_profile(names[0]) else None
+            if pipeline is not None and set(pipeline.member_names()) <= set(names):
+                # The whole pipeline goes; stopping it first gives every member the final window.
+                pipeline.stop()
+            return [n for n in names if not self.turn_off_profile(n, notify=False)]
+
+        failed = self._run_parallel(turn_off_group, groups.values())
+        if failed:
+            return self._fail(f"Stopped {len(profile_names) - len(failed)} profiles, failed: {', '.join(failed)}.", "warning", notify)
+        return self._ok(f"Stopped {len(profile_names)} profiles.", notify=notify)
+
+
+    def _run_parallel(self, fn, items) -> list:
+        # fn returns a list per item; capture startup and shutdown mostly wait on the OS, so threads are enough.
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_LIFECYCLE, len(items))) as pool:
+            return [x for result in pool.map(fn, items) for x in result]
+
+
+    def bootstrap_profile(
+        self,
+        profile_name: str,
+        pcap_paths: list[str],
+        workers: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+        notify: bool = True
+    ) -> bool:
+        p = self.get_profile(profile_name)
+        if not p:
+            return self._fail(f"Profile {profile_name} not found.", notify=notify)
+
+        if p.worker is not None:
+            return self._fail(f"Stop {profile_name} before training it, its model lives in a worker process.", "warning", notify)
+
+        if not pcap_paths:
+            return self._fail("Provide at least one capture file.", "warning", notify)
+
+        missing = [path for path in pcap_paths if not Path(path).is_file()]
+        if missing:
+            return self._fail(f"Capture file not found: {', '.join(missing)}", notify=notify)
+
+        try:
+            from streamml.back.bootstrap import extract_windows
+            windows = extract_windows(pcap_paths, p.window_duration, p.features, workers=workers, progress=progress)
+            # A local carry-forward, so a running capture's last sample is not overwritten.
+            samples, last = [], {}
+            for _, features in windows:
+                last = p.make_sample(features, last)
+                samples.append(last)
+            learned = p.learn_samples(samples)
+        except Exception as e:
+            return self._fail(f"Error bootstrapping profile: {e}", notify=notify)
+
+        if not self.try_save_profile(p, include_model=True, notify=False):
+            return self._fail(f"Profile {profile_name} trained, but its model was not saved.", notify=notify)
+        return self._ok(f"Profile {profile_name} trained on {learned} windows.", notify=notify)
+
+
+    def checkpoint_profile(self, profile_name: str, notify: bool = True) -> bool:
+        p = self.get_profile(profile_name)
+        if not p:
+            return self._fail(f"Profile {profile_name} not found.", notify=notify)
+        if p.worker is not None:
+            if not p.worker.send("checkpoint"):
+                return self._fail(f"Worker of {profile_name} is not reachable.", notify=notify)
+            return self._ok(f"Checkpoint of {profile_name} requested.", notify=notify)
+        try:
+            if not self.checkpointer.checkpoint(p, force=True):
+                return self._fail(f"Profile {profile_name} has no model to checkpoint.", "warning", notify)
+            return self._ok(f"Checkpoint of {profile_name} saved.", notify=notify)
+        except Exception as e:
+            return self._fail(f"Error saving checkpoint: {e}", notify=notify)
+
+
+    def start_profiler(self, profile_name: str, mode: str = "sampling", duration: float = 10.0, notify: bool = True) -> bool:
+        p = self.get_profile(profile_name)
+        if not p:
+            return self._fail(f"Profile {profile_name} not found.", notify=notify)
+        try:
+            session = p.start_profiler(mode, duration)
+        except (RuntimeError, ValueError) as e:
+            return self._fail(f"Cannot profile {profile_name}: {e}.", "warning", notify)
+        if session.error:
+            return self._fail(f"Cannot profile {profile_name}: {session.error}.", "warning", notify)
+        return self._ok(f"Profiling {profile_name} for {duration:g}s, saving to {session.output_path}", notify=notify)
+
+    def stop_profiler(self, profile_name: str, notify: bool = True) -> bool:
+        p = self.get_profile(profile_name)
+        if not p:
+            return self._fail(f"Profile {profile_name} not found.", notify=notify)
+        if not p.stop_profiler():
+            return self._fail(f"Profiler of {profile_name} is not running.", "warning", notify)
+        return self._ok(f"Profiler of {profile_name} stopped.", notify=notify)
+
+
+    def shutdown(self):
+        self.checkpointer.stop()
+
+        def turn_off(p):
+            try:
+                p.turn_off()
+            except Exception as e:
+                print(f"Error deactivating profile {p.profile_name}: {e}")
+            return []
+
+        self._run_parallel(turn_off, [p for p in self.profiles if p.is_active])
+        self.try_save_profiles(notify=False, include_models=True)
+
 
     def get_profile_logs(self, profile_name: str, notify: bool = True):
         p = self.get_profile(profile_name)
@@ -0,0 +1,38 @@
+# An engine is any online model with learn_one(x) and score_one(x) -> float in [0, 1],
+# compared with the profile threshold; learn_many/score_many are used when present.
+# Each engine reads the profile params it needs.
+ENGINES = {
+    "river": "Half-Space Trees (river)",
+    "numpy": "Half-Space Trees (NumPy)",
+    "zscore": "EWMA z-score",
+    "loda": "LODA random projections",
+}
+
+
+def make_engine(name: str, params: dict):
+    window_size = int(params.get("window", 250))
+    seed = int(params.get("seed", 42))
+
+    if name in ("river", "numpy"):
+        if name == "numpy":
+            from .hst_numpy import NumpyHalfSpaceTrees as model_cls
+        else:
+            from river.anomaly import HalfSpaceTrees as model_cls
+        return model_cls(
+            n_trees=int(params.get("trees", 10)),
+            height=int(params.get("height", 8)),
+            window_size=window_size,
+            seed=seed
+        )
+    if name == "zscore":
+        from .ewma_zscore import EwmaZScore
+        return EwmaZScore(window_size=window_size, z_scale=float(params.get("z_scale", 3.0)))
+    if name == "loda":
+        from .loda import Loda
+        return Loda(
+            n_projections=int(params.get("projections", 50)),
+            n_bins=int(params.get("bins", 20)),
+            window_size=window_size,
+            seed=seed
+        )
+    raise ValueError(f"Unknown engine {name!r}, use one of: {', '.join(ENGINES)}")
@@ -0,0 +1,52 @@
+import math
+
+
+class EwmaZScore:
+    """Running baseline per feature: exponentially weighted mean and variance.
+
+    The score of a sample is its largest absolute z-score against the
+    baseline, mapped to [0, 1) as z / (z + z_scale), so z_scale standard
+    deviations score 0.5. Costs O(features) per sample. `window_size` is the
+    EWMA span; nothing is scored before `warmup` samples.
+    """
+
+    def __init__(self, window_size: int = 250, z_scale: float = 3.0, warmup: int = 10):
+        self.window_size = int(window_size)
+        self.alpha = 2.0 / (self.window_size + 1)
+        self.z_scale = float(z_scale)
+        self.warmup = int(warmup)
+
+        self.mean: dict[str, float] = {}
+        self.var: dict[str, float] = {}
+        self.counter = 0
+
+    def learn_one(self, x: dict):
+        alpha = self.alpha
+        mean, var = self.mean, self.var
+        for name, value in x.items():
+            if name not in mean:
+                mean[name] = float(value)
+                var[name] = 0.0
+                continue
+            diff = value - mean[name]
+            incr = alpha * diff
+            mean[name] += incr
+            var[name] = (1 - alpha) * (var[name] + diff * incr)
+        self.counter += 1
+
+    def score_one(self, x: dict) -> float:
+        if self.counter < self.warmup:
+            return 0.0
+
+        z_max = 0.0
+        mean, var = self.mean, self.var
+        for name, value in x.items():
+            m = mean.get(name)
+            if m is None:
+                continue
+            # Floor for features that have been constant so far, so float noise is not an anomaly.
+            std = max(math.sqrt(var[name]), 1e-3 * abs(m), 1e-9)
+            z = abs(value - m) / std
+            if z > z_max:
+                z_max = z
+        return z_max / (z_max + self.z_scale)
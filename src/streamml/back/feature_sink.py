@@ -0,0 +1,218 @@
+import csv
+import os
+import threading
+import time
+
+EXPORT_FORMATS = ("parquet", "arrow", "csv")
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows", "csv": "csv"}
+
+BATCH_ROWS = 1024
+# Windows are seconds long, so a short interval would write row groups of a row or two.
+FLUSH_INTERVAL = 300.0
+MAX_PENDING_ROWS = 100_000
+
+# Columns written before the features of each window.
+META_COLUMNS = ("ts", "score", "anomaly", "load_level")
+
+
+def resolve_format(export_format: str) -> str:
+    """Format that can actually be written here: Arrow and Parquet need pyarrow, CSV always works."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {export_format!r}, use one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == "csv":
+        return export_format
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print(f"pyarrow is not installed, exporting features as CSV instead of {export_format}")
+        return "csv"
+    return export_format
+
+
+class _CsvFile:
+    def __init__(self, path: str, columns: list[str]):
+        self.f = open(path, "w", newline="")
+        self.writer = csv.writer(self.f)
+        self.writer.writerow(columns)
+
+    def write(self, rows: list[list]):
+        self.writer.writerows(rows)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class _ArrowFile:
+    # Arrow is written as a record batch stream: every batch is complete on disk, so a crash loses nothing written.
+    def __init__(self, path: str, columns: list[str], parquet: bool = False):
+        import pyarrow as pa
+
+        fields = [pa.field(name, pa.float64()) for name in columns]
+        fields[META_COLUMNS.index("anomaly")] = pa.field("anomaly", pa.bool_())
+        fields[META_COLUMNS.index("load_level")] = pa.field("load_level", pa.int8())
+        self.schema = pa.schema(fields)
+
+        if parquet:
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.writer = pa.ipc.new_stream(path, self.schema)
+
+    def write(self, rows: list[list]):
+        import pyarrow as pa
+
+        arrays = [list(col) for col in zip(*rows)]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class FeatureSink:
+    """Writes the sample and score of every window to columnar files for offline analysis.
+
+    append() only adds a row to the in-memory batch; a background thread
+    writes batches of batch_rows (one Parquet row group each). What is
+    left over is written every flush_interval and on stop(). A new file is
+    started when the current one passes rotate_bytes or rotate_seconds, or
+    when the feature set changes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        profile_name: str,
+        export_format: str = "parquet",
+        rotate_bytes: int = 64 * 1024 * 1024,
+        rotate_seconds: float = 3600.0,
+        batch_rows: int = BATCH_ROWS,
+        flush_interval: float = FLUSH_INTERVAL
+    ):
+        self.directory = directory
+        self.profile_name = profile_name
+        self.format = resolve_format(export_format)
+        self.rotate_bytes = int(rotate_bytes)
+        self.rotate_seconds = float(rotate_seconds)
+        self.batch_rows = int(batch_rows)
+        self.flush_interval = float(flush_interval)
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.files_written = 0
+        self.path = None
+
+        self._segments = []
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._file = None
+        self._file_columns = None
+        self._file_opened = 0.0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name=f"feature-sink-{self.profile_name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        # Writes what is still buffered, then closes the file so Parquet gets its footer.
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def append(self, score: float, sample: dict, anomaly: bool = False, load_level: int = 0, ts: float | None = None):
+        row = [time.time() if ts is None else ts, float(score), bool(anomaly), int(load_level)]
+        row.extend(float(v) for v in sample.values())
+        columns = tuple(sample)
+        with self._lock:
+            if self._pending >= MAX_PENDING_ROWS:
+                self.rows_dropped += 1
+                return
+            # One segment per run of windows with the same feature set, so each batch has one schema.
+            if not self._segments or self._segments[-1][0] != columns:
+                self._segments.append((columns, []))
+            self._segments[-1][1].append(row)
+            self._pending += 1
+            full = self._pending >= self.batch_rows
+        if full:
+            self._wake.set()
+
+    def stats(self) -> dict:
+        return {
+            "format": self.format,
+            "path": self.path,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "files_written": self.files_written,
+        }
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                timed_out = not self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._write_pending(partial=timed_out)
+            self._write_pending(partial=True)
+        finally:
+            self._close_file()
+
+    def _write_pending(self, partial: bool):
+        # Without partial, the rows short of a full batch in the last segment stay for the next round.
+        with self._lock:
+            segments, self._segments = self._segments, []
+            if not partial and segments:
+                feature_columns, rows = segments[-1]
+                keep = len(rows) % self.batch_rows
+                if keep:
+                    segments[-1] = (feature_columns, rows[:-keep])
+                    self._segments.append((feature_columns, rows[-keep:]))
+            self._pending = sum(len(rows) for _, rows in self._segments)
+        for feature_columns, rows in segments:
+            for i in range(0, len(rows), self.batch_rows):
+                self._write_batch(feature_columns, rows[i:i + self.batch_rows])
+
+    def _write_batch(self, feature_columns: tuple, rows: list):
+        columns = list(META_COLUMNS) + list(feature_columns)
+        try:
+            self._ensure_file(columns)
+            self._file.write(rows)
+            self.rows_written += len(rows)
+        except Exception as e:
+            self.rows_dropped += len(rows)
+            print(f"Error writing features of {self.profile_name}: {e}")
+            self._close_file()
+
+    def _ensure_file(self, columns: list[str]):
+        if self._file is not None:
+            too_big = self.rotate_bytes > 0 and os.path.getsize(self.path) >= self.rotate_bytes
+            too_old = self.rotate_seconds > 0 and time.monotonic() - self._file_opened >= self.rotate_seconds
+            if too_big or too_old or columns != self._file_columns:
+                self._close_file()
+        if self._file is not None:
+            return
+
+        stamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+        self.path = os.path.join(self.directory, f"{self.profile_name}_{stamp}_{self.files_written}.{EXTENSIONS[self.format]}")
+        if self.format == "csv":
+            self._file = _CsvFile(self.path, columns)
+        else:
+            self._file = _ArrowFile(self.path, columns, parquet=self.format == "parquet")
+        self._file_columns = columns
+        self._file_opened = time.monotonic()
+        self.files_written += 1
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except Exception as e:
+            print(f"Error closing feature file {self.path}: {e}")
+        self._file = None
@@ -0,0 +1,187 @@
+import random
+
+import numpy as np
+
+
+class NumpyHalfSpaceTrees:
+    """Half-Space Trees with tree splits and masses stored in NumPy arrays.
+
+    Drop-in replacement for `river.anomaly.HalfSpaceTrees` (same parameters,
+    `learn_one`/`score_one`, same scores for the same `seed`), plus
+    `learn_many`/`score_many` that walk all trees for a whole batch at once.
+    Trees use heap layout: children of node `i` are `2i + 1` and `2i + 2`.
+    """
+
+    def __init__(
+        self,
+        n_trees: int = 10,
+        height: int = 8,
+        window_size: int = 250,
+        limits: dict[str, tuple[float, float]] | None = None,
+        seed: int | None = None,
+    ):
+        self.n_trees = n_trees
+        self.height = height
+        self.window_size = window_size
+        self.limits = dict(limits or {})
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.feature_names: list[str] = []
+        self.split_feature = None
+        self.split_threshold = None
+        self.l_mass = None
+        self.r_mass = None
+
+        self.counter = 0
+        self._first_window = True
+
+    @property
+    def n_nodes(self) -> int:
+        return 2 ** (self.height + 1) - 1
+
+    @property
+    def n_branches(self) -> int:
+        return 2 ** self.height - 1
+
+    @property
+    def size_limit(self) -> float:
+        return 0.1 * self.window_size
+
+    @property
+    def _max_score(self) -> int:
+        return self.n_trees * self.window_size * self.n_nodes
+
+    def _limits_for(self, name: str) -> tuple[float, float]:
+        return self.limits.get(name, (0.0, 1.0))
+
+    def _build_trees(self, feature_names: list[str]):
+        self.feature_names = sorted(feature_names)
+        self.split_feature = np.zeros((self.n_trees, self.n_branches), dtype=np.intp)
+        self.split_threshold = np.zeros((self.n_trees, self.n_branches), dtype=np.float64)
+        self.l_mass = np.zeros((self.n_trees, self.n_nodes), dtype=np.int64)
+        self.r_mass = np.zeros((self.n_trees, self.n_nodes), dtype=np.int64)
+
+        index = {name: i for i, name in enumerate(self.feature_names)}
+        for t in range(self.n_trees):
+            limits = {name: self._limits_for(name) for name in self.feature_names}
+            self._build_node(t, 0, self.height, limits, index, padding=0.15)
+
+    def _build_node(self, t: int, node: int, height: int, limits: dict, index: dict, padding: float):
+        # Same recursion order and RNG calls as river's make_padded_tree, so a
+        # given seed produces identical splits.
+        if height == 0:
+            return
+
+        on = self.rng.choices(
+            population=list(limits.keys()),
+            weights=[limits[i][1] - limits[i][0] for i in limits],
+        )[0]
+
+        a, b = limits[on]
+        at = self.rng.uniform(a + padding * (b - a), b - padding * (b - a))
+
+        self.split_feature[t, node] = index[on]
+        self.split_threshold[t, node] = at
+
+        tmp = limits[on]
+        limits[on] = (tmp[0], at)
+        self._build_node(t, 2 * node + 1, height - 1, limits, index, padding)
+        limits[on] = tmp
+
+        limits[on] = (at, tmp[1])
+        self._build_node(t, 2 * node + 2, height - 1, limits, index, padding)
+        limits[on] = tmp
+
+    def _to_matrix(self, X) -> tuple[np.ndarray, np.ndarray | None]:
+        if isinstance(X, np.ndarray):
+            return np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names)), None
+
+        M = np.zeros((len(X), len(self.feature_names)), dtype=np.float64)
+        missing = None
+        for row, x in enumerate(X):
+            for col, name in enumerate(self.feature_names):
+                if name in x:
+                    M[row, col] = x[name]
+                else:
+                    if missing is None:
+                        missing = np.zeros(M.shape, dtype=bool)
+                    missing[row, col] = True
+        return M, missing
+
+    def _paths(self, M: np.ndarray, missing: np.ndarray | None = None) -> np.ndarray:
+        # Node index per (level, tree, sample); level 0 is the root.
+        n_samples = M.shape[0]
+        trees = np.arange(self.n_trees)[:, None]
+        paths = np.zeros((self.height + 1, self.n_trees, n_samples), dtype=np.intp)
+
+        node = np.zeros((self.n_trees, n_samples), dtype=np.intp)
+        for depth in range(self.height):
+            feature = self.split_feature[trees, node]
+            threshold = self.split_threshold[trees, node]
+            samples = np.arange(n_samples)[None, :]
+            value = M[samples, feature]
+
+            # river compares with `value < threshold`, so NaN goes right there too.
+            go_right = ~(value < threshold)
+            if missing is not None:
+                # Missing split feature: follow the child with more mass, as river does.
+                is_missing = missing[samples, feature]
+                left_mass = self.l_mass[trees, 2 * node + 1]
+                right_mass = self.l_mass[trees, 2 * node + 2]
+                go_right = np.where(is_missing, left_mass < right_mass, go_right)
+
+            node = 2 * node + 1 + go_right
+            paths[depth + 1] = node
+        return paths
+
+    def _learn_matrix(self, M: np.ndarray, missing: np.ndarray | None = None):
+        trees = np.arange(self.n_trees)[:, None]
+        start = 0
+        while start < M.shape[0]:
+            # Split the batch at window pivots so masses match one-by-one learning.
+            stop = min(M.shape[0], start + self.window_size - self.counter)
+            chunk_missing = missing[start:stop] if missing is not None else None
+            paths = self._paths(M[start:stop], chunk_missing)
+            for depth in range(self.height + 1):
+                np.add.at(self.l_mass, (np.broadcast_to(trees, paths[depth].shape), paths[depth]), 1)
+
+            self.counter += stop - start
+            if self.counter == self.window_size:
+                self.r_mass = self.l_mass
+                self.l_mass = np.zeros_like(self.r_mass)
+                self._first_window = False
+                self.counter = 0
+            start = stop
+
+    def learn_many(self, X):
+        if self.split_feature is None:
+            first = X[0] if not isinstance(X, np.ndarray) else None
+            if first is None:
+                raise ValueError("learn_many needs dict samples before the trees are built")
+            self._build_trees(list(first.keys()))
+        self._learn_matrix(*self._to_matrix(X))
+
+    def learn_one(self, x: dict):
+        self.learn_many([x])
+
+    def score_many(self, X) -> np.ndarray:
+        n_samples = len(X)
+        if self._first_window or self.split_feature is None:
+            return np.zeros(n_samples, dtype=np.float64)
+
+        M, missing = self._to_matrix(X)
+        trees = np.arange(self.n_trees)[:, None]
+        paths = self._paths(M, missing)
+
+        score = np.zeros(n_samples, dtype=np.int64)
+        active = np.ones((self.n_trees, n_samples), dtype=bool)
+        for depth in range(self.height + 1):
+            mass = self.r_mass[trees, paths[depth]]
+            score += np.where(active, mass * 2 ** depth, 0).sum(axis=0)
+            active &= mass >= self.size_limit
+
+        return 1 - score / self._max_score
+
+    def score_one(self, x: dict) -> float:
+        return float(self.score_many([x])[0])
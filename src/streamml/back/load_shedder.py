@@ -0,0 +1,103 @@
+import zlib
+
+from .dedup import ETHERTYPE_IPV4, ETHERTYPE_IPV6, VLAN_ETHERTYPES
+
+# Degradation levels, mildest first. Each level keeps the effects of the previous one.
+LOAD_LEVELS = [
+    {"name": "normal", "sample_rate": 1, "cheap_features": False, "evidence": True},
+    {"name": "flow_sampling", "sample_rate": 2, "cheap_features": False, "evidence": True},
+    {"name": "cheap_features", "sample_rate": 4, "cheap_features": True, "evidence": True},
+    {"name": "no_evidence", "sample_rate": 8, "cheap_features": True, "evidence": False},
+]
+
+# Per-packet port maps and the finish-time statistics built on them.
+EXPENSIVE_FEATURES = {
+    "unique_dst_ports",
+    "unique_src_ports",
+    "port_entropy_dst",
+    "port_entropy_src",
+    "std_pkt_size",
+}
+
+
+def flow_hash(pkt) -> int | None:
+    # Hash of the raw source/destination addresses, so every packet of a host pair gets the same decision.
+    raw = getattr(pkt, "original", None)
+    if not raw or len(raw) < 14:
+        return None
+    offset = 12
+    ethertype = raw[12:14]
+    # 802.1Q/802.1ad tags sit between the MACs and the real ethertype.
+    while ethertype in VLAN_ETHERTYPES:
+        offset += 4
+        ethertype = raw[offset:offset + 2]
+    ip = offset + 2
+    if ethertype == ETHERTYPE_IPV4 and len(raw) >= ip + 20:
+        return zlib.crc32(raw[ip + 12:ip + 20])
+    if ethertype == ETHERTYPE_IPV6 and len(raw) >= ip + 40:
+        return zlib.crc32(raw[ip + 8:ip + 40])
+    return None
+
+
+class LoadShedder:
+    def __init__(
+        self,
+        enabled: bool = True,
+        high_occupancy: float = 0.5,
+        low_occupancy: float = 0.1,
+        max_lag: float = 1.0,
+        step_up_after: float = 1.0,
+        recover_after: float = 5.0
+    ):
+        self.enabled = enabled
+        self.high_occupancy = high_occupancy
+        self.low_occupancy = low_occupancy
+        self.max_lag = max_lag
+        self.step_up_after = step_up_after
+        self.recover_after = recover_after
+
+        self.level = 0
+        self.window_level = 0
+        self.level_changes = 0
+        self.last_change = None
+        self._calm_since = None
+
+    @property
+    def state(self) -> dict:
+        return LOAD_LEVELS[self.level]
+
+    def update(self, occupancy: float, lag: float, now: float) -> bool:
+        """Feed one observation; returns True when the level changed."""
+        if not self.enabled:
+            return False
+
+        overloaded = occupancy >= self.high_occupancy or lag >= self.max_lag
+        calm = occupancy <= self.low_occupancy and lag < self.max_lag / 4
+        since_change = now - self.last_change if self.last_change is not None else float("inf")
+
+        if overloaded:
+            self._calm_since = None
+            if self.level < len(LOAD_LEVELS) - 1 and since_change >= self.step_up_after:
+                return self._set_level(self.level + 1, now)
+            return False
+
+        if not calm or self.level == 0:
+            self._calm_since = None
+            return False
+
+        if self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= self.recover_after and since_change >= self.recover_after:
+            self._calm_since = now
+            return self._set_level(self.level - 1, now)
+        return False
+
+    def start_window(self):
+        self.window_level = self.level
+
+    def _set_level(self, level: int, now: float) -> bool:
+        self.level = level
+        self.window_level = max(self.window_level, level)
+        self.level_changes += 1
+        self.last_change = now
+        return True
@@ -0,0 +1,102 @@
+import math
+
+import numpy as np
+
+
+class Loda:
+    """LODA: an ensemble of one-dimensional histograms on sparse random projections.
+
+    Features are log-scaled (sign(x) * log1p(|x|)) so bytes and ratios can
+    share a projection. Like Half-Space Trees, histograms are trained on one
+    window of `window_size` samples and used as the reference while the next
+    window is counted; the first window only sets the bin ranges. The score is
+    the mean negative log-likelihood over projections, divided by its maximum
+    so it lies in [0, 1]. Projections that touch a missing feature are skipped.
+    """
+
+    def __init__(self, n_projections: int = 50, n_bins: int = 20, window_size: int = 250, seed: int | None = None):
+        self.n_projections = int(n_projections)
+        self.n_bins = int(n_bins)
+        self.window_size = int(window_size)
+        self.seed = seed
+
+        self.feature_names: list[str] = []
+        self.weights = None
+        self.uses = None
+        self.low = None
+        self.width = None
+        self.ref_counts = None
+        self.cur_counts = None
+        self.counter = 0
+        self._first_window = []
+
+    def _build(self, feature_names: list[str]):
+        self.feature_names = sorted(feature_names)
+        n_features = len(self.feature_names)
+        rng = np.random.default_rng(self.seed)
+
+        # sqrt(d) non-zero Gaussian weights per projection, as in the paper.
+        nonzero = max(1, int(round(math.sqrt(n_features))))
+        self.weights = np.zeros((self.n_projections, n_features))
+        for k in range(self.n_projections):
+            cols = rng.choice(n_features, size=nonzero, replace=False)
+            self.weights[k, cols] = rng.standard_normal(nonzero)
+        self.uses = self.weights != 0
+
+    def _project(self, x: dict) -> tuple[np.ndarray, np.ndarray]:
+        v = np.array([x.get(name, np.nan) for name in self.feature_names], dtype=np.float64)
+        missing = np.isnan(v)
+        v = np.sign(v) * np.log1p(np.abs(v))
+        if missing.any():
+            v[missing] = 0.0
+            valid = ~self.uses[:, missing].any(axis=1)
+        else:
+            valid = np.ones(self.n_projections, dtype=bool)
+        return self.weights @ v, valid
+
+    def _bins(self, projected: np.ndarray) -> np.ndarray:
+        return np.clip(((projected - self.low) / self.width).astype(np.intp), 0, self.n_bins - 1)
+
+    def learn_one(self, x: dict):
+        if self.weights is None:
+            self._build(list(x.keys()))
+        projected, _ = self._project(x)
+
+        if self.ref_counts is None:
+            self._first_window.append(projected)
+            if len(self._first_window) == self.window_size:
+                self._fix_bins(np.array(self._first_window))
+                self._first_window = []
+            return
+
+        self.cur_counts[np.arange(self.n_projections), self._bins(projected)] += 1
+        self.counter += 1
+        if self.counter == self.window_size:
+            self.ref_counts = self.cur_counts
+            self.cur_counts = np.zeros_like(self.ref_counts)
+            self.counter = 0
+
+    def _fix_bins(self, window: np.ndarray):
+        low, high = window.min(axis=0), window.max(axis=0)
+        margin = np.maximum(0.1 * (high - low), 1e-6)
+        self.low = low - margin
+        self.width = (high + margin - self.low) / self.n_bins
+
+        self.ref_counts = np.zeros((self.n_projections, self.n_bins), dtype=np.int64)
+        rows = np.arange(self.n_projections)
+        for projected in window:
+            self.ref_counts[rows, self._bins(projected)] += 1
+        self.cur_counts = np.zeros_like(self.ref_counts)
+
+    def score_one(self, x: dict) -> float:
+        if self.ref_counts is None:
+            return 0.0
+
+        projected, valid = self._project(x)
+        if not valid.any():
+            return 0.0
+        counts = self.ref_counts[np.arange(self.n_projections), self._bins(projected)][valid]
+        # Laplace smoothing keeps empty bins finite; an empty bin in every projection scores 1.
+        total = self.window_size + self.n_bins
+        nll = -np.log((counts + 1) / total)
+        return float(nll.mean() / math.log(total))
@@ -0,0 +1,195 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUB_BUCKET_BITS = 3  # record_ns() hard-codes 3 / 8 / 7 for speed
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+MAX_VALUE_NS = 60 * 10**9
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    """Log-linear (HDR-style) histogram of nanosecond values.
+
+    Each power of two is split into SUB_BUCKET_COUNT linear sub-buckets, so
+    `record_ns` is O(1) with a relative error under 1 / SUB_BUCKET_COUNT.
+    """
+
+    __slots__ = ("counts", "total_ns")
+
+    def __init__(self):
+        n_buckets = (MAX_VALUE_NS.bit_length() + 1) * SUB_BUCKET_COUNT
+        self.counts = [0] * n_buckets
+        self.total_ns = 0
+
+    @staticmethod
+    def _index(value_ns: int) -> int:
+        if value_ns < SUB_BUCKET_COUNT:
+            return max(value_ns, 0)
+        exponent = value_ns.bit_length() - SUB_BUCKET_BITS
+        return (exponent << SUB_BUCKET_BITS) + ((value_ns >> (exponent - 1)) & (SUB_BUCKET_COUNT - 1))
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        if index < SUB_BUCKET_COUNT:
+            return index
+        exponent = index >> SUB_BUCKET_BITS
+        sub_bucket = index & (SUB_BUCKET_COUNT - 1)
+        return ((SUB_BUCKET_COUNT + sub_bucket + 1) << (exponent - 1)) - 1
+
+    def record_ns(self, value_ns: int):
+        # Hot path: _index() inlined, count and max are derived from the buckets on read.
+        if value_ns >= 8:
+            if value_ns > MAX_VALUE_NS:
+                value_ns = MAX_VALUE_NS
+            exponent = value_ns.bit_length() - 3
+            self.counts[(exponent << 3) + ((value_ns >> (exponent - 1)) & 7)] += 1
+        else:
+            self.counts[value_ns if value_ns > 0 else 0] += 1
+        self.total_ns += value_ns
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def max_ns(self) -> int:
+        for index in range(len(self.counts) - 1, -1, -1):
+            if self.counts[index]:
+                return self._upper_bound(index)
+        return 0
+
+    def quantile_ns(self, q: float) -> int:
+        count = self.count
+        if not count:
+            return 0
+        rank = max(1, int(q * count + 0.5))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self._upper_bound(index)
+        return self.max_ns
+
+    def snapshot_us(self) -> dict:
+        count = self.count
+        snapshot = {"count": count}
+        if count:
+            snapshot["mean"] = round(self.total_ns / count / 1000, 1)
+            for q in QUANTILES:
+                snapshot[f"p{q * 100:g}"] = round(self.quantile_ns(q) / 1000, 1)
+            snapshot["max"] = round(self.max_ns / 1000, 1)
+        return snapshot
+
+
+class StageMetrics:
+    def __init__(self, stages: tuple[str, ...]):
+        self.stages = {stage: LatencyHistogram() for stage in stages}
+
+    def record_ns(self, stage: str, value_ns: int):
+        self.stages[stage].record_ns(value_ns)
+
+    def snapshot_us(self) -> dict:
+        return {stage: hist.snapshot_us() for stage, hist in self.stages.items() if hist.count}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = True
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, name: str, source):
+        with self._lock:
+            self._sources[(kind, name)] = source
+
+    def unregister(self, kind: str, name: str, source=None):
+        with self._lock:
+            if source is None or self._sources.get((kind, name)) is source:
+                self._sources.pop((kind, name), None)
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            sources = list(self._sources.items())
+
+        stage_lines = {}
+        sample_lines = {}
+        for (kind, name), source in sources:
+            base = {kind: name}
+            for stage, hist in source.stage_metrics.stages.items():
+                family = f"streamml_{kind}_stage_seconds"
+                lines = stage_lines.setdefault(family, [])
+                labels = {**base, "stage": stage}
+                for q in QUANTILES:
+                    lines.append(f"{family}{_labels({**labels, 'quantile': q})} {hist.quantile_ns(q) / 1e9:.9f}")
+                lines.append(f"{family}_sum{_labels(labels)} {hist.total_ns / 1e9:.9f}")
+                lines.append(f"{family}_count{_labels(labels)} {hist.count}")
+
+            for metric, (metric_type, value) in source.metric_samples().items():
+                family = f"streamml_{kind}_{metric}"
+                sample_lines.setdefault((family, metric_type), []).append(f"{family}{_labels(base)} {value}")
+
+        out = []
+        for family, lines in stage_lines.items():
+            out.append(f"# TYPE {family} summary")
+            out.extend(lines)
+        for (family, metric_type), lines in sample_lines.items():
+            out.append(f"# TYPE {family} {metric_type}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics_registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    def __init__(self):
+        self._server = None
+        self._thread = None
+        self.port = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._server is not None
+
+    def start(self, port: int, host: str = "127.0.0.1"):
+        self.stop()
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self.port = None
+
+
+metrics_server = MetricsServer()
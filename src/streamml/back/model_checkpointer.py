@@ -0,0 +1,65 @@
+import threading
+import time
+from typing import Callable
+
+from .detector_profile_HST import DetectorProfileHST
+from .profile_store import ProfileStore
+
+
+class ModelCheckpointer:
+    def __init__(self, store: ProfileStore, get_profiles: Callable[[], list[DetectorProfileHST]], tick: float = 1.0):
+        self.store = store
+        self.get_profiles = get_profiles
+        self.tick = tick
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_run: dict[str, float] = {}
+        self._last_updates: dict[str, int] = {}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="model-checkpointer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop_event.wait(self.tick):
+            for p in list(self.get_profiles()):
+                if not p.is_active or p.checkpoint_interval <= 0:
+                    continue
+
+                now = time.monotonic()
+                last = self._last_run.setdefault(p.profile_name, now)
+                if now - last < p.checkpoint_interval:
+                    continue
+                self._last_run[p.profile_name] = now
+
+                try:
+                    self.checkpoint(p)
+                except Exception as e:
+                    print(f"Error checkpointing {p.profile_name}: {e}")
+
+    def checkpoint(self, p: DetectorProfileHST, force: bool = False) -> bool:
+        if not force and self._last_updates.get(p.profile_name) == p.model_updates:
+            return False
+
+        data, updates = p.snapshot_model()
+        if data is None:
+            return False
+
+        self.store.save_checkpoint(p.profile_name, data, keep=p.checkpoint_keep)
+        self._last_updates[p.profile_name] = updates
+        p.last_checkpoint = time.strftime("%Y-%m-%d %H:%M:%S")
+        return True
+
+    def forget(self, profile_name: str):
+        self._last_run.pop(profile_name, None)
+        self._last_updates.pop(profile_name, None)
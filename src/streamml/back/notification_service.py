@@ -1,12 +1,55 @@
 import json
-import requests
+import queue
+import random
+import threading
+import time
 from pathlib import Path
 
 CONFIG_FILE = Path("data/global_config.json")
 
+DISCORD_MESSAGE_LIMIT = 2000
+
+
 class NotificationService:
-    def __init__(self):
+    def __init__(
+        self,
+        outbox_size: int = 1000,
+        max_batch: int = 50,
+        min_interval: float = 1.0,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 5.0
+    ):
         self.webhook_url = ""
+
+        self.outbox = queue.Queue(maxsize=outbox_size)
+        self.max_batch = max_batch
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.session = None
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._blocked_until = 0.0
+
+        self.stats = {
+            "queued": 0,
+            "sent_messages": 0,
+            "sent_requests": 0,
+            "digests": 0,
+            "dropped_full_outbox": 0,
+            "failed_messages": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "last_latency_ms": None,
+            "last_error": None,
+        }
+
         self.load_config()
 
     def load_config(self):
@@ -20,7 +63,7 @@ class NotificationService:
 
     def save_config(self, webhook_url: str):
         self.webhook_url = webhook_url
-        
+
         CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
         try:
             with open(CONFIG_FILE, "w") as f:
@@ -36,14 +79,172 @@ class NotificationService:
         if not self.webhook_url:
             return False
 
-        payload = {
-            "content": message
+        try:
+            self.outbox.put_nowait(message)
+        except queue.Full:
+            self.stats["dropped_full_outbox"] += 1
+            return False
+
+        self.stats["queued"] += 1
+        self._ensure_worker()
+        return True
+
+    def send_message_now(self, message: str) -> bool:
+        if not self.webhook_url:
+            return False
+        return self._post(message) == "ok"
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "outbox_size": self.outbox.qsize(),
+            "worker_alive": bool(self._worker and self._worker.is_alive()),
         }
+
+    def stop(self, timeout: float = 2.0):
+        self._stop_event.set()
+        worker = self._worker
+        if worker:
+            worker.join(timeout=timeout)
+        self._worker = None
+        if self.session:
+            self.session.close()
+            self.session = None
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+            self._worker.start()
+
+    def _get_session(self):
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        return self.session
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                first = self.outbox.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            self._wait_until_unblocked()
+
+            batch = [first]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.outbox.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._deliver(batch)
+
+    def _wait_until_unblocked(self):
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            self._stop_event.wait(delay)
+
+    def _compose(self, batch: list[str]) -> str:
+        if len(batch) == 1:
+            return batch[0][:DISCORD_MESSAGE_LIMIT]
+
+        header = f"**{len(batch)} notifications**\n"
+        parts = []
+        length = len(header)
+        for i, message in enumerate(batch):
+            sep = 2 if parts else 0
+            left = len(batch) - i - 1
+            # Room for the "... and N more" line in case the next message does not fit.
+            reserve = 2 + len(f"... and {left} more") if left else 0
+            if length + sep + len(message) + reserve > DISCORD_MESSAGE_LIMIT:
+                if parts:
+                    parts.append(f"... and {len(batch) - i} more")
+                    break
+                # A first message too long on its own is cut, like a single message.
+                message = message[:DISCORD_MESSAGE_LIMIT - length - reserve]
+            parts.append(message)
+            length += sep + len(message)
+        return header + "\n\n".join(parts)
+
+    def _deliver(self, batch: list[str]):
+        content = self._compose(batch)
+
+        for attempt in range(self.max_retries + 1):
+            if self._stop_event.is_set() and attempt > 0:
+                break
+
+            result = self._post(content)
+            if result == "ok":
+                self.stats["sent_messages"] += len(batch)
+                if len(batch) > 1:
+                    self.stats["digests"] += 1
+                return
+            if result == "fatal":
+                break
+
+            self.stats["retries"] += 1
+            if result == "retry":
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                self._blocked_until = max(self._blocked_until, time.monotonic() + delay * random.uniform(0.5, 1.0))
+            self._wait_until_unblocked()
+
+        self.stats["failed_messages"] += len(batch)
+
+    def _post(self, content: str) -> str:
+        url = self.webhook_url
+        if not url:
+            return "fatal"
+
+        import requests
+
+        start = time.monotonic()
         try:
-            response = requests.post(self.webhook_url, json=payload, timeout=5)
-            return response.status_code in [200, 204]
-        except Exception as e:
+            response = self._get_session().post(url, json={"content": content}, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.stats["last_error"] = str(e)
             print(f"Discord send error: {e}")
-            return False
+            return "retry"
+        finally:
+            self.stats["last_latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+
+        self.stats["sent_requests"] += 1
+        self._update_rate_limit(response)
+
+        if response.status_code in [200, 204]:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + self.min_interval)
+            return "ok"
+
+        self.stats["last_error"] = f"HTTP {response.status_code}"
+        if response.status_code == 429:
+            self.stats["rate_limited"] += 1
+            retry_after = self._retry_after(response)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            return "rate_limited"
+        if response.status_code >= 500:
+            return "retry"
+        return "fatal"
+
+    def _update_rate_limit(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+        if remaining == "0" and reset_after:
+            try:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + float(reset_after))
+            except ValueError:
+                pass
+
+    def _retry_after(self, response) -> float:
+        try:
+            return float(response.json().get("retry_after"))
+        except Exception:
+            pass
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return self.backoff_base
 
 notification_service = NotificationService()
@@ -0,0 +1,117 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+
+CONFIG_FILE_NAME = "config.json"
+MODEL_FILE_NAME = "model.pkl"
+CHECKPOINTS_DIR_NAME = "checkpoints"
+CHECKPOINT_PREFIX = "model-"
+
+
+def atomic_write(path: Path, data: bytes):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class ProfileStore:
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def profile_dir(self, profile_name: str) -> Path:
+        return self.root / profile_name
+
+    def config_path(self, profile_name: str) -> Path:
+        return self.profile_dir(profile_name) / CONFIG_FILE_NAME
+
+    def model_path(self, profile_name: str) -> Path:
+        return self.profile_dir(profile_name) / MODEL_FILE_NAME
+
+    def exists(self) -> bool:
+        return self.root.is_dir()
+
+    def list_profiles(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and (p / CONFIG_FILE_NAME).exists()
+        )
+
+    def load_config(self, profile_name: str) -> dict:
+        with open(self.config_path(profile_name), "r") as f:
+            return json.load(f)
+
+    def save_config(self, profile_name: str, config: dict):
+        data = json.dumps(config, indent=4).encode()
+        atomic_write(self.config_path(profile_name), data)
+
+    def has_model(self, profile_name: str) -> bool:
+        return self.model_path(profile_name).exists()
+
+    def load_model(self, profile_name: str):
+        path = self.model_path(profile_name)
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save_model_bytes(self, profile_name: str, data: bytes):
+        atomic_write(self.model_path(profile_name), data)
+
+    def delete_profile(self, profile_name: str):
+        shutil.rmtree(self.profile_dir(profile_name), ignore_errors=True)
+
+    def checkpoints_dir(self, profile_name: str) -> Path:
+        return self.profile_dir(profile_name) / CHECKPOINTS_DIR_NAME
+
+    def list_checkpoints(self, profile_name: str) -> list[Path]:
+        path = self.checkpoints_dir(profile_name)
+        if not path.is_dir():
+            return []
+        return sorted(path.glob(f"{CHECKPOINT_PREFIX}*.pkl"))
+
+    def latest_checkpoint(self, profile_name: str) -> Path | None:
+        checkpoints = self.list_checkpoints(profile_name)
+        return checkpoints[-1] if checkpoints else None
+
+    def save_checkpoint(self, profile_name: str, data: bytes, keep: int) -> Path:
+        name = f"{CHECKPOINT_PREFIX}{time.time_ns():020d}.pkl"
+        path = self.checkpoints_dir(profile_name) / name
+        atomic_write(path, data)
+
+        for old in self.list_checkpoints(profile_name)[:-max(keep, 1)]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+        return path
+
+    def load_latest_model(self, profile_name: str, prefer_checkpoint: bool = True):
+        path = self.model_path(profile_name)
+        checkpoint = self.latest_checkpoint(profile_name) if prefer_checkpoint else None
+
+        if checkpoint and (not path.exists() or checkpoint.stat().st_mtime > path.stat().st_mtime):
+            path = checkpoint
+        if not path.exists():
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,203 @@
+import multiprocessing
+import signal
+import threading
+import time
+
+STATS_INTERVAL = 0.5
+RESTART_BACKOFF_MAX = 30.0
+STABLE_RUN_TIME = 60.0
+
+
+class ProfileWorker:
+    """UI-side handle of a profile running in its own process.
+
+    The child owns capture, Window, model, checkpoints and evidence; it streams
+    runtime stats back over a pipe. A monitor thread applies them to the
+    profile and restarts the child with backoff if it dies, unless the child
+    reported that the profile cannot start; then the profile is turned off.
+    """
+
+    def __init__(self, profile, profiles_dir: str, stats_interval: float = STATS_INTERVAL):
+        self.profile = profile
+        self.profiles_dir = str(profiles_dir)
+        self.stats_interval = stats_interval
+
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.last_exit_code = None
+        self.started_at = None
+        self.fatal_error = None
+
+        self._send_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    def start(self):
+        self._stopping.clear()
+        self._spawn()
+        self._monitor = threading.Thread(target=self._monitor_loop, name=f"worker-monitor-{self.profile.profile_name}", daemon=True)
+        self._monitor.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        self.send("stop")
+        process = self.process
+        if process:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(2.0)
+        # The monitor itself stops the worker after a fatal error.
+        if self._monitor and self._monitor is not threading.current_thread():
+            self._monitor.join(timeout=2.0)
+        self._monitor = None
+        if self.conn:
+            self.conn.close()
+
+    def send(self, cmd: str, **kwargs) -> bool:
+        with self._send_lock:
+            try:
+                self.conn.send({"cmd": cmd, **kwargs})
+                return True
+            except (AttributeError, OSError, ValueError):
+                return False
+
+    def status(self) -> dict:
+        process = self.process
+        return {
+            "pid": process.pid if process else None,
+            "alive": bool(process and process.is_alive()),
+            "restarts": self.restarts,
+            "last_exit_code": self.last_exit_code,
+            "fatal_error": self.fatal_error,
+        }
+
+    def _spawn(self):
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=run_worker,
+            args=(self.profile.profile_name, self.profile.to_config(), self.profiles_dir, child_conn, self.stats_interval),
+            name=f"streamml-{self.profile.profile_name}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        with self._send_lock:
+            self.conn = parent_conn
+        self.started_at = time.monotonic()
+
+    def _monitor_loop(self):
+        backoff = 1.0
+        while True:
+            try:
+                while self.conn.poll(self.stats_interval):
+                    self._handle(self.conn.recv())
+            except (EOFError, OSError):
+                self.process.join(self.stats_interval)
+
+            if self.process.is_alive():
+                continue
+
+            self.last_exit_code = self.process.exitcode
+            if self._stopping.is_set():
+                return
+            if self.fatal_error is not None:
+                # A restart would fail the same way.
+                print(f"Worker of {self.profile.profile_name} could not start, turning the profile off")
+                if self.profile.worker is self:
+                    self.profile.turn_off()
+                return
+
+            if time.monotonic() - self.started_at >= STABLE_RUN_TIME:
+                backoff = 1.0
+            print(f"Worker of {self.profile.profile_name} exited with code {self.last_exit_code}, restarting in {backoff:g}s")
+            if self._stopping.wait(backoff):
+                return
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX)
+            self.restarts += 1
+            with self._send_lock:
+                self.conn.close()
+            try:
+                self._spawn()
+            except Exception as e:
+                print(f"Error restarting worker of {self.profile.profile_name}: {e}")
+
+    def _handle(self, msg: dict):
+        if msg.get("type") == "stats":
+            self.profile.apply_worker_stats(msg["stats"], msg["scores"])
+        elif msg.get("type") == "error":
+            if msg.get("fatal"):
+                self.fatal_error = msg["message"]
+            print(f"Worker of {self.profile.profile_name}: {msg['message']}")
+
+
+def _worker_status(profile, scores: list) -> dict:
+    return {"type": "stats", "stats": profile.get_runtime_stats(), "scores": scores}
+
+
+def _handle_command(profile, checkpointer, msg: dict):
+    cmd = msg.get("cmd")
+    if cmd == "checkpoint":
+        checkpointer.checkpoint(profile, force=True)
+    elif cmd == "update":
+        setattr(profile, msg["field"], msg["value"])
+    elif cmd == "reconfigure":
+        profile.reconfigure(msg["changes"])
+    elif cmd == "profiler_start":
+        profile.start_profiler(msg["mode"], msg["duration"], output_path=msg.get("output_path"))
+    elif cmd == "profiler_stop":
+        profile.stop_profiler()
+
+
+def run_worker(profile_name: str, config: dict, profiles_dir: str, conn, stats_interval: float = STATS_INTERVAL):
+    # Ctrl-C in the terminal reaches the whole process group; shutdown is driven by the parent.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from .detector_profile_HST import DetectorProfileHST
+    from .profile_store import ProfileStore
+    from .model_checkpointer import ModelCheckpointer
+    from .notification_service import notification_service
+
+    store = ProfileStore(profiles_dir)
+    profile = DetectorProfileHST(profile_name, config)
+    profile.execution = "thread"
+    profile.store = store
+    checkpointer = ModelCheckpointer(store, lambda: [profile])
+
+    scores_version = profile.score_history.version
+    try:
+        try:
+            profile.turn_on()
+        except Exception as e:
+            # e.g. a missing interface or a bad filter: restarting would not help.
+            conn.send({"type": "error", "fatal": True, "message": f"start failed: {e}"})
+            return
+        checkpointer.start()
+        while True:
+            if conn.poll(stats_interval):
+                msg = conn.recv()
+                if msg.get("cmd") == "stop":
+                    break
+                try:
+                    _handle_command(profile, checkpointer, msg)
+                except Exception as e:
+                    conn.send({"type": "error", "message": f"{msg.get('cmd')}: {e}"})
+            # Only scores added since the previous report; the parent keeps its own history.
+            scores, scores_version = profile.score_history.since(scores_version)
+            conn.send(_worker_status(profile, scores))
+    except (EOFError, OSError):
+        # Parent is gone; shut down cleanly so the model is still saved.
+        pass
+    finally:
+        checkpointer.stop()
+        profile.turn_off()
+        data = profile.dump_model()
+        if data is not None:
+            store.save_model_bytes(profile_name, data)
+        notification_service.stop()
+        try:
+            conn.send(_worker_status(profile, profile.score_history.since(scores_version)[0]))
+        except (OSError, ValueError):
+            pass
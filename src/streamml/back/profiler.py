@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILER_MODES = ("sampling", "cprofile")
+
+
+class ProfilerSession:
+    """One bounded profiling run of a capture pipeline's processor thread."""
+
+    extension = ""
+
+    def __init__(self, duration: float, output_path: str):
+        self.duration = float(duration)
+        self.output_path = output_path
+        self.started_at = None
+        self.error = None
+        self._stop_event = threading.Event()
+        self.finished = threading.Event()
+
+    @property
+    def is_running(self) -> bool:
+        return not self.finished.is_set()
+
+    def remaining(self) -> float:
+        if self.finished.is_set():
+            return 0.0
+        if self.started_at is None:
+            return self.duration
+        return max(0.0, self.duration - (time.monotonic() - self.started_at))
+
+    def stop(self):
+        self._stop_event.set()
+
+    def status(self) -> dict:
+        return {
+            "mode": self.mode,
+            "running": self.is_running,
+            "remaining": round(self.remaining(), 1),
+            "output": self.output_path,
+            "error": self.error,
+        }
+
+    def _should_finish(self) -> bool:
+        return self._stop_event.is_set() or time.monotonic() - self.started_at >= self.duration
+
+    def _open_output(self):
+        os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+        return open(self.output_path, "w")
+
+
+class CProfileSession(ProfilerSession):
+    """Deterministic profile; cProfile only sees the thread that enables it, so the pipeline polls us."""
+
+    mode = "cprofile"
+    extension = "pstats"
+
+    def __init__(self, duration: float, output_path: str):
+        super().__init__(duration, output_path)
+        self._profiler = None
+
+    def start(self, pipeline):
+        pipeline.profiler_session = self
+
+    def poll(self, final: bool = False) -> bool:
+        # Runs on the processor thread. Returns True once the session is done.
+        if self._profiler is None:
+            if final:
+                self.finished.set()
+                return True
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self.started_at = time.monotonic()
+            self._profiler.enable()
+            return False
+
+        if not final and not self._should_finish():
+            return False
+
+        self._profiler.disable()
+        try:
+            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
+            self._profiler.dump_stats(self.output_path)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error saving profile: {e}")
+        self._profiler = None
+        self.finished.set()
+        return True
+
+
+class SamplingSession(ProfilerSession):
+    """Periodically samples the processor thread's stack from another thread; writes collapsed stacks."""
+
+    mode = "sampling"
+    extension = "collapsed"
+
+    def __init__(self, duration: float, output_path: str, interval: float = 0.005):
+        super().__init__(duration, output_path)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+
+    def start(self, pipeline):
+        target = pipeline.processor_thread
+        if target is None or not target.is_alive():
+            self.error = "processor thread is not running"
+            self.finished.set()
+            return
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, args=(target,), name="pipeline-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self, target: threading.Thread):
+        ident = target.ident
+        while target.is_alive() and not self._should_finish():
+            frame = sys._current_frames().get(ident)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+                self.samples += 1
+            del frame
+            time.sleep(self.interval)
+        self._write()
+        self.finished.set()
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _write(self):
+        try:
+            with self._open_output() as f:
+                for stack, count in self.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except Exception as e:
+            self.error = str(e)
+            print(f"Error saving profile: {e}")
+
+
+def make_session(mode: str, duration: float, output_dir: str, output_path: str | None = None) -> ProfilerSession:
+    if mode not in PROFILER_MODES:
+        raise ValueError(f"unknown profiler mode {mode!r}, expected one of {', '.join(PROFILER_MODES)}")
+    if duration <= 0:
+        raise ValueError("duration must be positive")
+    session_cls = CProfileSession if mode == "cprofile" else SamplingSession
+    if output_path is None:
+        timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
+        output_path = f"{output_dir}/{timestamp}-{mode}.{session_cls.extension}"
+    return session_cls(duration, output_path)
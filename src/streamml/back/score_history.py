@@ -0,0 +1,129 @@
+import threading
+from array import array
+from collections import deque
+
+SCORE_HISTORY_SIZE = 3600
+DISPLAY_POINTS = 120
+
+
+class ScoreHistory:
+    """Fixed-size ring of window scores with a downsampled view for plotting.
+
+    The view keeps the maximum of each bucket of consecutive scores (so spikes
+    survive downsampling) and is updated on every append; bucket width doubles
+    when there are more than 2 * display_points buckets. Appending and reading
+    the view never walk the whole history.
+    """
+
+    def __init__(self, capacity: int = SCORE_HISTORY_SIZE, display_points: int = DISPLAY_POINTS):
+        self.capacity = max(1, int(capacity))
+        self.display_points = max(1, int(display_points))
+        self.version = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._values = array("d", bytes(8 * self.capacity))
+        self._start = 0
+        self._len = 0
+        self._buckets = deque()
+        self._width = 1
+        self._partial = 0.0
+        self._partial_count = 0
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getstate__(self) -> dict:
+        return {"capacity": self.capacity, "display_points": self.display_points, "values": self.values()}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["capacity"], state["display_points"])
+        self.extend(state["values"])
+
+    @property
+    def last(self) -> float | None:
+        if not self._len:
+            return None
+        return self._values[(self._start + self._len - 1) % self.capacity]
+
+    def append(self, score: float):
+        with self._lock:
+            self._append(float(score))
+            self.version += 1
+
+    def extend(self, scores):
+        with self._lock:
+            for score in scores:
+                self._append(float(score))
+                self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.version += 1
+
+    def values(self) -> list[float]:
+        with self._lock:
+            return self._tail(self._len)
+
+    def since(self, version: int) -> tuple[list[float], int]:
+        """Scores appended after `version` (at most the whole history) and the current version."""
+        with self._lock:
+            return self._tail(min(self.version - version, self._len)), self.version
+
+    def display(self) -> list[float]:
+        with self._lock:
+            points = list(self._buckets)
+            if self._partial_count:
+                points.append(self._partial)
+            return points
+
+    @property
+    def bucket_width(self) -> int:
+        return self._width
+
+    def _tail(self, n: int) -> list[float]:
+        if n <= 0:
+            return []
+        first = (self._start + self._len - n) % self.capacity
+        if first + n <= self.capacity:
+            return self._values[first:first + n].tolist()
+        return self._values[first:].tolist() + self._values[:first + n - self.capacity].tolist()
+
+    def _append(self, score: float):
+        if self._len == self.capacity:
+            self._values[self._start] = score
+            self._start = (self._start + 1) % self.capacity
+            self._evict_one()
+        else:
+            self._values[(self._start + self._len) % self.capacity] = score
+            self._len += 1
+
+        self._partial = score if not self._partial_count else max(self._partial, score)
+        self._partial_count += 1
+        if self._partial_count == self._width:
+            self._buckets.append(self._partial)
+            self._partial_count = 0
+            if len(self._buckets) > 2 * self.display_points:
+                self._merge_buckets()
+
+    def _evict_one(self):
+        # The oldest bucket goes once all of its scores have left the ring.
+        self._evicted += 1
+        if self._evicted >= self._width:
+            self._evicted -= self._width
+            if self._buckets:
+                self._buckets.popleft()
+            else:
+                self._partial_count = max(0, self._partial_count - self._width)
+
+    def _merge_buckets(self):
+        old = list(self._buckets)
+        self._buckets = deque(max(old[i], old[i + 1]) for i in range(0, len(old) - 1, 2))
+        if len(old) % 2:
+            # Leftover bucket becomes the half-filled current bucket of the new width.
+            self._partial = old[-1]
+            self._partial_count = self._width
+        self._width *= 2
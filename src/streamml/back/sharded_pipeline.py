@@ -0,0 +1,511 @@
+import multiprocessing
+import os
+import queue
+import select
+import signal
+import threading
+import time
+import zlib
+from collections import deque
+
+from .capture_pipeline import STOP_TIMEOUT, CapturePipeline, capture_key, interface_list
+from .metrics import metrics_registry
+from .shm_ring import FLUSH, FRAME, STOP, ShmRing
+from .window import CONN_FEATURES, Window, merge_aggregates
+
+RING_SIZE = 32 * 1024 * 1024
+MAX_FRAME = 65535
+
+# Offset of the ethertype for the link types we can hash; anything else goes to shard 0.
+ETHERTYPE_OFFSET = {1: 12, 113: 14}
+VLAN_ETHERTYPES = (b"\x81\x00", b"\x88\xa8", b"\x91\x00")
+ETHERTYPE_IPV4 = b"\x08\x00"
+ETHERTYPE_IPV6 = b"\x86\xdd"
+
+
+def symmetric_flow_hash(frame: bytes, linktype: int = 1) -> int:
+    # Both directions of a host pair hash the same, so a flow never spans two shards.
+    offset = ETHERTYPE_OFFSET.get(linktype)
+    if offset is None:
+        return 0
+    ethertype = frame[offset:offset + 2]
+    while ethertype in VLAN_ETHERTYPES:
+        offset += 4
+        ethertype = frame[offset:offset + 2]
+    ip = offset + 2
+
+    if ethertype == ETHERTYPE_IPV4 and len(frame) >= ip + 20:
+        a, b = frame[ip + 12:ip + 16], frame[ip + 16:ip + 20]
+    elif ethertype == ETHERTYPE_IPV6 and len(frame) >= ip + 40:
+        a, b = frame[ip + 8:ip + 24], frame[ip + 24:ip + 40]
+    else:
+        return 0
+    return zlib.crc32(a + b if a <= b else b + a)
+
+
+def _linktype(sock) -> int:
+    from scapy.all import conf, Ether
+    return conf.l2types.layer2num.get(getattr(sock, "LL", Ether), 1)
+
+
+class RawFrames(list):
+    """Evidence of a sharded window: (timestamp, frame bytes, wire length) tuples plus their pcap link type."""
+
+    def __init__(self, linktype: int = 1):
+        super().__init__()
+        self.linktype = linktype
+
+
+def run_shard(
+    index: int,
+    ring_name: str,
+    linktype: int,
+    window_duration: float,
+    results,
+    track_connections: bool = False,
+    interfaces: list | None = None
+):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from scapy.all import conf, Raw
+
+    ring = ShmRing.attach(ring_name)
+    link_cls = conf.l2types.num2layer.get(linktype, Raw)
+    # Workers only count; feature selection and evidence stay in the parent.
+    # Connections of a host pair all hash to one shard, so each shard tracks its own.
+    window = Window(window_duration=window_duration, enabled_features=CONN_FEATURES if track_connections else [])
+    window.keep_raw = False
+    # Per-interface counts are cheap and always kept; the parent decides whether they become features.
+    interfaces = interfaces or [None]
+    window.set_interfaces(interfaces)
+    iface = interfaces[0]
+
+    idle = 0
+    try:
+        while True:
+            record = ring.get()
+            if record is None:
+                idle = min(idle + 1, 10)
+                time.sleep(0.0001 * idle)
+                continue
+            idle = 0
+
+            kind, ts, data, wirelen = record
+            if kind == FRAME:
+                pkt = link_cls(data)
+                pkt.time = ts
+                pkt.wirelen = wirelen
+                window._process_single_packet(pkt, ts, iface)
+            elif kind == FLUSH:
+                if window.conns is not None:
+                    # ts is the window boundary, as Window.flush() would use it.
+                    window.conns.advance(ts)
+                results.put((index, int.from_bytes(data, "little"), window.aggregate()))
+                window.clear()
+            elif kind == STOP:
+                break
+    finally:
+        ring.close()
+
+
+class ShardedExtractor:
+    """Feature extraction for one window split across processes by symmetric flow hash.
+
+    Window boundaries are decided here with the same rule as Window.add_packet();
+    each shard returns a partial aggregate per window and the partials are
+    merged into exactly the features a single Window would have produced.
+    A shard process that dies is restarted on the same ring; the window it
+    was counting when it died is dropped as incomplete.
+    """
+
+    def __init__(
+        self,
+        shards: int,
+        window_duration: float,
+        enabled_features: list[str],
+        linktype: int = 1,
+        ring_size: int = RING_SIZE,
+        interface=None
+    ):
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.shards = int(shards)
+        self.linktype = linktype
+        self.ring_size = ring_size
+
+        # Holds the window start and the enabled features; packets never go through it.
+        self.window = Window(window_duration=window_duration, enabled_features=enabled_features)
+        self.interfaces = interface_list(interface)
+        self.window.set_interfaces(self.interfaces)
+        self.keep_raw = True
+        self.raw = RawFrames(linktype)
+
+        self.rings = []
+        self.processes = []
+        self.results = None
+        self.window_id = 0
+        self.frames_dropped = 0
+        self.last_finish_ns = 0
+        self.shard_restarts = 0
+        self.windows_lost = 0
+        # Connection table sizes summed over the shards, as of the last merged window.
+        self.conns = {}
+
+        self._ctx = None
+        self._stopping = False
+        self._pending_raw = {}
+        # window id -> {shard index: partial aggregate}
+        self._partials = {}
+        # Windows a dead shard never reported; their partials are discarded when they come in.
+        self._lost = set()
+        self._ready = deque()
+
+    def qsize(self) -> int:
+        return sum(ring.qsize() for ring in self.rings)
+
+    def pending(self) -> int:
+        # Windows flushed to the shards whose partials have not all come back.
+        return len(self._pending_raw)
+
+    def start(self, window_start: float | None = None):
+        self._ctx = multiprocessing.get_context("spawn")
+        self.results = self._ctx.Queue()
+        self.window.window_start = time.time() if window_start is None else window_start
+        for index in range(self.shards):
+            self.rings.append(ShmRing.create(self.ring_size))
+            try:
+                self.processes.append(self._start_shard(index))
+            except Exception:
+                self.stop(timeout=1.0)
+                raise
+
+    def _start_shard(self, index: int):
+        process = self._ctx.Process(
+            target=run_shard,
+            # Decided at start: connection features enabled later only show up after a restart.
+            args=(
+                index, self.rings[index].name, self.linktype, self.window.window_duration, self.results,
+                bool(self.window.enabled & CONN_FEATURES), self.interfaces
+            ),
+            name=f"streamml-shard-{index}",
+            daemon=True
+        )
+        process.start()
+        return process
+
+    def check_shards(self) -> list[int]:
+        """Restart shard processes that died; returns their indexes."""
+        if self._stopping:
+            return []
+        dead = [index for index, process in enumerate(self.processes) if not process.is_alive()]
+        if not dead:
+            return dead
+        # Take in what the dead shards sent before they went, so the check below sees it.
+        while True:
+            try:
+                self._add_partial(*self.results.get_nowait())
+            except queue.Empty:
+                break
+        for index in dead:
+            print(f"Shard {index} exited with code {self.processes[index].exitcode}, restarting it")
+            # The counts of the window the shard was in are gone; later windows are still in its ring.
+            unreported = [wid for wid in self._pending_raw if index not in self._partials.get(wid, {})]
+            wid = min(unreported, default=self.window_id + 1)
+            self._pending_raw.pop(wid, None)
+            self._lost.add(wid)
+            self.windows_lost += 1
+            self.processes[index] = self._start_shard(index)
+            self.shard_restarts += 1
+        return dead
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping = True
+        for ring in self.rings:
+            ring.put_wait(STOP, timeout=timeout)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
+        for ring in self.rings:
+            ring.close()
+        self.rings = []
+        self.processes = []
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+
+    def add_frame(self, data: bytes, ts: float, now: float | None = None, wirelen: int | None = None) -> bool:
+        """Route one captured frame; returns False if its shard's ring was full."""
+        if now is None:
+            now = time.time()
+        if now - self.window.window_start >= self.window.window_duration:
+            self.flush(now)
+
+        if wirelen is None:
+            wirelen = len(data)
+        ring = self.rings[symmetric_flow_hash(data, self.linktype) % self.shards]
+        if not ring.put(FRAME, data[:MAX_FRAME], ts, wirelen):
+            self.frames_dropped += 1
+            return False
+        if self.keep_raw:
+            self.raw.append((ts, data, wirelen))
+        return True
+
+    def flush(self, next_window_start: float | None = None):
+        now = time.time() if next_window_start is None else next_window_start
+        self.window_id += 1
+        marker = self.window_id.to_bytes(8, "little")
+        for ring in self.rings:
+            if not ring.put_wait(FLUSH, marker, now):
+                print(f"Shard ring stalled, window {self.window_id} will be incomplete")
+        self._pending_raw[self.window_id] = self.raw
+        self.raw = RawFrames(self.linktype)
+        self.window.window_start = now
+
+    def collect(self, timeout: float = 1.0):
+        """Wait for the next complete window; returns (features, raw) or None."""
+        self.check_shards()
+        if not self._ready:
+            try:
+                self._add_partial(*self.results.get(timeout=timeout))
+            except queue.Empty:
+                return None
+        return self._ready.popleft() if self._ready else None
+
+    def _add_partial(self, index: int, window_id: int, aggregate: dict):
+        partials = self._partials.setdefault(window_id, {})
+        partials[index] = aggregate
+        if len(partials) < self.shards:
+            return
+
+        lost = window_id in self._lost
+        # Shards report windows in order, so older windows still missing a partial never complete.
+        for wid in [wid for wid in self._partials if wid <= window_id]:
+            del self._partials[wid]
+            if wid != window_id and wid not in self._lost:
+                self._pending_raw.pop(wid, None)
+                self.windows_lost += 1
+            self._lost.discard(wid)
+        if lost or window_id not in self._pending_raw:
+            return
+
+        start_ns = time.perf_counter_ns()
+        merged = merge_aggregates(list(partials.values()))
+        # Shards keep the interface names they were started with; a retuned capture counts under the new ones.
+        merged["ifaces"] = dict(zip(self.interfaces, merged["ifaces"].values()))
+        self.conns = merged["conns"]
+        features = self.window.features_from_aggregate(merged)
+        self.last_finish_ns = time.perf_counter_ns() - start_ns
+        self._ready.append((features, self._pending_raw.pop(window_id)))
+
+
+class _RingDepth:
+    # Stands in for CapturePipeline.queue so stats and metrics keep working.
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def qsize(self) -> int:
+        extractor = self.pipeline.extractor
+        return extractor.qsize() if extractor else 0
+
+
+class ShardedCapturePipeline(CapturePipeline):
+    """Capture pipeline for one high-rate interface with feature extraction spread over shard processes.
+
+    The capture thread reads raw frames and copies them into per-shard
+    shared-memory rings without dissecting them; the processor thread merges
+    the shards' partial windows and scores them as usual. Load shedding does
+    not apply here: sharding is the answer to the same overload.
+    """
+
+    def __init__(
+        self,
+        interface,
+        bpf_filter: str,
+        window_duration: float,
+        shards: int,
+        queue_size: int = 10000,
+        name: str = "",
+        snaplen: int = 0,
+        dedup_horizon: float = 0.0
+    ):
+        if len(interface_list(interface)) > 1:
+            raise ValueError("a sharded capture reads one interface, use shards = 0 to merge several")
+        super().__init__(
+            interface, bpf_filter, window_duration, queue_size=queue_size, name=name,
+            load_shedding=False, snaplen=snaplen, dedup_horizon=dedup_horizon
+        )
+        self.shards = int(shards)
+        self.socket = None
+        self.queue = _RingDepth(self)
+        self.extractor = None
+        self.capture_thread = None
+        self._wake = None
+        self._capture_done = threading.Event()
+
+    def __repr__(self):
+        names = [m.profile_name for m in self.members]
+        return f"<ShardedCapturePipeline interface={self.interface!r}, shards={self.shards}, members={names}, active={self.is_active}>"
+
+    @property
+    def key(self) -> tuple:
+        return capture_key(self.interface, self.bpf_filter, self.window_duration, self.shards, self.snaplen, self.dedup_horizon)
+
+    def metric_samples(self) -> dict:
+        samples = super().metric_samples()
+        samples["shards"] = ("gauge", self.shards)
+        extractor = self.extractor
+        if extractor is not None:
+            samples["shard_restarts_total"] = ("counter", extractor.shard_restarts)
+            samples["windows_lost_total"] = ("counter", extractor.windows_lost)
+            # The parent window gets no packets here; the connection tables live in the shards.
+            samples["connections_tracked"] = ("gauge", extractor.conns.get("tracked", 0))
+            samples["connections_untracked_total"] = ("counter", extractor.conns.get("overflow", 0))
+        return samples
+
+    def _update_features(self):
+        super()._update_features()
+        if self.extractor is not None:
+            self.extractor.window.enabled = self.window.enabled
+
+    def can_retune(self, profile) -> bool:
+        return self.members == [profile] and profile.shards == self.shards
+
+    def retune(self, interface, bpf_filter: str, snaplen: int, window_duration: float, dedup_horizon: float = 0.0) -> bool:
+        if len(interface_list(interface)) > 1:
+            return False
+        if (interface, bpf_filter or "", int(snaplen)) != (self.interface, self.bpf_filter, self.snaplen):
+            from .capture_socket import open_capture_socket
+
+            sock = open_capture_socket(interface, bpf_filter, snaplen)
+            if _linktype(sock) != self.extractor.linktype:
+                # Shards dissect frames with the link type they were started with.
+                sock.close()
+                return False
+            # The capture thread picks up the new socket on its next read.
+            old_socket, self.socket = self.socket, sock
+            self.interface, self.bpf_filter, self.snaplen = interface, bpf_filter or "", int(snaplen)
+            self.interfaces = interface_list(interface)
+            self.window.set_interfaces(self.interfaces)
+            self.extractor.interfaces = self.interfaces
+            self.extractor.window.set_interfaces(self.interfaces)
+            old_socket.close()
+        self.window_duration = float(window_duration)
+        self.extractor.window.window_duration = self.window_duration
+        if float(dedup_horizon) != self.dedup_horizon:
+            self.dedup_horizon = float(dedup_horizon)
+            self.dedup = self._new_dedup(ETHERTYPE_OFFSET.get(self.extractor.linktype))
+        return True
+
+    def start(self):
+        if self.is_active:
+            return
+
+        from .capture_socket import open_capture_socket
+
+        self.socket = open_capture_socket(self.interface, self.bpf_filter, self.snaplen)
+        linktype = _linktype(self.socket)
+        self.dedup = self._new_dedup(ETHERTYPE_OFFSET.get(linktype))
+
+        self.extractor = ShardedExtractor(
+            self.shards, self.window_duration, sorted(self.window.enabled), linktype=linktype, interface=self.interface
+        )
+        try:
+            self.extractor.start()
+        except Exception:
+            self.socket.close()
+            self.socket = None
+            raise
+        self._wake = os.pipe()
+        self._capture_done.clear()
+        self.is_active = True
+
+        self.capture_thread = threading.Thread(target=self._capture_thread, name="capture", daemon=True)
+        self.capture_thread.start()
+        self.processor_thread = threading.Thread(target=self._process_thread, name="processor", daemon=True)
+        self.processor_thread.start()
+        metrics_registry.register("pipeline", self.name, self)
+
+    def stop(self, timeout: float = STOP_TIMEOUT):
+        if not self.is_active and self.processor_thread is None:
+            return
+        metrics_registry.unregister("pipeline", self.name, self)
+        self._stop_deadline = time.monotonic() + timeout
+        self.is_active = False
+        if self._wake:
+            os.write(self._wake[1], b"x")
+        self._join(self.capture_thread)
+
+        # The ring producer must be gone before the final flush, or it would have two writers.
+        if self.extractor and self.capture_thread and not self.capture_thread.is_alive():
+            self.extractor.flush()
+        self._capture_done.set()
+        self._join(self.processor_thread)
+        self.capture_thread = self.processor_thread = None
+
+        if self.socket:
+            self.socket.close()
+            self.socket = None
+        if self.extractor:
+            self.extractor.stop(timeout=max(0.5, self._stop_deadline - time.monotonic()))
+        if self._wake:
+            for fd in self._wake:
+                os.close(fd)
+            self._wake = None
+        self._clear_members()
+
+    def _capture_thread(self):
+        stages = self.stage_metrics.stages
+        wake = self._wake[0]
+        while self.is_active:
+            sock = self.socket
+            try:
+                ready, _, _ = select.select([sock, wake], [], [], 0.5)
+                if wake in ready:
+                    break
+                if not ready:
+                    continue
+                _, data, ts = sock.recv_raw(MAX_FRAME)
+            except (OSError, ValueError) as e:
+                if sock is not self.socket:
+                    continue  # closed by retune()
+                if self.is_active:
+                    print(f"Capture error on {self.interface}: {e}")
+                break
+            if not data:
+                continue
+
+            now = time.time()
+            if ts is None:
+                ts = now
+            dedup = self.dedup
+            if dedup is not None and dedup.is_duplicate(data, ts):
+                continue
+            if self.extractor.add_frame(data, ts, now, getattr(sock, "wirelen", None)):
+                self.packets_read += 1
+            else:
+                self.packets_dropped += 1
+
+            if metrics_registry.enabled:
+                stages["capture"].record_ns(max(0, int((now - ts) * 1e9)))
+
+    def _process_thread(self):
+        while True:
+            if self._capture_done.is_set() and not self.extractor.pending():
+                break
+            if not self.is_active and time.monotonic() > self._stop_deadline:
+                break
+            if self.profiler_session is not None and self.profiler_session.poll():
+                self.profiler_session = None
+
+            result = self.extractor.collect(timeout=0.5)
+            if result is None:
+                continue
+            if metrics_registry.enabled:
+                self.stage_metrics.record_ns("finish_window", self.extractor.last_finish_ns)
+            self._deliver_window(*result)
+
+        if self.profiler_session is not None:
+            self.profiler_session.poll(final=True)
+            self.profiler_session = None
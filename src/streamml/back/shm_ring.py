@@ -0,0 +1,112 @@
+import struct
+import time
+from multiprocessing import shared_memory
+
+# Producer and consumer cursors live on separate cache lines.
+PRODUCER = struct.Struct("<QQ")  # tail (bytes written), records written
+CONSUMER = struct.Struct("<QQ")  # head (bytes read), records read
+CONSUMER_OFFSET = 64
+HEADER_SIZE = 128
+
+RECORD = struct.Struct("<HHId")  # kind, data length, wire length, timestamp
+ALIGN = 16  # >= RECORD.size, so a wrap marker always fits at the end
+MAX_DATA = 0xFFFF
+
+FRAME, FLUSH, STOP, WRAP = 0, 1, 2, 3
+
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) & ~(ALIGN - 1)
+
+
+class ShmRing:
+    """Single-producer single-consumer byte ring in shared memory.
+
+    Frames are copied in once by the capture thread and read in place by the
+    shard process, so nothing is pickled per packet. Each side only writes its
+    own cursor, which is stored after the record it covers.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.buf = shm.buf
+        self.capacity = shm.size - HEADER_SIZE
+        self.owner = owner
+
+    @classmethod
+    def create(cls, size: int) -> "ShmRing":
+        size = _aligned(size)
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + size)
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def qsize(self) -> int:
+        _, written = PRODUCER.unpack_from(self.buf, 0)
+        _, read = CONSUMER.unpack_from(self.buf, CONSUMER_OFFSET)
+        return written - read
+
+    def put(self, kind: int, data: bytes = b"", ts: float = 0.0, wirelen: int = 0) -> bool:
+        """Append one record; returns False when the ring is full."""
+        size = _aligned(RECORD.size + len(data))
+        if len(data) > MAX_DATA or size > self.capacity // 2:
+            raise ValueError(f"record of {len(data)} bytes does not fit the ring")
+
+        tail, written = PRODUCER.unpack_from(self.buf, 0)
+        head, _ = CONSUMER.unpack_from(self.buf, CONSUMER_OFFSET)
+        pos = tail % self.capacity
+        skip = self.capacity - pos if pos + size > self.capacity else 0
+        if tail + skip + size - head > self.capacity:
+            return False
+
+        if skip:
+            RECORD.pack_into(self.buf, HEADER_SIZE + pos, WRAP, 0, 0, 0.0)
+            tail += skip
+            pos = 0
+
+        start = HEADER_SIZE + pos
+        RECORD.pack_into(self.buf, start, kind, len(data), wirelen, ts)
+        self.buf[start + RECORD.size:start + RECORD.size + len(data)] = data
+        PRODUCER.pack_into(self.buf, 0, tail + size, written + 1)
+        return True
+
+    def put_wait(self, kind: int, data: bytes = b"", ts: float = 0.0, timeout: float = 5.0) -> bool:
+        # Control records must not be lost; wait for the consumer to make room.
+        deadline = time.monotonic() + timeout
+        while not self.put(kind, data, ts):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def get(self) -> tuple[int, float, bytes, int] | None:
+        """Pop the oldest record as (kind, ts, data, wirelen), or None when empty."""
+        head, read = CONSUMER.unpack_from(self.buf, CONSUMER_OFFSET)
+        tail, _ = PRODUCER.unpack_from(self.buf, 0)
+        while head != tail:
+            pos = head % self.capacity
+            start = HEADER_SIZE + pos
+            kind, length, wirelen, ts = RECORD.unpack_from(self.buf, start)
+            if kind == WRAP:
+                head += self.capacity - pos
+                continue
+            data = bytes(self.buf[start + RECORD.size:start + RECORD.size + length])
+            CONSUMER.pack_into(self.buf, CONSUMER_OFFSET, head + _aligned(RECORD.size + length), read + 1)
+            return kind, ts, data, wirelen
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -1,20 +1,49 @@
 import time
-from collections import defaultdict
-from statistics import mean, pstdev
+from collections import Counter, defaultdict
+from statistics import pstdev
 import math
 
-from scapy.all import IP, IPv6, TCP, UDP, ICMP
+from .conn_tracker import ConnectionTracker, conn_key
+
+IP = IPv6 = TCP = UDP = ICMP = None
+
+
+def _load_scapy_layers():
+    global IP, IPv6, TCP, UDP, ICMP
+    if IP is None:
+        from scapy.all import IP, IPv6, TCP, UDP, ICMP
+
 
 class Window:
     def __init__(self, window_duration: float, enabled_features: list[str]):
+        _load_scapy_layers()
 
         self.window_duration = float(window_duration)
+        # Connections outlive windows, so they are tracked apart from `flows` (see enabled).
+        self.conns = None
         self.enabled = set(enabled_features)
 
         self.window_start = time.time()
+        self.last_finish_ns = 0
+
+        # Load shedding (see load_shedder.py): each kept packet stands for `weight` packets.
+        self.weight = 1
+        self.shed_features = set()
+        self.keep_raw = True
 
         self.raw_packets_buffer = []
 
+        # Packets and bytes per captured interface, for the optional "iface_counters" feature.
+        self.iface_counts = {}
+
+        # Weighted like the packet counters, at the weight in effect when each flow was first seen.
+        self.flow_weight = 0
+        # Size statistics of the kept packets. Per-packet sizes are only collected for std_pkt_size.
+        self.size_total = 0
+        self.size_packets = 0
+        self.size_min = math.inf
+        self.size_max = 0
+
         self.flows = defaultdict(lambda: {
             "pkt_count": 0,
             "byte_count": 0,
@@ -32,28 +61,69 @@ class Window:
             "icmp_pkts": 0,
         })
 
-    def add_packet(self, pkt):
-        now = time.time()
+    @property
+    def enabled(self) -> set:
+        return self._enabled
 
-        if now - self.window_start >= self.window_duration:
-            features = self._finish_window()
+    @enabled.setter
+    def enabled(self, features):
+        # The connection tracker only runs while one of its features is wanted.
+        self._enabled = set(features)
+        if not self._enabled & CONN_FEATURES:
+            self.conns = None
+        elif self.conns is None:
+            self.conns = ConnectionTracker()
+
+    def set_interfaces(self, interfaces: list):
+        # Counts of interfaces that stay are kept, so a retuned capture does not reset the current window.
+        self.iface_counts = {name: self.iface_counts.get(name, [0, 0]) for name in interfaces}
 
-            self.window_start = now
-            
-            raw = list(self.raw_packets_buffer)
-            
-            self.raw_packets_buffer.clear()
-            self.flows.clear()
+    def add_packet(self, pkt, now: float | None = None, iface=None):
+        if now is None:
+            now = time.time()
 
-            self._process_single_packet(pkt)
+        if now - self.window_start >= self.window_duration:
+            features, raw = self.flush(now)
+
+            self._process_single_packet(pkt, now, iface)
 
             return features, raw
 
-        self._process_single_packet(pkt)
+        self._process_single_packet(pkt, now, iface)
         return None
 
-    def _process_single_packet(self, pkt):
-        self.raw_packets_buffer.append(pkt)
+    def flush(self, next_window_start: float | None = None):
+        now = time.time() if next_window_start is None else next_window_start
+        if self.conns is not None:
+            # Connections that went idle with no packet since still end in this window.
+            self.conns.advance(now)
+
+        start_ns = time.perf_counter_ns()
+        features = self._finish_window()
+        self.last_finish_ns = time.perf_counter_ns() - start_ns
+
+        self.window_start = now
+
+        raw = list(self.raw_packets_buffer)
+        self.clear()
+
+        return features, raw
+
+    def clear(self):
+        # Per-window state only; tracked connections carry over to the next window.
+        self.raw_packets_buffer.clear()
+        self.flows.clear()
+        self.flow_weight = 0
+        self.size_total = self.size_packets = self.size_max = 0
+        self.size_min = math.inf
+        for counts in self.iface_counts.values():
+            counts[0] = counts[1] = 0
+        if self.conns is not None:
+            self.conns.start_window()
+
+    def _process_single_packet(self, pkt, now: float | None = None, iface=None):
+        if self.keep_raw:
+            self.raw_packets_buffer.append(pkt)
 
         proto = None
         if IP in pkt:
@@ -70,130 +140,210 @@ class Window:
         key = (src, dst, proto)
         f = self.flows[key]
 
-        now = time.time()
+        w = self.weight
+        if now is None:
+            now = time.time()
         if f["start_ts"] is None:
             f["start_ts"] = now
+            self.flow_weight += w
         f["end_ts"] = now
 
-        size = len(pkt)
-        f["pkt_count"] += 1
-        f["byte_count"] += size
-        f["sizes"].append(size)
+        track_ports = not self.shed_features
+        conns = self.conns
+
+        # Header-only captures are truncated; wirelen is the size the frame had on the wire.
+        size = pkt.wirelen or len(pkt)
+        f["pkt_count"] += w
+        f["byte_count"] += size * w
+        self.size_total += size
+        self.size_packets += 1
+        if size < self.size_min:
+            self.size_min = size
+        if size > self.size_max:
+            self.size_max = size
+        if "std_pkt_size" not in self.shed_features:
+            f["sizes"].append(size)
+
+        counts = self.iface_counts.get(iface)
+        if counts is not None:
+            counts[0] += w
+            counts[1] += size * w
 
         if TCP in pkt:
-            f["tcp_pkts"] += 1
-            dport = pkt[TCP].dport
-            sport = pkt[TCP].sport
-            f["dst_ports"][dport] += 1
-            f["src_ports"][sport] += 1
-
-            flags = pkt[TCP].flags
-            if flags & 0x02: f["tcp_flags"]["syn"] += 1
-            if flags & 0x01: f["tcp_flags"]["fin"] += 1
-            if flags & 0x04: f["tcp_flags"]["rst"] += 1
-            if flags & 0x10: f["tcp_flags"]["ack"] += 1
-            if flags & 0x08: f["tcp_flags"]["psh"] += 1
-            if flags & 0x20: f["tcp_flags"]["urg"] += 1
+            # pkt[layer] searches the layers every time; look it up once.
+            tcp = pkt[TCP]
+            f["tcp_pkts"] += w
+            if track_ports:
+                f["dst_ports"][tcp.dport] += w
+                f["src_ports"][tcp.sport] += w
+
+            flags = tcp.flags
+            if flags & 0x02: f["tcp_flags"]["syn"] += w
+            if flags & 0x01: f["tcp_flags"]["fin"] += w
+            if flags & 0x04: f["tcp_flags"]["rst"] += w
+            if flags & 0x10: f["tcp_flags"]["ack"] += w
+            if flags & 0x08: f["tcp_flags"]["psh"] += w
+            if flags & 0x20: f["tcp_flags"]["urg"] += w
 
             if flags in [0x29, 0x3F, 0x3B]:
-                f["tcp_flags"]["xmas"] += 1
+                f["tcp_flags"]["xmas"] += w
             if flags == 0:
-                f["tcp_flags"]["null"] += 1
+                f["tcp_flags"]["null"] += w
+
+            if conns is not None:
+                conns.packet(conn_key(src, dst, proto, tcp.sport, tcp.dport), now, int(flags), w)
 
         elif UDP in pkt:
-            f["udp_pkts"] += 1
-            dport = pkt[UDP].dport
-            sport = pkt[UDP].sport
-            f["dst_ports"][dport] += 1
-            f["src_ports"][sport] += 1
+            udp = pkt[UDP]
+            f["udp_pkts"] += w
+            if track_ports:
+                f["dst_ports"][udp.dport] += w
+                f["src_ports"][udp.sport] += w
+
+            if conns is not None:
+                conns.packet(conn_key(src, dst, proto, udp.sport, udp.dport), now, None, w)
 
         elif ICMP in pkt:
-            f["icmp_pkts"] += 1
+            f["icmp_pkts"] += w
+            if conns is not None:
+                conns.packet(conn_key(src, dst, proto), now, None, w)
 
     def _finish_window(self):
         if not self.flows:
             return {} 
+        return self.features_from_aggregate(self.aggregate())
 
-        total_flows = len(self.flows)
-        total_packets = 0
-        total_bytes = 0
-
+    def aggregate(self) -> dict:
+        # Window totals. Aggregates of disjoint flow sets (shards) merge exactly with merge_aggregates().
         tcp_flags_global = {
             "syn": 0, "fin": 0, "rst": 0, "ack": 0,
             "psh": 0, "urg": 0, "xmas": 0, "null": 0
         }
 
-        all_sizes = []
+        total_packets = 0
+        total_bytes = 0
+        all_sizes = Counter()
         proto_tcp = 0
         proto_udp = 0
         proto_icmp = 0
 
-        dst_port_counts = defaultdict(int)
-        src_port_counts = defaultdict(int)
+        dst_port_counts = Counter()
+        src_port_counts = Counter()
 
         for f in self.flows.values():
             total_packets += f["pkt_count"]
             total_bytes += f["byte_count"]
 
-            for p, c in f["dst_ports"].items():
-                dst_port_counts[p] += c
-            for p, c in f["src_ports"].items():
-                src_port_counts[p] += c
+            dst_port_counts.update(f["dst_ports"])
+            src_port_counts.update(f["src_ports"])
 
             for k in tcp_flags_global:
                 tcp_flags_global[k] += f["tcp_flags"][k]
 
-            all_sizes.extend(f["sizes"])
+            all_sizes.update(f["sizes"])
             proto_tcp += f["tcp_pkts"]
             proto_udp += f["udp_pkts"]
             proto_icmp += f["icmp_pkts"]
 
+        return {
+            "flows": self.flow_weight,
+            "packets": total_packets,
+            "bytes": total_bytes,
+            "tcp_flags": tcp_flags_global,
+            "sizes": all_sizes,
+            "size_total": self.size_total,
+            "size_packets": self.size_packets,
+            "size_min": self.size_min,
+            "size_max": self.size_max,
+            "dst_ports": dst_port_counts,
+            "src_ports": src_port_counts,
+            "tcp": proto_tcp,
+            "udp": proto_udp,
+            "icmp": proto_icmp,
+            "ifaces": {name: list(counts) for name, counts in self.iface_counts.items()},
+            "conns": self.conns.snapshot() if self.conns else {},
+        }
+
+    def features_from_aggregate(self, agg: dict) -> dict:
+        if not agg["flows"]:
+            return {}
+
+        enabled = self.enabled - self.shed_features if self.shed_features else self.enabled
+
+        total_flows = agg["flows"]
+        total_packets = agg["packets"]
+        total_bytes = agg["bytes"]
+        tcp_flags_global = agg["tcp_flags"]
+        proto_tcp = agg["tcp"]
+        proto_udp = agg["udp"]
+        proto_icmp = agg["icmp"]
+        dst_port_counts = agg["dst_ports"]
+        src_port_counts = agg["src_ports"]
+
         window_len = self.window_duration
         total_pkts = total_packets if total_packets > 0 else 1
         
         feat = {}
 
-        if "flow_count" in self.enabled: feat["flow_count"] = total_flows
-        if "total_packets" in self.enabled: feat["total_packets"] = total_packets
-        if "total_bytes" in self.enabled: feat["total_bytes"] = total_bytes
-        if "avg_bytes_per_flow" in self.enabled: feat["avg_bytes_per_flow"] = total_bytes / total_flows if total_flows else 0
-        if "pkt_rate" in self.enabled: feat["pkt_rate"] = total_packets / window_len
-        if "byte_rate" in self.enabled: feat["byte_rate"] = total_bytes / window_len
-
-        if "syn_count" in self.enabled: feat["syn_count"] = tcp_flags_global["syn"]
-        if "fin_count" in self.enabled: feat["fin_count"] = tcp_flags_global["fin"]
-        if "rst_count" in self.enabled: feat["rst_count"] = tcp_flags_global["rst"]
-        if "ack_count" in self.enabled: feat["ack_count"] = tcp_flags_global["ack"]
-        if "psh_count" in self.enabled: feat["psh_count"] = tcp_flags_global["psh"]
-        if "urg_count" in self.enabled: feat["urg_count"] = tcp_flags_global["urg"]
-
-        if "syn_ratio" in self.enabled: feat["syn_ratio"] = tcp_flags_global["syn"] / total_pkts
-        if "fin_ratio" in self.enabled: feat["fin_ratio"] = tcp_flags_global["fin"] / total_pkts
-        if "xmas_total" in self.enabled: feat["xmas_total"] = tcp_flags_global["xmas"]
-        if "null_scan_total" in self.enabled: feat["null_scan_total"] = tcp_flags_global["null"]
-
-        if "unique_dst_ports" in self.enabled: feat["unique_dst_ports"] = len(dst_port_counts)
-        if "unique_src_ports" in self.enabled: feat["unique_src_ports"] = len(src_port_counts)
-        if "port_entropy_dst" in self.enabled: feat["port_entropy_dst"] = entropy(dst_port_counts)
-        if "port_entropy_src" in self.enabled: feat["port_entropy_src"] = entropy(src_port_counts)
-
-        if all_sizes:
-            if "avg_pkt_size" in self.enabled: feat["avg_pkt_size"] = mean(all_sizes)
-            if "min_pkt_size" in self.enabled: feat["min_pkt_size"] = min(all_sizes)
-            if "max_pkt_size" in self.enabled: feat["max_pkt_size"] = max(all_sizes)
-            if "std_pkt_size" in self.enabled: feat["std_pkt_size"] = pstdev(all_sizes)
+        if "flow_count" in enabled: feat["flow_count"] = total_flows
+        if "total_packets" in enabled: feat["total_packets"] = total_packets
+        if "total_bytes" in enabled: feat["total_bytes"] = total_bytes
+        if "avg_bytes_per_flow" in enabled: feat["avg_bytes_per_flow"] = total_bytes / total_flows if total_flows else 0
+        if "pkt_rate" in enabled: feat["pkt_rate"] = total_packets / window_len
+        if "byte_rate" in enabled: feat["byte_rate"] = total_bytes / window_len
+
+        if "syn_count" in enabled: feat["syn_count"] = tcp_flags_global["syn"]
+        if "fin_count" in enabled: feat["fin_count"] = tcp_flags_global["fin"]
+        if "rst_count" in enabled: feat["rst_count"] = tcp_flags_global["rst"]
+        if "ack_count" in enabled: feat["ack_count"] = tcp_flags_global["ack"]
+        if "psh_count" in enabled: feat["psh_count"] = tcp_flags_global["psh"]
+        if "urg_count" in enabled: feat["urg_count"] = tcp_flags_global["urg"]
+
+        if "syn_ratio" in enabled: feat["syn_ratio"] = tcp_flags_global["syn"] / total_pkts
+        if "fin_ratio" in enabled: feat["fin_ratio"] = tcp_flags_global["fin"] / total_pkts
+        if "xmas_total" in enabled: feat["xmas_total"] = tcp_flags_global["xmas"]
+        if "null_scan_total" in enabled: feat["null_scan_total"] = tcp_flags_global["null"]
+
+        if "unique_dst_ports" in enabled: feat["unique_dst_ports"] = len(dst_port_counts)
+        if "unique_src_ports" in enabled: feat["unique_src_ports"] = len(src_port_counts)
+        if "port_entropy_dst" in enabled: feat["port_entropy_dst"] = entropy(dst_port_counts)
+        if "port_entropy_src" in enabled: feat["port_entropy_src"] = entropy(src_port_counts)
+
+        if agg["size_packets"]:
+            if "avg_pkt_size" in enabled: feat["avg_pkt_size"] = agg["size_total"] / agg["size_packets"]
+            if "min_pkt_size" in enabled: feat["min_pkt_size"] = agg["size_min"]
+            if "max_pkt_size" in enabled: feat["max_pkt_size"] = agg["size_max"]
+            if "std_pkt_size" in enabled:
+                # pstdev is exact, so the order of sizes does not matter.
+                sizes = list(agg["sizes"].elements())
+                feat["std_pkt_size"] = pstdev(sizes) if sizes else 0
         else:
             for k in ["avg_pkt_size", "min_pkt_size", "max_pkt_size", "std_pkt_size"]:
-                if k in self.enabled: feat[k] = 0
+                if k in enabled: feat[k] = 0
 
-        if "avg_packets_per_flow" in self.enabled:
+        if "avg_packets_per_flow" in enabled:
             feat["avg_packets_per_flow"] = total_packets / total_flows if total_flows else 0
-        if "avg_bytes_per_packet" in self.enabled:
+        if "avg_bytes_per_packet" in enabled:
             feat["avg_bytes_per_packet"] = total_bytes / total_pkts
 
-        if "proto_tcp_ratio" in self.enabled: feat["proto_tcp_ratio"] = proto_tcp / total_pkts
-        if "proto_udp_ratio" in self.enabled: feat["proto_udp_ratio"] = proto_udp / total_pkts
-        if "proto_icmp_ratio" in self.enabled: feat["proto_icmp_ratio"] = proto_icmp / total_pkts
+        if "proto_tcp_ratio" in enabled: feat["proto_tcp_ratio"] = proto_tcp / total_pkts
+        if "proto_udp_ratio" in enabled: feat["proto_udp_ratio"] = proto_udp / total_pkts
+        if "proto_icmp_ratio" in enabled: feat["proto_icmp_ratio"] = proto_icmp / total_pkts
+
+        conns = agg.get("conns")
+        if conns:
+            if "new_flows" in enabled: feat["new_flows"] = conns["new"]
+            if "half_open_conns" in enabled: feat["half_open_conns"] = conns["half_open"]
+            if "active_conns" in enabled: feat["active_conns"] = conns["active"]
+            if "avg_conn_duration" in enabled:
+                feat["avg_conn_duration"] = conns["duration_us"] / conns["ended"] / 1e6 if conns["ended"] else 0
+
+        ifaces = agg.get("ifaces")
+        if IFACE_COUNTERS in enabled and ifaces:
+            names = iface_feature_names(list(ifaces))
+            for i, (packets, nbytes) in enumerate(ifaces.values()):
+                feat[names[2 * i]] = packets
+                feat[names[2 * i + 1]] = nbytes
 
         return feat
 
@@ -232,8 +382,29 @@ FEATURE_LIST = [
     "proto_tcp_ratio",
     "proto_udp_ratio",
     "proto_icmp_ratio",
+
+    "new_flows",
+    "half_open_conns",
+    "active_conns",
+    "avg_conn_duration",
 ]
 
+# Computed from connections tracked across windows rather than from the window's flows.
+CONN_FEATURES = {"new_flows", "half_open_conns", "active_conns", "avg_conn_duration"}
+
+
+# Not in FEATURE_LIST: stands for packets_on_<iface> and bytes_on_<iface> for each interface of the capture.
+IFACE_COUNTERS = "iface_counters"
+OPTIONAL_FEATURES = [IFACE_COUNTERS]
+
+
+def iface_feature_names(interfaces: list) -> list[str]:
+    names = []
+    for iface in interfaces:
+        label = iface or "default"
+        names += [f"packets_on_{label}", f"bytes_on_{label}"]
+    return names
+
 
 def entropy(values):
     if not values:
@@ -243,9 +414,32 @@ def entropy(values):
     if total == 0:
         return 0.0
 
-    entropy_val = 0.0
-    for count in values.values():
-        p = count / total
-        entropy_val -= p * math.log2(p)
-
-    return entropy_val
+    # fsum is exact, so merged port maps give the same value whatever their order.
+    return -math.fsum((count / total) * math.log2(count / total) for count in values.values())
+
+
+def merge_aggregates(aggregates: list[dict]) -> dict:
+    merged = {
+        "flows": 0, "packets": 0, "bytes": 0,
+        "tcp_flags": dict.fromkeys(["syn", "fin", "rst", "ack", "psh", "urg", "xmas", "null"], 0),
+        "sizes": Counter(), "size_total": 0, "size_packets": 0, "size_min": math.inf, "size_max": 0,
+        "dst_ports": Counter(), "src_ports": Counter(),
+        "tcp": 0, "udp": 0, "icmp": 0, "ifaces": {}, "conns": {},
+    }
+    for agg in aggregates:
+        for k in ("flows", "packets", "bytes", "size_total", "size_packets", "tcp", "udp", "icmp"):
+            merged[k] += agg[k]
+        merged["size_min"] = min(merged["size_min"], agg["size_min"])
+        merged["size_max"] = max(merged["size_max"], agg["size_max"])
+        for k, v in agg["tcp_flags"].items():
+            merged["tcp_flags"][k] += v
+        merged["sizes"].update(agg["sizes"])
+        merged["dst_ports"].update(agg["dst_ports"])
+        merged["src_ports"].update(agg["src_ports"])
+        for k, v in agg.get("conns", {}).items():
+            merged["conns"][k] = merged["conns"].get(k, 0) + v
+        for name, (packets, nbytes) in agg.get("ifaces", {}).items():
+            counts = merged["ifaces"].setdefault(name, [0, 0])
+            counts[0] += packets
+            counts[1] += nbytes
+    return merged
@@ -0,0 +1,223 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+
+from .back.detector_profiles_manager import DetectorProfilesManager, PROFILES_DIR, LEGACY_PROFILES_FILE
+from .back.notification_service import notification_service
+from .back.control_socket import ControlServer, DEFAULT_SOCKET_PATH, send_command
+from .back.metrics import metrics_server
+
+
+class StreammlDaemon:
+    def __init__(
+        self,
+        profile_names: list[str] | None,
+        stats_interval: float = 60.0,
+        socket_path: str | None = DEFAULT_SOCKET_PATH,
+        metrics_port: int | None = None
+    ):
+        self.profile_names = profile_names
+        self.stats_interval = stats_interval
+        self.metrics_port = metrics_port
+
+        self.manager = DetectorProfilesManager(profiles_dir=PROFILES_DIR, legacy_profiles_file=LEGACY_PROFILES_FILE)
+        self.manager.on_message = self._log_message
+
+        self.control = ControlServer(socket_path, self.dispatch) if socket_path else None
+
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._reload_event = threading.Event()
+
+    def _log_message(self, msg: str, title: str, level: str):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{level}] {msg}", flush=True)
+
+    def _selected_profiles(self) -> list[str]:
+        if self.profile_names is None:
+            return [p.profile_name for p in self.manager.profiles]
+        return self.profile_names
+
+    def start_profiles(self):
+        with self._lock:
+            self.manager.turn_on_profiles(self._selected_profiles())
+
+    def stop_profiles(self):
+        with self._lock:
+            self.manager.turn_off_profiles()
+
+    def reload(self):
+        self._log_message("Reloading profiles.", "daemon", "information")
+        with self._lock:
+            self.stop_profiles()
+            self.manager.load_profiles()
+            self.start_profiles()
+
+    def print_stats(self):
+        with self._lock:
+            for p in self.manager.profiles:
+                if not p.is_active:
+                    continue
+                stats = p.get_runtime_stats()
+                self._log_message(
+                    f"{p.profile_name}: packets={stats['packets_sniffed']} dropped={stats['packets_dropped']} "
+                    f"duplicates={stats.get('packets_duplicate', 0)} "
+                    f"queue={stats['queue_size']} windows={stats['windows_processed']} "
+                    f"load={stats['load']['name'] if stats['load'] else '-'} "
+                    f"last_score={p.score_history.last if len(p.score_history) else '-'}",
+                    "stats",
+                    "information"
+                )
+
+    def dispatch(self, request: dict) -> dict:
+        cmd = request.get("cmd")
+        profile_name = request.get("profile")
+
+        with self._lock:
+            if cmd == "list":
+                return {"ok": True, "profiles": [
+                    {"name": p.profile_name, "active": p.is_active} for p in self.manager.profiles
+                ]}
+            if cmd == "stats":
+                profiles = self.manager.profiles
+                if profile_name:
+                    profiles = [p for p in profiles if p.profile_name == profile_name]
+                return {"ok": True, "stats": {
+                    p.profile_name: {**p.get_runtime_stats(), "scores": p.score_history.values()} for p in profiles
+                }, "notifications": notification_service.get_stats()}
+            if cmd == "start":
+                if profile_name is None:
+                    return {"ok": self.manager.turn_on_profiles()}
+                return {"ok": self.manager.turn_on_profile(profile_name, notify=False)}
+            if cmd == "stop":
+                if profile_name is None:
+                    return {"ok": self.manager.turn_off_profiles()}
+                return {"ok": self.manager.turn_off_profile(profile_name, notify=False)}
+            if cmd == "logs":
+                logs = self.manager.get_profile_logs(profile_name, notify=False)
+                return {"ok": logs is not None, "logs": logs or []}
+            if cmd == "profile":
+                ok = self.manager.start_profiler(
+                    profile_name,
+                    request.get("mode") or "sampling",
+                    float(request.get("duration") or 10.0)
+                )
+                p = self.manager.get_profile(profile_name)
+                return {"ok": ok, "profiler": p.profiler_status() if p else None}
+            if cmd == "profile-stop":
+                ok = self.manager.stop_profiler(profile_name)
+                p = self.manager.get_profile(profile_name)
+                return {"ok": ok, "profiler": p.profiler_status() if p else None}
+            if cmd == "set":
+                return {"ok": self.manager.reconfigure_profile(profile_name, request.get("changes") or {})}
+            if cmd == "reload":
+                self._reload_event.set()
+                return {"ok": True}
+
+        return {"ok": False, "error": f"Unknown command {cmd!r}."}
+
+    def _handle_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self._reload_event.set()
+        else:
+            self._stop_event.set()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGHUP, self._handle_signal)
+
+        if self.control:
+            self.control.start()
+        if self.metrics_port is not None:
+            metrics_server.start(self.metrics_port)
+            self._log_message(f"Metrics on http://127.0.0.1:{metrics_server.port}/metrics", "daemon", "information")
+        self.start_profiles()
+
+        next_stats = time.monotonic() + self.stats_interval
+        try:
+            while not self._stop_event.is_set():
+                if self._reload_event.is_set():
+                    self._reload_event.clear()
+                    self.reload()
+
+                timeout = next_stats - time.monotonic() if self.stats_interval > 0 else 1.0
+                self._stop_event.wait(max(0.0, min(timeout, 1.0)))
+
+                if self.stats_interval > 0 and time.monotonic() >= next_stats:
+                    self.print_stats()
+                    next_stats = time.monotonic() + self.stats_interval
+        finally:
+            self._log_message("Shutting down.", "daemon", "information")
+            if self.control:
+                self.control.stop()
+            metrics_server.stop()
+            with self._lock:
+                self.manager.shutdown()
+            notification_service.stop()
+
+
+def parse_settings(settings: list[str]) -> dict:
+    changes = {}
+    for setting in settings:
+        key, sep, value = setting.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got {setting!r}")
+        if key == "features":
+            changes[key] = [f.strip() for f in value.split(",") if f.strip()]
+            continue
+        try:
+            changes[key] = json.loads(value)
+        except ValueError:
+            changes[key] = value
+    return changes
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="streamml-daemon", description="Run streamml detector profiles without the TUI.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="control socket path")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="start profiles and run until SIGTERM")
+    run_parser.add_argument("profiles", nargs="*", help="profiles to start (default: all)")
+    run_parser.add_argument("--stats-interval", type=float, default=60.0, help="seconds between stats lines, 0 disables")
+    run_parser.add_argument("--no-socket", action="store_true", help="do not open the control socket")
+    run_parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT")
+
+    ctl_parser = subparsers.add_parser("ctl", help="send a command to a running daemon")
+    ctl_parser.add_argument("cmd", choices=["list", "stats", "start", "stop", "logs", "reload", "profile", "profile-stop", "set"])
+    ctl_parser.add_argument("profile", nargs="?")
+    ctl_parser.add_argument("settings", nargs="*", metavar="key=value", help="parameters for the set command, features as a comma list")
+    ctl_parser.add_argument("--mode", choices=["sampling", "cprofile"], default="sampling", help="profiler for the profile command")
+    ctl_parser.add_argument("--duration", type=float, default=10.0, help="profiling time in seconds")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ctl":
+        try:
+            changes = parse_settings(args.settings)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        try:
+            response = send_command(args.socket, args.cmd, profile=args.profile, mode=args.mode, duration=args.duration, changes=changes)
+        except OSError as e:
+            print(f"Cannot reach daemon at {args.socket}: {e}", file=sys.stderr)
+            return 1
+        print(json.dumps(response, indent=4, default=str))
+        return 0 if response.get("ok") else 1
+
+    profiles = getattr(args, "profiles", None) or None
+    stats_interval = getattr(args, "stats_interval", 60.0)
+    socket_path = None if getattr(args, "no_socket", False) else args.socket
+
+    metrics_port = getattr(args, "metrics_port", None)
+
+    StreammlDaemon(profiles, stats_interval=stats_interval, socket_path=socket_path, metrics_port=metrics_port).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
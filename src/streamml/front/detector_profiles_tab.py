@@ -4,7 +4,7 @@ from textual.widgets import Button, Label, Switch
 from textual.containers import Vertical, Horizontal, VerticalScroll
 
 from ..back.detector_profiles_manager import DetectorProfilesManager
-from .detector_profiles_tab_pushscreens import ConfirmDeletePushScreen, ShowLogsPushScreen, ShowProfilePushScreen, SetDetectorNotificationPushScreen
+from .detector_profiles_tab_pushscreens import ConfirmDeletePushScreen, ShowLogsPushScreen, ShowProfilePushScreen, SetDetectorNotificationPushScreen, BootstrapProfilePushScreen, ReconfigureProfilePushScreen
 
 class DetectorProfilesTab(Vertical):
     def __init__(self, manager: DetectorProfilesManager, *args, **kwargs):
@@ -14,6 +14,9 @@ class DetectorProfilesTab(Vertical):
         self.manager.on_message = self.on_manager_message
 
     def compose(self) -> ComposeResult:
+        with Horizontal(classes="profiles-toolbar"):
+            yield Button("Start all", id="start-all-button", classes="profile-action", variant="success")
+            yield Button("Stop all", id="stop-all-button", classes="profile-action", variant="warning")
         yield VerticalScroll(id="profiles-list")
 
     def on_mount(self) -> None:
@@ -33,6 +36,8 @@ class DetectorProfilesTab(Vertical):
                 Button("Show logs", id=f"show-logs-button-{profile.profile_name}", classes="profile-action", variant="primary"),
                 Button("Show Profile", id=f"show-profile-button-{profile.profile_name}", classes="profile-action", variant="default"),
                 Button("Notifications", id=f"set-notifications-button-{profile.profile_name}", classes="profile-action", variant="default"),
+                Button("Reconfigure", id=f"reconfigure-button-{profile.profile_name}", classes="profile-action", variant="default"),
+                Button("Bootstrap", id=f"bootstrap-button-{profile.profile_name}", classes="profile-action", variant="default"),
                 Button("Delete", id=f"delete-{profile.profile_name}", classes="profile-action button-delete", variant="error"),
                 classes="profile-row"
             )
@@ -60,12 +65,22 @@ class DetectorProfilesTab(Vertical):
         button_id = event.button.id
         if not button_id:
             return
+        elif button_id in ("start-all-button", "stop-all-button"):
+            start = button_id == "start-all-button"
+            self._set_bulk_busy(True)
+            self.run_worker(lambda: self._run_bulk(start), thread=True)
         elif button_id.startswith("show-profile-button-"):
             profile_name = button_id.removeprefix("show-profile-button-")
             self.app.push_screen(ShowProfilePushScreen(self.manager, profile_name))
         elif button_id.startswith("set-notifications-button-"):
             profile_name = button_id.removeprefix("set-notifications-button-")
             self.app.push_screen(SetDetectorNotificationPushScreen(self.manager, profile_name))
+        elif button_id.startswith("reconfigure-button-"):
+            profile_name = button_id.removeprefix("reconfigure-button-")
+            self.app.push_screen(ReconfigureProfilePushScreen(self.manager, profile_name))
+        elif button_id.startswith("bootstrap-button-"):
+            profile_name = button_id.removeprefix("bootstrap-button-")
+            self.app.push_screen(BootstrapProfilePushScreen(self.manager, profile_name))
         elif button_id.startswith("show-logs-button-"):
             profile_name = button_id.removeprefix("show-logs-button-")
             self.app.push_screen(ShowLogsPushScreen(self.manager, profile_name))
@@ -73,5 +88,18 @@ class DetectorProfilesTab(Vertical):
             profile_name = button_id.removeprefix("delete-")
             self.app.push_screen(ConfirmDeletePushScreen(self.manager, profile_name))
 
+    def _run_bulk(self, start: bool):
+        # Runs in a worker thread; profiles start and stop in parallel inside the manager.
+        if start:
+            self.manager.turn_on_profiles()
+        else:
+            self.manager.turn_off_profiles()
+        self.app.call_from_thread(self.refresh_profiles)
+        self.app.call_from_thread(self._set_bulk_busy, False)
+
+    def _set_bulk_busy(self, busy: bool):
+        for button_id in ("#start-all-button", "#stop-all-button"):
+            self.query_one(button_id, Button).disabled = busy
+
     def on_manager_message(self, msg: str, title: str, severity):
         self.app.notify(message=msg, title=title, severity=severity)
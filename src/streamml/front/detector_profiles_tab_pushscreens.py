@@ -1,39 +1,81 @@
 from textual import on
 from textual.app import ComposeResult
+from textual.message import Message
 from textual.screen import ModalScreen
-from textual.widgets import Button, Label, Pretty, DataTable, Switch
+from textual.widgets import Button, Label, Pretty, DataTable, Switch, Input, Checkbox
 from textual.containers import Vertical, Horizontal, VerticalScroll, Container
-from textual_plotext import PlotextPlot
 
+import time
 from datetime import datetime
 
 from ..back.detector_profiles_manager import DetectorProfilesManager
+from ..back.capture_pipeline import interface_list
 from ..back.detector_profile_HST import DetectorProfileHST
+from ..back.window import FEATURE_LIST, OPTIONAL_FEATURES
+
+MAX_REDRAWS_PER_SEC = 4
+STATS_REFRESH_INTERVAL = 2.0
+
 
 class PlotTab(Container):
+    class WindowScored(Message):
+        pass
+
     def __init__(self, profile: DetectorProfileHST, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.profile = profile
         self.classes = "plot-card" 
+        self._redraw_pending = False
+        self._drawn_version = None
+        self._last_draw = 0.0
 
     def compose(self):
+        from textual_plotext import PlotextPlot
         yield PlotextPlot()
 
     def on_mount(self):
-        self.set_interval(1, self.update_plot)
+        self.profile.add_score_listener(self._on_window_scored)
+        self.update_plot()
+
+    def on_unmount(self):
+        self.profile.remove_score_listener(self._on_window_scored)
+
+    def _on_window_scored(self, profile, score: float):
+        # Called on the scoring thread; post_message is thread-safe and one pending redraw is enough.
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.post_message(self.WindowScored())
+
+    def on_plot_tab_window_scored(self, message: WindowScored):
+        delay = self._last_draw + 1 / MAX_REDRAWS_PER_SEC - time.monotonic()
+        if delay > 0:
+            self.set_timer(delay, self.update_plot)
+        else:
+            self.update_plot()
 
     def update_plot(self):
+        self._redraw_pending = False
+        history = self.profile.score_history
+        if history.version == self._drawn_version:
+            return
+        self._drawn_version = history.version
+        self._last_draw = time.monotonic()
+
+        from textual_plotext import PlotextPlot
         plot_widget = self.query_one(PlotextPlot)
         plt = plot_widget.plt
         
-        y = list(getattr(self.profile, "plot_data", []))
+        y = history.display()
 
         plt.clear_figure()
         plt.theme("dark") 
         
         plt.plot(y, marker="dot", color="green")
         plt.title("Anomaly Score")
-        plt.ylabel("last 30 windows")
+        if history.bucket_width > 1:
+            plt.ylabel(f"last {len(history)} windows, max of {history.bucket_width}")
+        else:
+            plt.ylabel(f"last {len(history)} windows")
         plt.ylim(0, 1)
         
         threshold = self.profile.params.get("threshold", 0.7)
@@ -69,21 +111,51 @@ class ShowProfilePushScreen(ModalScreen[str]):
                     with VerticalScroll(classes="info-box"):
                         yield Pretty(self.profile.to_dict())
                     
+                    yield Label("Profiler (processor thread)", classes="section-header")
+                    yield Input(placeholder="Seconds (def: 10)", id="input-profiler-duration", classes="input")
+
                     with Container(classes="modal-footer"):
+                        yield Button("Sample", id="profiler-sampling-button", variant="success")
+                        yield Button("cProfile", id="profiler-cprofile-button", variant="success")
+                        yield Button("Stop profiler", id="profiler-stop-button", variant="warning")
                         yield Button("Close", id="cancel-button", variant="primary")
 
     def on_mount(self):
-        self.set_interval(1.0, self.update_stats)
+        # Scored windows refresh the stats right away; the interval only keeps packet counters moving.
+        self._shown_stats = None
+        self.set_interval(STATS_REFRESH_INTERVAL, self.update_stats)
         self.update_stats() 
 
+    def on_plot_tab_window_scored(self, message: PlotTab.WindowScored):
+        self.update_stats()
+
     def update_stats(self):
         if self.profile:
             stats = self.profile.get_runtime_stats()
-            self.query_one("#runtime-stats-pretty", Pretty).update(stats)
+            if stats != self._shown_stats:
+                self._shown_stats = stats
+                self.query_one("#runtime-stats-pretty", Pretty).update(stats)
+
+    def _start_profiler(self, mode: str):
+        duration_value = self.query_one("#input-profiler-duration", Input).value.strip()
+        try:
+            duration = float(duration_value) if duration_value else 10.0
+        except ValueError:
+            self.app.notify("Seconds must be a number.", title="Validation error", severity="error")
+            return
+        self.manager.start_profiler(self.profile_name, mode, duration)
+        self.update_stats()
 
     @on(Button.Pressed)
     async def on_button_pressed(self, event: Button.Pressed):
-        self.dismiss(None)
+        if event.button.id == "profiler-sampling-button":
+            self._start_profiler("sampling")
+        elif event.button.id == "profiler-cprofile-button":
+            self._start_profiler("cprofile")
+        elif event.button.id == "profiler-stop-button":
+            self.manager.stop_profiler(self.profile_name)
+        else:
+            self.dismiss(None)
 
 
 class ShowLogsPushScreen(ModalScreen[str]):
@@ -106,7 +178,7 @@ class ShowLogsPushScreen(ModalScreen[str]):
 
     def on_mount(self):
         table = self.query_one("#logs_table", DataTable)
-        table.add_columns("Timestamp", "Score", "Packets Rate", "Protocol Info", "Verdict")
+        table.add_columns("Timestamp", "Score", "Packets Rate", "Protocol Info", "Load", "Verdict")
         
         logs = self.manager.get_profile_logs(self.profile_name)
         
@@ -121,9 +193,10 @@ class ShowLogsPushScreen(ModalScreen[str]):
             score = f"{log.get('score', 0):.4f}"
             rate = f"{log.get('pkt_rate', 0):.1f}"
             proto = str(log.get("proto_info", "-"))
+            load = str(log.get("load_level", "normal"))
             verdict = "ANOMALY" 
             
-            table.add_row(dt, score, rate, proto, verdict)
+            table.add_row(dt, score, rate, proto, load, verdict)
 
     @on(Button.Pressed)
     async def on_button_pressed(self, event: Button.Pressed) -> None:
@@ -158,13 +231,149 @@ class SetDetectorNotificationPushScreen(ModalScreen[str]):
     @on(Switch.Changed)
     def on_switch_changed(self, event: Switch.Changed):
         if event.switch.id == "switch-anomaly":
-            self.profile.notify_enabled = event.value
-            self.manager.try_save_profiles(notify=False)
+            self.manager.update_profile(self.profile_name, "notify_enabled", event.value, notify=False)
 
     @on(Button.Pressed)
     async def on_button_pressed(self, event: Button.Pressed):
         self.dismiss(None)
 
+class ReconfigureProfilePushScreen(ModalScreen[str]):
+    # Applied to the running profile without restarting it where possible.
+    FIELDS = {
+        "threshold": float,
+        "window_duration": float,
+        "checkpoint_interval": float,
+        "snaplen": int,
+        "dedup_ms": float,
+    }
+
+    def __init__(self, manager: DetectorProfilesManager, profile_name: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manager = manager
+        self.profile_name = profile_name
+        self.profile = self.manager.get_profile(profile_name)
+
+    def compose(self) -> ComposeResult:
+        p = self.profile
+        interfaces = ", ".join(i for i in interface_list(p.interface) if i)
+
+        with Container(classes="modal-window"):
+            yield Label(f"Reconfigure: {self.profile_name}", classes="modal-header")
+
+            with VerticalScroll(classes="section-card"):
+                yield Label("Interfaces (comma-separated, merged in time order):")
+                yield Input(value=interfaces, id="reconf-interface", classes="input")
+                yield Label("BPF filter:")
+                yield Input(value=p.bpf_filter, id="reconf-bpf_filter", classes="input")
+                for key in self.FIELDS:
+                    yield Label(f"{key.replace('_', ' ').capitalize()}:")
+                    yield Input(value=f"{getattr(p, key):g}", id=f"reconf-{key}", classes="input")
+                yield Label("Features (new ones are used after retraining):")
+                for feat in FEATURE_LIST + OPTIONAL_FEATURES:
+                    yield Checkbox(feat, value=feat in p.features, id=f"reconf-feature-{feat}", classes="input")
+
+            with Horizontal(classes="modal-footer"):
+                yield Button("Apply", id="apply-button", variant="success")
+                yield Button("Close", id="close-button", variant="primary")
+
+    def get_changes(self) -> dict:
+        p = self.profile
+        changes = {}
+
+        interfaces = interface_list(self.query_one("#reconf-interface", Input).value)
+        if interfaces != [None] and interfaces != interface_list(p.interface):
+            changes["interface"] = interfaces[0] if len(interfaces) == 1 else interfaces
+        bpf_filter = self.query_one("#reconf-bpf_filter", Input).value.strip()
+        if bpf_filter != p.bpf_filter:
+            changes["bpf_filter"] = bpf_filter
+
+        for key, cast in self.FIELDS.items():
+            try:
+                value = cast(self.query_one(f"#reconf-{key}", Input).value.strip())
+            except ValueError:
+                raise ValueError(f"Param '{key}' must be a number.")
+            if value != getattr(p, key):
+                changes[key] = value
+
+        features = [f for f in FEATURE_LIST + OPTIONAL_FEATURES if self.query_one(f"#reconf-feature-{f}", Checkbox).value]
+        if not features:
+            raise ValueError("Select at least one feature.")
+        if set(features) != set(p.features):
+            changes["features"] = features
+        return changes
+
+    @on(Button.Pressed)
+    async def on_button_pressed(self, event: Button.Pressed):
+        if event.button.id != "apply-button":
+            self.dismiss(None)
+            return
+
+        try:
+            changes = self.get_changes()
+        except ValueError as e:
+            self.app.notify(str(e), title="Validation error", severity="error")
+            return
+        if not changes:
+            self.dismiss(None)
+            return
+        if self.manager.reconfigure_profile(self.profile_name, changes):
+            self.dismiss(None)
+
+class BootstrapProfilePushScreen(ModalScreen[str]):
+    def __init__(self, manager: DetectorProfilesManager, profile_name: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manager = manager
+        self.profile_name = profile_name
+
+    def compose(self) -> ComposeResult:
+        with Container(classes="modal-window small-modal"):
+            yield Label(f"Bootstrap: {self.profile_name}", classes="modal-header")
+
+            with Vertical(classes="section-card"):
+                yield Label("Baseline captures (comma separated):")
+                yield Input(placeholder="/path/baseline1.pcap, /path/baseline2.pcap", id="input-pcap-paths", classes="input")
+                yield Input(placeholder="Workers (int, def: CPU count)", id="input-workers", classes="input")
+                yield Label("", id="bootstrap-status")
+
+            with Horizontal(classes="modal-footer"):
+                yield Button("Train", id="train-button", variant="success")
+                yield Button("Close", id="close-button", variant="primary")
+
+    def _set_status(self, text: str):
+        self.query_one("#bootstrap-status", Label).update(text)
+
+    def _run_bootstrap(self, pcap_paths: list[str], workers: int | None):
+        def progress(done: int, total: int):
+            self.app.call_from_thread(self._set_status, f"Extracting features: {done}/{total} chunks")
+
+        ok = self.manager.bootstrap_profile(self.profile_name, pcap_paths, workers=workers, progress=progress)
+        self.app.call_from_thread(self._set_status, "Done." if ok else "Failed.")
+        self.app.call_from_thread(self._set_busy, False)
+
+    def _set_busy(self, busy: bool):
+        self.query_one("#train-button", Button).disabled = busy
+
+    @on(Button.Pressed)
+    async def on_button_pressed(self, event: Button.Pressed):
+        if event.button.id != "train-button":
+            self.dismiss(None)
+            return
+
+        paths_value = self.query_one("#input-pcap-paths", Input).value
+        pcap_paths = [path.strip() for path in paths_value.split(",") if path.strip()]
+
+        workers_value = self.query_one("#input-workers", Input).value.strip()
+        try:
+            workers = int(workers_value) if workers_value else None
+        except ValueError:
+            self.app.notify("Workers must be a number.", title="Validation error", severity="error")
+            return
+
+        self._set_busy(True)
+        self._set_status("Reading captures...")
+        self.run_worker(lambda: self._run_bootstrap(pcap_paths, workers), thread=True, exclusive=True)
+
+
 class ConfirmDeletePushScreen(ModalScreen[str]):
     def __init__(self, manager: DetectorProfilesManager, profile_name:str, *args, **kwargs):
         super().__init__(*args, **kwargs)
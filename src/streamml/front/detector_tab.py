@@ -6,7 +6,8 @@ from textual.containers import Container, Horizontal, VerticalScroll
 import psutil
 
 from ..back.detector_profiles_manager import DetectorProfilesManager
-from ..back.window import FEATURE_LIST
+from ..back.window import FEATURE_LIST, OPTIONAL_FEATURES
+from ..back.engines import ENGINES
 from ..front.detector_tab_pushscreens import SaveProfilePushScreen
 
 class DetectorTab(Container):
@@ -19,7 +20,7 @@ class DetectorTab(Container):
         with Horizontal(id="top-config-container"):
             
             model_section = Container(id="model-section", classes="section-card")
-            model_section.border_title = "Algorithm: HalfSpaceTrees"
+            model_section.border_title = "Detector engine"
             with model_section:
                 with VerticalScroll(classes="detector-scroll"):
                     yield Label("Select interface:", classes="label")
@@ -34,15 +35,48 @@ class DetectorTab(Container):
                         allow_blank=False,
                         classes="input"
                     )
+                    yield Input(placeholder="More interfaces, merged in time order (e.g. 'eth1,wlan0')", id="param-extra_interfaces", classes="input")
                     
                     yield Label("Model params:", classes="label")
-                    yield Input(placeholder="Trees number (int, def: 10)", id="param-trees", classes="input")
-                    yield Input(placeholder="Height (int, def: 8)", id="param-height", classes="input")
+                    yield Select(
+                        [(label, name) for name, label in ENGINES.items()],
+                        id="engine-select",
+                        allow_blank=False,
+                        classes="input"
+                    )
+                    yield Input(placeholder="HST trees number (int, def: 10)", id="param-trees", classes="input")
+                    yield Input(placeholder="HST height (int, def: 8)", id="param-height", classes="input")
                     yield Input(placeholder="Window size (int, def: 250)", id="param-window", classes="input")
                     yield Input(placeholder="Seed (int, def: 42)", id="param-seed", classes="input")
+                    yield Input(placeholder="LODA projections (int, def: 50)", id="param-projections", classes="input")
+                    yield Input(placeholder="LODA histogram bins (int, def: 20)", id="param-bins", classes="input")
                     yield Input(placeholder="Window duration (def: 10 sec )", id="param-window_duration", classes="input")
                     yield Input(placeholder="Threshold (0.0 - 1.0, def: 0.7)", id="param-threshold", classes="input")
                     yield Input(placeholder="Queue size (int, def: 10000)", id="param-queue_size", classes="input")
+                    yield Input(placeholder="Checkpoint interval (sec, 0 = off, def: 300)", id="param-checkpoint_interval", classes="input")
+                    yield Input(placeholder="Checkpoints kept (int, def: 3)", id="param-checkpoint_keep", classes="input")
+                    yield Input(placeholder="Score history (windows, def: 3600)", id="param-history_size", classes="input")
+                    yield Input(placeholder="Extraction shards (processes, 0 = off, def: 0)", id="param-shards", classes="input")
+                    yield Input(placeholder="Snaplen (bytes, 0 = full frames, 128 = headers only, def: 0)", id="param-snaplen", classes="input")
+                    yield Input(placeholder="Mirror-port dedup horizon (ms, 0 = off, def: 0)", id="param-dedup_ms", classes="input")
+
+                    yield Label("Export every window's features:", classes="label")
+                    yield Select(
+                        [("Off", ""), ("Parquet", "parquet"), ("Arrow IPC", "arrow"), ("CSV", "csv")],
+                        id="export-select",
+                        allow_blank=False,
+                        classes="input"
+                    )
+                    yield Input(placeholder="Export file rotation size (MB, def: 64)", id="param-export_rotate_mb", classes="input")
+                    yield Input(placeholder="Export file rotation time (min, def: 60)", id="param-export_rotate_minutes", classes="input")
+
+                    yield Label("Run as:", classes="label")
+                    yield Select(
+                        [("Thread in this process", "thread"), ("Separate worker process", "process")],
+                        id="execution-select",
+                        allow_blank=False,
+                        classes="input"
+                    )
 
             features_section = Container(id="features-section", classes="section-card")
             features_section.border_title = "Flow-based Features"
@@ -54,6 +88,11 @@ class DetectorTab(Container):
                         cb = Checkbox(feat, value=True, classes="input")
                         self.feature_checkboxes[feat] = cb
                         yield cb
+                    yield Label("Optional (per-interface packet and byte counts):", classes="label")
+                    for feat in OPTIONAL_FEATURES:
+                        cb = Checkbox(feat, value=False, classes="input")
+                        self.feature_checkboxes[feat] = cb
+                        yield cb
 
         bpf_section = Container(id="bpf-section", classes="section-card")
         bpf_section.border_title = "BPF Filter (Optional)"
@@ -78,9 +117,15 @@ class DetectorTab(Container):
             interface = self.query_one("#interface-select", Select).value
             if not interface:
                 raise ValueError("Select interface.")
-            params["interface"] = interface
         except Exception:
             raise ValueError("Interface selection error.")
+        extra = self.query_one("#param-extra_interfaces", Input).value
+        interfaces = list(dict.fromkeys([interface] + [i.strip() for i in extra.split(",") if i.strip()]))
+        params["interface"] = interfaces[0] if len(interfaces) == 1 else interfaces
+
+        params["engine"] = self.query_one("#engine-select", Select).value
+        params["execution"] = self.query_one("#execution-select", Select).value
+        params["feature_export"] = self.query_one("#export-select", Select).value
 
         bpf_input = self.query_one("#param-bpf_filter", Input)
         if bpf_input.value.strip():
@@ -91,9 +136,19 @@ class DetectorTab(Container):
             "height": 8,
             "window": 250,
             "seed": 42,
+            "projections": 50,
+            "bins": 20,
             "threshold": 0.7,
             "window_duration": 10.0,
             "queue_size": 10000,
+            "checkpoint_interval": 300.0,
+            "checkpoint_keep": 3,
+            "shards": 0,
+            "snaplen": 0,
+            "dedup_ms": 0.0,
+            "history_size": 3600,
+            "export_rotate_mb": 64.0,
+            "export_rotate_minutes": 60.0,
             "bpf_filter": ""
         }
 
@@ -111,9 +166,9 @@ class DetectorTab(Container):
                     continue
 
                 try:
-                    if key in ["trees", "height", "window", "seed","queue_size"]:
+                    if key in ["trees", "height", "window", "seed", "projections", "bins", "queue_size", "checkpoint_keep", "shards", "snaplen", "history_size"]:
                         params[key] = int(val_str)
-                    elif key in ["threshold", "window_duration"]:
+                    elif key in ["threshold", "window_duration", "checkpoint_interval", "export_rotate_mb", "export_rotate_minutes", "dedup_ms"]:
                         params[key] = float(val_str)
                 except ValueError:
                     raise ValueError(f"Param '{key}' must be a number.")
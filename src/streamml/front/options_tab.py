@@ -1,9 +1,10 @@
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal
-from textual.widgets import Button, Input, Label
+from textual.widgets import Button, Input, Label, Pretty
 from textual import on
 
 from ..back.notification_service import notification_service
+from ..back.metrics import metrics_server
 
 class OptionsTab(Container):
     def __init__(self, detector_manager, *args, **kwargs):
@@ -21,8 +22,29 @@ class OptionsTab(Container):
                 yield Button("Save config", id="save-config", variant="success")
                 yield Button("notification test", id="test-notif", variant="primary")
 
+        metrics_section = Container(id="metrics-section", classes="section-card")
+        metrics_section.border_title = "Prometheus metrics (localhost)"
+        with metrics_section:
+            yield Label("Port:")
+            yield Input(placeholder="9464", id="input-metrics-port")
+            yield Label("Metrics endpoint disabled.", id="metrics-status")
+
+            with Horizontal(classes="modal-footer"):
+                yield Button("Start", id="start-metrics", variant="success")
+                yield Button("Stop", id="stop-metrics", variant="warning")
+
+        stats_section = Container(id="notify-stats-section", classes="section-card")
+        stats_section.border_title = "Notification delivery"
+        with stats_section:
+            yield Pretty({}, id="notify-stats-pretty")
+
     def on_mount(self):
         self.query_one("#input-webhook-url", Input).value = notification_service.webhook_url
+        self.set_interval(1.0, self.update_stats)
+        self.update_stats()
+
+    def update_stats(self):
+        self.query_one("#notify-stats-pretty", Pretty).update(notification_service.get_stats())
 
     @on(Button.Pressed, "#save-config")
     def save_configuration(self):
@@ -33,9 +55,32 @@ class OptionsTab(Container):
         else:
             self.app.notify("Error during saving", severity="error")
 
+    def _update_metrics_status(self):
+        status = self.query_one("#metrics-status", Label)
+        if metrics_server.is_running:
+            status.update(f"Serving http://127.0.0.1:{metrics_server.port}/metrics")
+        else:
+            status.update("Metrics endpoint disabled.")
+
+    @on(Button.Pressed, "#start-metrics")
+    def start_metrics(self):
+        value = self.query_one("#input-metrics-port", Input).value.strip() or "9464"
+        try:
+            metrics_server.start(int(value))
+        except ValueError:
+            self.app.notify("Port must be a number.", severity="error")
+        except OSError as e:
+            self.app.notify(f"Cannot start metrics endpoint: {e}", severity="error")
+        self._update_metrics_status()
+
+    @on(Button.Pressed, "#stop-metrics")
+    def stop_metrics(self):
+        metrics_server.stop()
+        self._update_metrics_status()
+
     @on(Button.Pressed, "#test-notif")
     def test_notification(self):
-        success = notification_service.send_message("**Test NetMonitor**\n")
+        success = notification_service.send_message_now("**Test NetMonitor**\n")
         
         if success:
             self.app.notify("good", severity="information")
@@ -0,0 +1,11 @@
+import pytest
+
+from streamml.back import detector_profile_HST
+
+
+@pytest.fixture
+def profile_logs(tmp_path, monkeypatch):
+    # Profiles open their TinyDB log under LOGS_PATH; keep it out of the user's data directory.
+    logs = tmp_path / "logs"
+    monkeypatch.setattr(detector_profile_HST, "LOGS_PATH", str(logs))
+    return logs
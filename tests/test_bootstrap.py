@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from scapy.all import Ether, IP, TCP, UDP, wrpcap
+
+from streamml.back import bootstrap
+from streamml.back.bootstrap import extract_windows, scan_capture
+from streamml.back.detector_profiles_manager import DetectorProfilesManager
+from streamml.back.window import CONN_FEATURES, FEATURE_LIST
+
+START = 1000.0
+WINDOW = 2.0
+# A connection split between two pieces is counted in both, so connection features are left out.
+FEATURES = [f for f in FEATURE_LIST if f not in CONN_FEATURES]
+
+
+def make_packets(n: int = 1200, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    packets = []
+    t = START
+    for _ in range(n):
+        t += rng.random() * 0.02
+        if rng.random() < 0.7:
+            l4 = TCP(sport=rng.randint(1024, 1100), dport=rng.choice([22, 80, 443]), flags="S")
+        else:
+            l4 = UDP(sport=rng.randint(1024, 1100), dport=53) / (b"q" * rng.randrange(10, 60))
+        pkt = Ether() / IP(src=f"10.0.0.{rng.randint(1, 20)}", dst="10.0.1.1") / l4
+        pkt.time = t
+        packets.append(pkt)
+    return packets
+
+
+@pytest.fixture(scope="module")
+def captures(tmp_path_factory):
+    d = tmp_path_factory.mktemp("pcaps")
+    packets = make_packets()
+    shuffled = packets[:]
+    random.Random(2).shuffle(shuffled)
+    wrpcap(str(d / "sorted.pcap"), packets)
+    wrpcap(str(d / "shuffled.pcap"), shuffled)
+    return str(d / "sorted.pcap"), str(d / "shuffled.pcap"), packets
+
+
+def test_scan_finds_the_real_time_range(captures, monkeypatch):
+    sorted_path, shuffled_path, packets = captures
+    monkeypatch.setattr(bootstrap, "MARK_EVERY", 100)
+    first, last = float(packets[0].time), float(packets[-1].time)
+
+    for path in (sorted_path, shuffled_path):
+        t0, t1, pieces = scan_capture(path, 4)
+        assert t0 == pytest.approx(first, abs=1e-6)
+        assert t1 == pytest.approx(last, abs=1e-6)
+        assert len(pieces) == 4
+        assert pieces[0][0] == 24 and pieces[-1][1] is None
+        assert all(a[1] == b[0] for a, b in zip(pieces, pieces[1:]))
+
+
+def test_split_and_shuffled_captures_give_the_same_windows(captures, monkeypatch):
+    sorted_path, shuffled_path, _ = captures
+    expected = extract_windows([sorted_path], WINDOW, FEATURES, workers=1)
+    assert len(expected) > 5
+
+    monkeypatch.setattr(bootstrap, "MARK_EVERY", 100)
+    assert extract_windows([sorted_path], WINDOW, FEATURES, workers=3) == expected
+    assert extract_windows([shuffled_path], WINDOW, FEATURES, workers=3) == expected
+
+
+def test_bootstrap_leaves_the_live_sample_alone(captures, tmp_path, profile_logs):
+    sorted_path, _, _ = captures
+    m = DetectorProfilesManager(str(tmp_path / "profiles"))
+    try:
+        config = {"features": ["total_packets", "total_bytes"], "params": {"interface": "lo", "trees": 3, "height": 3, "window": WINDOW}}
+        m.add_profile("web", config, notify=False)
+        p = m.get_profile("web")
+        live = p.make_sample({"total_packets": 7, "total_bytes": 700})
+
+        assert m.bootstrap_profile("web", [sorted_path], workers=1, notify=False)
+        assert p._last_sample is live
+        assert live == {"total_packets": 7.0, "total_bytes": 700.0}
+        assert p.model_updates > 0
+    finally:
+        m.checkpointer.stop()
@@ -0,0 +1,110 @@
+from streamml.back.conn_tracker import ACK, FIN, RST, SYN, ConnectionTracker, conn_key
+
+CLIENT = ("10.0.0.1", 40000)
+SERVER = ("10.0.0.2", 443)
+
+
+def key(i: int = 0) -> tuple:
+    return conn_key(CLIENT[0], SERVER[0], 6, CLIENT[1] + i, SERVER[1])
+
+
+def test_both_directions_share_a_key():
+    assert conn_key("10.0.0.1", "10.0.0.2", 6, 40000, 443) == conn_key("10.0.0.2", "10.0.0.1", 6, 443, 40000)
+
+
+def test_handshake_data_and_close():
+    t = ConnectionTracker()
+    t.packet(key(), 100.0, SYN)
+    assert t.snapshot()["half_open"] == 1 and t.snapshot()["active"] == 1
+
+    t.packet(key(), 100.01, SYN | ACK)
+    assert t.half_open == 1
+    t.packet(key(), 100.02, ACK)
+    assert t.half_open == 0 and t.active == 1
+
+    t.packet(key(), 101.5, ACK)
+    t.packet(key(), 102.0, FIN | ACK)
+    snap = t.snapshot()
+    assert snap["new"] == 1
+    assert snap["active"] == 0
+    assert snap["ended"] == 1
+    assert snap["duration_us"] == 2_000_000
+
+
+def test_closed_connection_drains_on_the_next_tick():
+    t = ConnectionTracker()
+    t.packet(key(), 100.0, SYN)
+    t.packet(key(), 100.1, ACK)
+    t.packet(key(), 100.3, FIN | ACK)
+    # The last ACK of the close belongs to the closed connection, not to a new one.
+    t.packet(key(), 100.31, ACK)
+    assert t.new == 1 and len(t.entries) == 1
+
+    t.advance(101.0)
+    t.advance(102.0)
+    assert t.entries == {}
+    assert t.active == 0
+
+
+def test_short_connections_do_not_fill_the_table():
+    t = ConnectionTracker(max_connections=200)
+    now = 0.0
+    for i in range(2000):
+        now = i * 0.02
+        t.packet(key(i), now, SYN)
+        t.packet(key(i), now + 0.001, ACK)
+        t.packet(key(i), now + 0.002, RST)
+    assert t.overflow == 0
+    assert len(t.entries) <= 150
+
+
+def test_reused_tuple_is_a_new_connection():
+    t = ConnectionTracker()
+    t.packet(key(), 10.0, SYN)
+    t.packet(key(), 10.1, RST)
+    t.packet(key(), 10.2, SYN)
+    assert t.new == 2
+    assert t.half_open == 1 and t.active == 1
+
+
+def test_half_open_expires_without_ending_a_connection():
+    t = ConnectionTracker(half_open_timeout=10.0)
+    t.packet(key(), 0.0, SYN)
+    t.advance(11.0)
+    assert t.entries == {}
+    assert t.half_open == 0 and t.active == 0 and t.ended == 0
+
+
+def test_idle_expiry_across_a_gap_longer_than_the_wheel():
+    t = ConnectionTracker(idle_timeout=60.0)
+    for i in range(5):
+        t.packet(key(i), 1.0, ACK)
+        t.packet(conn_key("10.0.1.1", "10.0.1.2", 17, 5000 + i, 53), 1.0)
+    t.packet(key(0), 30.0, ACK)
+    assert len(t.entries) == 10
+
+    t.advance(1000.0)
+    assert t.entries == {}
+    assert t.active == 0
+    assert t.ended == 10
+    # Nine connections saw one packet; the one at 30.0 lived 29 s.
+    assert t.duration_us == 29_000_000
+
+
+def test_overflow_is_counted_but_not_tracked():
+    t = ConnectionTracker(max_connections=10)
+    for i in range(15):
+        t.packet(key(i), 1.0, SYN)
+    assert len(t.entries) == 10
+    assert t.overflow == 5
+    assert t.new == 15
+    assert t.half_open == 10
+
+
+def test_weighted_connections():
+    t = ConnectionTracker()
+    t.packet(key(0), 1.0, SYN, weight=4)
+    t.packet(key(0), 1.1, ACK, weight=1)
+    t.packet(key(1), 1.2, SYN, weight=2)
+    assert t.new == 6
+    assert t.active == 6 and t.half_open == 2
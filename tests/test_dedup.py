@@ -0,0 +1,69 @@
+from scapy.all import Dot1Q, Ether, IP, IPv6, TCP, UDP
+
+from streamml.back.dedup import FrameDeduplicator, frame_digest
+
+
+def tcp_frame(payload: bytes = b"data", ip_id: int = 1, seq: int = 1000, **ip_fields) -> bytes:
+    return bytes(Ether(src="02:00:00:00:00:01", dst="02:00:00:00:00:02")
+                 / IP(src="10.0.0.1", dst="10.0.0.2", id=ip_id, **ip_fields)
+                 / TCP(sport=40000, dport=80, seq=seq) / payload)
+
+
+def test_mirror_copies_hash_the_same():
+    original = tcp_frame(ttl=64)
+    # What a router or a mirror port may change between the ingress and egress copy.
+    other_ttl = tcp_frame(ttl=63)
+    other_macs = bytes(Ether(src="02:aa:aa:aa:aa:aa", dst="02:bb:bb:bb:bb:bb") / Ether(original).payload)
+    # The IPv4 header checksum sits at bytes 24-25 of an untagged frame.
+    bad_checksum = original[:24] + b"\x00\x00" + original[26:]
+    tagged = bytes(Ether(src="02:00:00:00:00:01", dst="02:00:00:00:00:02") / Dot1Q(vlan=10) / Ether(original).payload)
+
+    digest = frame_digest(original)
+    assert frame_digest(other_ttl) == digest
+    assert frame_digest(other_macs) == digest
+    assert frame_digest(bad_checksum) == digest
+    assert frame_digest(tagged) == digest
+
+
+def test_different_packets_hash_differently():
+    digests = {
+        frame_digest(tcp_frame()),
+        frame_digest(tcp_frame(ip_id=2)),
+        frame_digest(tcp_frame(seq=2000)),
+        frame_digest(tcp_frame(payload=b"other")),
+        frame_digest(bytes(Ether() / IP(src="10.0.0.1", dst="10.0.0.3") / UDP())),
+        frame_digest(bytes(Ether() / IPv6(src="fe80::1", dst="fe80::2") / UDP())),
+    }
+    assert len(digests) == 6
+
+
+def test_ipv6_hop_limit_is_ignored():
+    a = bytes(Ether() / IPv6(src="fe80::1", dst="fe80::2", hlim=64) / UDP() / b"x")
+    b = bytes(Ether() / IPv6(src="fe80::1", dst="fe80::2", hlim=10) / UDP() / b"x")
+    assert frame_digest(a) == frame_digest(b)
+
+
+def test_second_copy_is_dropped_and_distinct_frames_kept():
+    dedup = FrameDeduplicator(horizon=0.005)
+    assert not dedup.is_duplicate(tcp_frame(ttl=64), 10.000)
+    assert dedup.is_duplicate(tcp_frame(ttl=63), 10.001)
+    assert not dedup.is_duplicate(tcp_frame(seq=2000), 10.002)
+    assert not dedup.is_duplicate(tcp_frame(ip_id=2), 10.003)
+    assert dedup.duplicates == 1
+
+
+def test_copy_outside_the_horizon_is_kept():
+    dedup = FrameDeduplicator(horizon=0.005)
+    assert not dedup.is_duplicate(tcp_frame(), 10.0)
+    assert not dedup.is_duplicate(tcp_frame(), 10.011)
+
+
+def test_rotation_bounds_the_sets():
+    dedup = FrameDeduplicator(horizon=10.0, max_entries=100)
+    for i in range(1000):
+        assert not dedup.is_duplicate(tcp_frame(seq=i), 1.0)
+    assert len(dedup.current) <= 100
+    assert len(dedup.previous) <= 100
+    assert dedup.early_rotations >= 9
+    # The latest frames are still remembered.
+    assert dedup.is_duplicate(tcp_frame(seq=999), 1.0)
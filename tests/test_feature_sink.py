@@ -0,0 +1,25 @@
+import pytest
+
+from streamml.back.feature_sink import FeatureSink
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def write_windows(tmp_path, n_windows: int, batch_rows: int) -> str:
+    sink = FeatureSink(str(tmp_path), "test", export_format="parquet", batch_rows=batch_rows)
+    sink.start()
+    for i in range(n_windows):
+        sink.append(0.5, {"total_packets": i, "total_bytes": 100 * i}, ts=float(i))
+    sink.stop()
+    assert sink.rows_written == n_windows
+    return sink.path
+
+
+@pytest.mark.parametrize("n_windows, batch_rows, row_groups", [(12, 4, 3), (10, 4, 3), (30, 1024, 1)])
+def test_row_groups_hold_full_batches(tmp_path, n_windows, batch_rows, row_groups):
+    path = write_windows(tmp_path, n_windows, batch_rows)
+    f = pq.ParquetFile(path)
+
+    assert f.num_row_groups == row_groups
+    assert f.metadata.num_rows == n_windows
+    assert f.read().column("total_packets").to_pylist() == [float(i) for i in range(n_windows)]
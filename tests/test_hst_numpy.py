@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+import pytest
+from river.anomaly import HalfSpaceTrees
+
+from streamml.back.hst_numpy import NumpyHalfSpaceTrees
+
+FEATURES = ["a", "b", "c", "d"]
+SETTINGS = [(1, 1, 5), (3, 4, 10), (10, 8, 25), (5, 6, 7)]
+
+
+def make_stream(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    stream = []
+    for i in range(n):
+        x = {name: rng.random() for name in FEATURES}
+        if i % 37 == 0:
+            x["a"] = rng.uniform(0.95, 1.0)
+        stream.append(x)
+    return stream
+
+
+@pytest.mark.parametrize("n_trees, height, window_size", SETTINGS)
+def test_score_one_matches_river(n_trees, height, window_size):
+    river_model = HalfSpaceTrees(n_trees=n_trees, height=height, window_size=window_size, seed=42)
+    numpy_model = NumpyHalfSpaceTrees(n_trees=n_trees, height=height, window_size=window_size, seed=42)
+
+    # Several windows, so the reference masses roll over more than once.
+    for x in make_stream(5 * window_size + 3):
+        assert numpy_model.score_one(x) == pytest.approx(river_model.score_one(x), abs=1e-12)
+        river_model.learn_one(x)
+        numpy_model.learn_one(x)
+
+
+@pytest.mark.parametrize("n_trees, height, window_size", SETTINGS)
+def test_batches_match_one_by_one(n_trees, height, window_size):
+    stream = make_stream(4 * window_size + 5, seed=1)
+    one = NumpyHalfSpaceTrees(n_trees=n_trees, height=height, window_size=window_size, seed=7)
+    many = NumpyHalfSpaceTrees(n_trees=n_trees, height=height, window_size=window_size, seed=7)
+
+    for x in stream:
+        one.learn_one(x)
+    # Batches that straddle window pivots.
+    step = window_size + 2
+    for start in range(0, len(stream), step):
+        many.learn_many(stream[start:start + step])
+
+    assert one.counter == many.counter
+    np.testing.assert_array_equal(one.l_mass, many.l_mass)
+    np.testing.assert_array_equal(one.r_mass, many.r_mass)
+
+    probe = make_stream(50, seed=2)
+    np.testing.assert_allclose(many.score_many(probe), [one.score_one(x) for x in probe], rtol=0, atol=1e-12)
@@ -0,0 +1,90 @@
+import os
+import pickle
+
+from streamml.back.detector_profile_HST import DetectorProfileHST
+from streamml.back.model_checkpointer import ModelCheckpointer
+from streamml.back.profile_store import ProfileStore
+
+CONFIG = {"features": ["total_packets", "pkt_rate"], "params": {"interface": "lo", "trees": 3, "height": 3, "window": 5}}
+
+
+def make_profile(store: ProfileStore, keep: int = 3) -> DetectorProfileHST:
+    p = DetectorProfileHST("web", CONFIG)
+    p.store = store
+    p.checkpoint_keep = keep
+    return p
+
+
+def learn(p: DetectorProfileHST, n: int):
+    p.learn_samples({"total_packets": i, "pkt_rate": i / 10} for i in range(n))
+
+
+def test_checkpoints_are_pruned_to_keep(tmp_path, profile_logs):
+    store = ProfileStore(tmp_path)
+    p = make_profile(store, keep=2)
+    checkpointer = ModelCheckpointer(store, lambda: [p])
+
+    written = []
+    for i in range(5):
+        learn(p, 3)
+        assert checkpointer.checkpoint(p)
+        written.append(store.latest_checkpoint("web"))
+
+    assert store.list_checkpoints("web") == written[-2:]
+    assert pickle.loads(written[-1].read_bytes()).__class__ is p.model.__class__
+
+
+def test_unchanged_model_is_not_checkpointed_again(tmp_path, profile_logs):
+    store = ProfileStore(tmp_path)
+    p = make_profile(store)
+    checkpointer = ModelCheckpointer(store, lambda: [p])
+
+    assert not checkpointer.checkpoint(p)  # no model yet
+    learn(p, 3)
+    assert checkpointer.checkpoint(p)
+    assert not checkpointer.checkpoint(p)
+    assert checkpointer.checkpoint(p, force=True)
+    assert len(store.list_checkpoints("web")) == 2
+
+
+def test_latest_model_prefers_a_newer_checkpoint(tmp_path):
+    store = ProfileStore(tmp_path)
+    store.save_model_bytes("web", pickle.dumps("saved"))
+    checkpoint = store.save_checkpoint("web", pickle.dumps("checkpoint"), keep=3)
+    model = store.model_path("web")
+    os.utime(model, (1000, 1000))
+    os.utime(checkpoint, (2000, 2000))
+
+    assert store.load_latest_model("web") == "checkpoint"
+    assert store.load_latest_model("web", prefer_checkpoint=False) == "saved"
+
+    # A model saved on a clean shutdown after the last checkpoint wins.
+    os.utime(model, (3000, 3000))
+    assert store.load_latest_model("web") == "saved"
+
+
+def test_checkpoint_without_saved_model(tmp_path):
+    store = ProfileStore(tmp_path)
+    assert store.load_latest_model("web") is None
+    store.save_checkpoint("web", pickle.dumps("checkpoint"), keep=1)
+    assert store.load_latest_model("web") == "checkpoint"
+
+
+def test_profile_restores_the_newest_model(tmp_path, profile_logs):
+    store = ProfileStore(tmp_path)
+    p = make_profile(store)
+    learn(p, 10)
+    store.save_model_bytes("web", p.dump_model())
+    os.utime(store.model_path("web"), (1000, 1000))
+    learn(p, 10)
+    ModelCheckpointer(store, lambda: [p]).checkpoint(p)
+    newest = pickle.dumps(p.model, protocol=pickle.HIGHEST_PROTOCOL)
+
+    restored = make_profile(store)
+    restored._ensure_model()
+    assert pickle.dumps(restored.model, protocol=pickle.HIGHEST_PROTOCOL) == newest
+
+    restored = make_profile(store)
+    restored.restore_checkpoint = False
+    restored._ensure_model()
+    assert pickle.dumps(restored.model, protocol=pickle.HIGHEST_PROTOCOL) == store.model_path("web").read_bytes()
@@ -0,0 +1,191 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from streamml.back import notification_service as notification_module
+from streamml.back.notification_service import DISCORD_MESSAGE_LIMIT, NotificationService
+
+
+def compose(batch: list[str]) -> str:
+    return NotificationService()._compose(batch)
+
+
+def test_oversized_first_message_is_truncated():
+    batch = ["x" * (3 * DISCORD_MESSAGE_LIMIT), "second", "third"]
+    content = compose(batch)
+
+    assert len(content) == DISCORD_MESSAGE_LIMIT
+    assert content.startswith("**3 notifications**\nxxx")
+    assert content.endswith("\n\n... and 2 more")
+
+
+def test_exact_fit_batch_is_kept_whole():
+    header = "**3 notifications**\n"
+    size = (DISCORD_MESSAGE_LIMIT - len(header) - 2 * 2) // 3
+    batch = ["a" * size, "b" * size, "c" * (DISCORD_MESSAGE_LIMIT - len(header) - 4 - 2 * size)]
+    content = compose(batch)
+
+    assert len(content) == DISCORD_MESSAGE_LIMIT
+    assert content == header + "\n\n".join(batch)
+    assert "more" not in content
+
+
+def test_overflowing_batch_ends_with_count():
+    batch = ["m" * 900, "n" * 900, "o" * 900, "p"]
+    content = compose(batch)
+
+    assert len(content) <= DISCORD_MESSAGE_LIMIT
+    assert content.endswith("\n\n... and 2 more")
+    assert "m" * 900 in content and "n" * 900 in content
+
+
+class FakeClock:
+    # Stands in for the time module of notification_service; only waits move it forward.
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeStopEvent:
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.waits = []
+
+    def wait(self, timeout: float) -> bool:
+        self.waits.append(round(timeout, 6))
+        self.clock.now += timeout
+        return False
+
+    def is_set(self) -> bool:
+        return False
+
+
+class WebhookStandIn:
+    """Local HTTP server answering webhook posts with scripted (status, body, headers) responses."""
+
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stand_in.requests.append((self.client_address[1], json.loads(body)["content"]))
+                status, payload, headers = stand_in.responses.pop(0) if stand_in.responses else (204, None, {})
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/webhook"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def service(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(notification_module, "time", clock)
+    monkeypatch.setattr(notification_module.random, "uniform", lambda a, b: b)
+    svc = NotificationService(min_interval=0.5, max_retries=3, backoff_base=1.0)
+    svc._stop_event = FakeStopEvent(clock)
+    yield svc
+    svc.session and svc.session.close()
+
+
+def serve(service, responses: list) -> WebhookStandIn:
+    stand_in = WebhookStandIn(responses)
+    service.webhook_url = stand_in.url
+    return stand_in
+
+
+def test_digest_is_sent_once_after_429_and_5xx(service):
+    stand_in = serve(service, [(429, {"retry_after": 2.5}, {}), (503, None, {}), (204, None, {})])
+    try:
+        service._deliver(["first", "second", "third"])
+    finally:
+        stand_in.close()
+
+    contents = [content for _, content in stand_in.requests]
+    assert len(contents) == 3 and len(set(contents)) == 1
+    assert contents[0].startswith("**3 notifications**\nfirst")
+    # retry_after from the 429 body, then backoff_base * 2 ** 1 for the 503 of the second attempt.
+    assert service._stop_event.waits == [2.5, 2.0]
+    assert service.stats["retries"] == 2
+    assert service.stats["rate_limited"] == 1
+    assert service.stats["digests"] == 1
+    assert service.stats["sent_messages"] == 3
+    assert service.stats["failed_messages"] == 0
+
+
+def test_5xx_retries_back_off_and_give_up(service):
+    stand_in = serve(service, [(500, None, {})] * 10)
+    try:
+        service._deliver(["lost"])
+    finally:
+        stand_in.close()
+
+    assert len(stand_in.requests) == service.max_retries + 1
+    assert service._stop_event.waits == [1.0, 2.0, 4.0, 8.0]
+    assert service.stats["retries"] == service.max_retries + 1
+    assert service.stats["failed_messages"] == 1
+    assert service.stats["sent_messages"] == 0
+
+
+def test_retry_after_header_when_body_has_none(service):
+    stand_in = serve(service, [(429, None, {"Retry-After": "3"}), (204, None, {})])
+    try:
+        service._deliver(["x"])
+    finally:
+        stand_in.close()
+
+    assert service._stop_event.waits == [3.0]
+    assert service.stats["sent_messages"] == 1
+
+
+def test_exhausted_rate_limit_bucket_delays_next_post(service):
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "7"}
+    stand_in = serve(service, [(204, None, headers), (204, None, {})])
+    try:
+        service._deliver(["one"])
+        service._wait_until_unblocked()
+        service._deliver(["two"])
+    finally:
+        stand_in.close()
+
+    # The bucket reset (7 s) outlasts min_interval, so it sets the wait.
+    assert service._stop_event.waits == [7.0]
+    assert [content for _, content in stand_in.requests] == ["one", "two"]
+
+
+def test_one_session_is_reused(service):
+    stand_in = serve(service, [(204, None, {})] * 3)
+    try:
+        session = service._get_session()
+        for message in ["a", "b", "c"]:
+            assert service.send_message_now(message)
+    finally:
+        stand_in.close()
+
+    assert service.session is session
+    # A pooled keep-alive connection: every request came from the same client port.
+    assert len({port for port, _ in stand_in.requests}) == 1
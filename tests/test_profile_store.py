@@ -0,0 +1,144 @@
+import pickle
+
+import pytest
+
+from streamml.back import profile_store
+from streamml.back.detector_profile_HST import DetectorProfileHST
+from streamml.back.detector_profiles_manager import DetectorProfilesManager
+from streamml.back.profile_store import ProfileStore, atomic_write
+
+FEATURES = ["total_packets", "total_bytes", "pkt_rate"]
+CONFIG = {"features": FEATURES, "params": {"interface": "lo", "trees": 3, "height": 3, "window": 5}}
+
+
+def make_samples(n: int) -> list[dict]:
+    return [{"total_packets": i, "total_bytes": 100.0 * i, "pkt_rate": i / 10} for i in range(n)]
+
+
+def model_bytes(p: DetectorProfileHST) -> bytes:
+    return pickle.dumps(p.model, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.fixture
+def manager(tmp_path, profile_logs):
+    managers = []
+
+    def open_manager(**kwargs) -> DetectorProfilesManager:
+        m = DetectorProfilesManager(str(tmp_path / "profiles"), **kwargs)
+        managers.append(m)
+        return m
+
+    yield open_manager
+    for m in managers:
+        m.checkpointer.stop()
+
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / "sub" / "file.bin"
+    atomic_write(path, b"one")
+    atomic_write(path, b"two")
+    assert path.read_bytes() == b"two"
+    assert [p.name for p in path.parent.iterdir()] == ["file.bin"]
+
+
+def test_interrupted_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    atomic_write(path, b"old")
+
+    def crash(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(profile_store.os, "fsync", crash)
+    with pytest.raises(OSError):
+        atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"old"
+    # The temporary file is cleaned up as well.
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+
+
+def test_store_round_trip(tmp_path):
+    store = ProfileStore(tmp_path / "profiles")
+    assert store.list_profiles() == []
+
+    store.save_config("web", CONFIG)
+    store.save_model_bytes("web", pickle.dumps({"masses": [1, 2, 3]}))
+    assert store.list_profiles() == ["web"]
+    assert store.load_config("web") == CONFIG
+    assert store.load_model("web") == {"masses": [1, 2, 3]}
+    assert store.load_model("missing") is None
+
+    store.delete_profile("web")
+    assert store.list_profiles() == []
+
+
+def test_manager_saves_dirty_config_and_model(manager):
+    m = manager()
+    assert m.add_profile("web", CONFIG, notify=False)
+    p = m.get_profile("web")
+    assert not p.config_dirty
+    assert m.store.load_config("web")["params"] == CONFIG["params"]
+
+    p.learn_samples(make_samples(20))
+    assert p.model_dirty
+    assert m.try_save_profile(p, include_model=True, notify=False)
+    assert not p.model_dirty
+    assert m.store.model_path("web").read_bytes() == model_bytes(p)
+
+    # Clean profiles are not written again.
+    saved = []
+    m.store.save_config = lambda name, config: saved.append(name)
+    m.store.save_model_bytes = lambda name, data: saved.append(name)
+    assert m.try_save_profiles(notify=False, include_models=True)
+    assert saved == []
+
+
+def test_failed_save_keeps_the_profile_dirty(manager):
+    m = manager()
+    m.add_profile("web", CONFIG, notify=False)
+    p = m.get_profile("web")
+    p.learn_samples(make_samples(5))
+    p.config_dirty = True
+
+    def fail(*args):
+        raise OSError("read-only file system")
+
+    m.store.save_config = fail
+    assert not m.try_save_profile(p, include_model=True, notify=False)
+    assert p.config_dirty and p.model_dirty
+
+    m.store = ProfileStore(m.store.root)
+    m.store.save_model_bytes = fail
+    assert not m.try_save_profile(p, include_model=True, notify=False)
+    assert not p.config_dirty
+    assert p.model_dirty
+
+
+def test_model_loads_lazily_from_the_store(manager):
+    m = manager()
+    m.add_profile("web", CONFIG, notify=False)
+    p = m.get_profile("web")
+    p.learn_samples(make_samples(20))
+    m.try_save_profile(p, include_model=True, notify=False)
+    saved = model_bytes(p)
+
+    reloaded = manager().get_profile("web")
+    assert reloaded.model is None
+    reloaded._ensure_model()
+    assert model_bytes(reloaded) == saved
+
+
+def test_legacy_pickle_is_migrated(tmp_path, manager):
+    legacy = DetectorProfileHST("old", CONFIG)
+    legacy.learn_samples(make_samples(20))
+    legacy_file = tmp_path / "detector_profiles_objects"
+    legacy_file.write_bytes(pickle.dumps([legacy]))
+
+    m = manager(legacy_profiles_file=str(legacy_file))
+    assert [p.profile_name for p in m.profiles] == ["old"]
+    assert m.store.list_profiles() == ["old"]
+    assert m.store.load_config("old") == legacy.to_config()
+
+    reloaded = manager().get_profile("old")
+    reloaded._ensure_model()
+    assert model_bytes(reloaded) == model_bytes(legacy)
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from scapy.all import Ether, ICMP, IP, TCP, UDP
+
+from streamml.back.sharded_pipeline import ShardedExtractor
+from streamml.back.window import FEATURE_LIST, IFACE_COUNTERS, Window
+
+START = 1_700_000_000.0
+WINDOW = 0.5
+FEATURES = FEATURE_LIST + [IFACE_COUNTERS]
+
+
+def make_packets(n: int, seed: int = 0) -> list:
+    # Handshakes, data and closes of TCP connections between a few hosts, plus UDP and ICMP; several windows long.
+    rng = random.Random(seed)
+    packets = []
+    t = START
+    for i in range(n):
+        t += rng.expovariate(200)
+        client, server = f"10.0.{rng.randrange(4)}.{rng.randrange(1, 30)}", f"10.1.0.{rng.randrange(1, 5)}"
+        kind = rng.random()
+        if kind < 0.7:
+            sport, dport = 1024 + rng.randrange(50), rng.choice([22, 80, 443])
+            flags = rng.choice(["S", "SA", "A", "PA", "PA", "FA", "R"])
+            src, dst = (server, client) if flags == "SA" else (client, server)
+            if flags == "SA":
+                sport, dport = dport, sport
+            l4 = TCP(sport=sport, dport=dport, flags=flags) / (b"x" * rng.randrange(0, 200))
+        elif kind < 0.9:
+            src, dst = client, server
+            l4 = UDP(sport=1024 + rng.randrange(50), dport=53) / (b"q" * rng.randrange(10, 60))
+        else:
+            src, dst = client, server
+            l4 = ICMP()
+        pkt = Ether(bytes(Ether() / IP(src=src, dst=dst) / l4))
+        pkt.time = t
+        packets.append(pkt)
+    return packets
+
+
+def single_windows(packets: list) -> list[dict]:
+    window = Window(WINDOW, FEATURES)
+    window.set_interfaces(["eth0"])
+    window.window_start = START
+    windows = []
+    for pkt in packets:
+        result = window.add_packet(pkt, now=pkt.time, iface="eth0")
+        if result:
+            windows.append(result[0])
+    windows.append(window.flush(packets[-1].time)[0])
+    return windows
+
+
+def sharded_windows(packets: list, shards: int) -> list[dict]:
+    extractor = ShardedExtractor(shards, WINDOW, FEATURES, interface="eth0")
+    extractor.start(window_start=START)
+    try:
+        for pkt in packets:
+            extractor.add_frame(bytes(pkt), float(pkt.time), now=float(pkt.time))
+        extractor.flush(float(packets[-1].time))
+        windows = []
+        while extractor.pending():
+            result = extractor.collect(timeout=10)
+            if result:
+                windows.append(result[0])
+    finally:
+        extractor.stop()
+    return windows
+
+
+@pytest.mark.parametrize("shards", [2, 3])
+def test_sharded_features_equal_single_window(shards):
+    packets = make_packets(1500)
+    expected = single_windows(packets)
+    got = sharded_windows(packets, shards)
+
+    assert len(expected) > 5
+    assert "active_conns" in expected[0] and "packets_on_eth0" in expected[0]
+    assert got == expected